@@ -0,0 +1,139 @@
+"""ESLint parser benchmark: whole-blob json.loads vs. the streaming parser.
+
+Generates ESLint JSON output with 50k messages (a small share from security
+rules, the rest from style rules that are thrown away) and compares parse
+time and peak Python allocations.
+
+Usage (from backend/):
+    python benchmarks/eslint_parser.py [--messages 50000] [--security-ratio 0.02] [--runs 5]
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.eslint_tool import iter_security_findings  # noqa: E402
+
+
+STYLE_RULES = ["semi", "quotes", "indent", "no-unused-vars", "comma-dangle", "max-len", "eqeqeq"]
+SECURITY_RULES = [
+    "security/detect-object-injection",
+    "security/detect-non-literal-fs-filename",
+    "security/detect-child-process",
+    "no-eval",
+    "no-implied-eval"
+]
+
+
+def make_output(messages: int, security_ratio: float, files: int = 50, seed: int = 1) -> bytes:
+    """Build `eslint --format json` output with the given number of messages."""
+    rng = random.Random(seed)
+    results = []
+    per_file = messages // files
+    for index in range(files):
+        file_messages = []
+        for line in range(1, per_file + 1):
+            security = rng.random() < security_ratio
+            rule = rng.choice(SECURITY_RULES if security else STYLE_RULES)
+            message = {
+                "ruleId": rule,
+                "severity": rng.choice([1, 2]),
+                "message": f"Problem reported by {rule} on line {line}: \"{{value}}\" [x]",
+                "line": line,
+                "column": rng.randint(1, 80),
+                "nodeType": "Identifier",
+                "messageId": "unexpected",
+                "endLine": line,
+                "endColumn": rng.randint(1, 120)
+            }
+            if not security and rng.random() < 0.3:
+                message["fix"] = {"range": [line * 40, line * 40 + 1], "text": ";"}
+            file_messages.append(message)
+        results.append({
+            "filePath": f"/tmp/bundle/chunk-{index}.js",
+            "messages": file_messages,
+            "suppressedMessages": [],
+            "errorCount": len(file_messages),
+            "fatalErrorCount": 0,
+            "warningCount": 0,
+            "fixableErrorCount": 0,
+            "fixableWarningCount": 0,
+            "usedDeprecatedRules": []
+        })
+    return json.dumps(results).encode()
+
+
+def parse_blob(stdout: bytes):
+    """Previous implementation: decode all of stdout, json.loads, filter."""
+    findings = []
+    eslint_output = json.loads(stdout.decode())
+    for file_result in eslint_output:
+        for message in file_result.get("messages", []):
+            severity_map = {
+                2: "critical",
+                1: "high",
+                0: "low"
+            }
+            rule_id = message.get("ruleId", "")
+            if "security" in rule_id.lower() or "no-eval" in rule_id or "no-implied-eval" in rule_id:
+                severity = severity_map.get(message.get("severity", 1), "medium")
+                findings.append({
+                    "rule": rule_id,
+                    "severity": severity,
+                    "message": message.get("message", ""),
+                    "line": message.get("line"),
+                    "column": message.get("column")
+                })
+    return findings
+
+
+def parse_stream(stdout: bytes):
+    return list(iter_security_findings(io.BytesIO(stdout)))
+
+
+def measure(parse, stdout: bytes, runs: int):
+    """Return (best seconds, peak traced bytes, findings)."""
+    best = float("inf")
+    findings = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        findings = parse(stdout)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    parse(stdout)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, findings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--security-ratio", type=float, default=0.02)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    stdout = make_output(args.messages, args.security_ratio)
+    print(f"ESLint output: {args.messages} messages, {len(stdout) / 1e6:.1f} MB")
+
+    results = {}
+    for name, parse in (("json.loads", parse_blob), ("streaming", parse_stream)):
+        seconds, peak, findings = measure(parse, stdout, args.runs)
+        results[name] = findings
+        print(f"{name:>10}: {seconds * 1000:7.1f} ms  peak alloc {peak / 1e6:7.2f} MB  "
+              f"{len(findings)} findings")
+
+    if results["json.loads"] != results["streaming"]:
+        print("MISMATCH: parsers disagree on findings")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,89 @@
+"""Startup benchmark: time from process start to the first successful /health.
+
+Usage (from backend/):
+    python benchmarks/startup.py [--runs 5] [--target-ms 1000] [--importtime]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_health(timeout: float = 30.0) -> float:
+    """Start uvicorn and return seconds until /health answers 200."""
+    port = free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=0.5) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError("/health did not answer in time")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def import_report(top: int = 15):
+    """Print the slowest imports of src.main (cumulative microseconds)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line.split(":", 1)[1].split("|")]
+        rows.append((int(cumulative_us), int(self_us), name))
+    rows.sort(reverse=True)
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for cumulative_us, self_us, name in rows[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>8.1f}  {name}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=1000.0)
+    parser.add_argument("--importtime", action="store_true", help="Print an import-time report")
+    args = parser.parse_args()
+
+    if args.importtime:
+        import_report()
+        print()
+
+    samples = [time_to_health() * 1000 for _ in range(args.runs)]
+    median = statistics.median(samples)
+    print(f"time-to-first-/health over {args.runs} runs: "
+          f"median {median:.0f} ms, min {min(samples):.0f} ms, max {max(samples):.0f} ms "
+          f"(target {args.target_ms:.0f} ms)")
+    return 0 if median <= args.target_ms else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,121 @@
+"""Status response benchmark: model validation path vs. the fast path.
+
+Serves the same large status payload (many logs, node statuses and
+findings) through three routes and times full requests:
+  before  - StatusResponse(**data) plus response_model validation and stdlib json
+  after   - fast_response(): trusted dict encoded straight to bytes
+  debug   - fast_response() with VALIDATE_RESPONSES=true
+
+Usage (from backend/):
+    python benchmarks/status_response.py [--logs 5000] [--findings 1000] [--requests 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import src.serialization as serialization  # noqa: E402
+from src.models import StatusResponse  # noqa: E402
+from src.serialization import fast_response  # noqa: E402
+
+
+def make_status(logs: int, findings: int) -> dict:
+    """Build a status dict shaped like WorkflowManager.get_status()."""
+    nodes = ["file_analysis", "approval_check", "human_approval", "complete"]
+    return {
+        "status": "interrupted",
+        "node_statuses": {
+            node: {
+                "status": "completed",
+                "started_at": "2025-01-01T00:00:00Z",
+                "completed_at": "2025-01-01T00:00:01Z",
+                "error": None
+            }
+            for node in nodes
+        },
+        "logs": [
+            {
+                "timestamp": "2025-01-01T00:00:00.000000Z",
+                "level": "info",
+                "message": f"Processed chunk {i} of the uploaded bundle",
+                "node": nodes[i % len(nodes)]
+            }
+            for i in range(logs)
+        ],
+        "interrupt_payload": {
+            "nodeId": "approval_check",
+            "findings": [
+                {
+                    "rule": "security/detect-object-injection",
+                    "severity": "critical",
+                    "message": "Generic Object Injection Sink",
+                    "line": i + 1,
+                    "column": 5
+                }
+                for i in range(findings)
+            ],
+            "message": f"Found {findings} critical/high severity security issues"
+        },
+        "error": None
+    }
+
+
+def build_app(status_data: dict) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/before", response_model=StatusResponse)
+    async def before():
+        return StatusResponse(**status_data)
+
+    @app.get("/after", response_model=StatusResponse)
+    async def after():
+        return fast_response(StatusResponse, status_data)
+
+    return app
+
+
+def time_requests(client: TestClient, path: str, requests: int) -> list:
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(path)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200
+    return samples
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logs", type=int, default=5000)
+    parser.add_argument("--findings", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    status_data = make_status(args.logs, args.findings)
+    client = TestClient(build_app(status_data))
+    encoder = "orjson" if serialization.orjson is not None else "json (orjson not installed)"
+    print(f"Payload: {args.logs} logs, {args.findings} findings; encoder: {encoder}")
+
+    bodies = {}
+    for name, path, validate in (("before", "/before", False), ("after", "/after", False), ("debug", "/after", True)):
+        serialization.VALIDATE_RESPONSES = validate
+        time_requests(client, path, 5)  # warm up
+        samples = time_requests(client, path, args.requests)
+        bodies[name] = client.get(path).json()
+        print(f"{name:>7}: median {statistics.median(samples):7.2f} ms  "
+              f"p95 {sorted(samples)[int(len(samples) * 0.95) - 1]:7.2f} ms")
+
+    if not bodies["before"] == bodies["after"] == bodies["debug"]:
+        print("MISMATCH: response bodies differ")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
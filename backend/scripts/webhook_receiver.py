@@ -0,0 +1,60 @@
+"""Stand-in receiver for completion callbacks (callbackUrl).
+
+Prints every batch the backend POSTs. --fail N answers the first N
+requests with 503 to exercise retries.
+
+Usage (from backend/):
+    python scripts/webhook_receiver.py [--port 9000] [--fail 0]
+
+Then start an analysis with callbackUrl=http://127.0.0.1:9000/hook
+"""
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(fail: int):
+    state = {"requests": 0}
+    
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            state["requests"] += 1
+            if state["requests"] <= fail:
+                print(f"request {state['requests']}: answering 503", flush=True)
+                self.send_response(503)
+                self.end_headers()
+                return
+            events = json.loads(body)["events"]
+            print(f"request {state['requests']}: {len(events)} event(s)", flush=True)
+            for event in events:
+                summary = event["summary"]
+                print(
+                    f"  {event['threadId']} {event['status']}: "
+                    f"{summary['total_findings']} findings ({summary['critical_findings']} critical)",
+                    flush=True
+                )
+            self.send_response(204)
+            self.end_headers()
+        
+        def log_message(self, format, *args):
+            pass
+    
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--fail", type=int, default=0, help="Answer the first N requests with 503")
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.fail))
+    print(f"Listening on http://127.0.0.1:{args.port}/hook", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
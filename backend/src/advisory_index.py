@@ -0,0 +1,441 @@
+"""Memory-mapped npm advisory index built from a local OSV database.
+
+Build it once, with network access only for fetching the database:
+
+    curl -LO https://osv-vulnerabilities.storage.googleapis.com/npm/all.zip
+    python -m src.advisory_index build all.zip
+
+File layout (little-endian), all offsets from the start of the file:
+
+    header      magic "ADVX", format, counts, section offsets, build time
+    packages    (name, first range, range count), sorted by name bytes
+    ranges      affected version intervals, grouped by package
+    advisories  (id, summary, severity)
+    strings     u16 length-prefixed UTF-8, de-duplicated
+
+A lookup is a binary search over the package table followed by a scan
+of that package's ranges; nothing is parsed or loaded up front, so
+opening a multi-megabyte index costs one mmap() call.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zipfile
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from src.semver import Version, compare_versions, parse_version
+
+
+ADVISORY_INDEX_PATH = os.environ.get("ADVISORY_INDEX_PATH", "data/advisories.idx")
+
+MAGIC = b"ADVX"
+FORMAT_VERSION = 1
+# magic, format, reserved, package/range/advisory counts, section offsets, built_at
+HEADER = struct.Struct("<4sHHIIIIIIId")
+PACKAGE = struct.Struct("<III")  # name string, first range, range count
+# introduced (major, minor, patch, prerelease string), end (same), advisory, flags
+RANGE = struct.Struct("<9IB3x")
+ADVISORY = struct.Struct("<IIB3x")  # id string, summary string, severity
+STRING_LENGTH = struct.Struct("<H")
+
+# Range flags
+HAS_INTRODUCED = 1
+END_FIXED = 2  # End is exclusive
+END_LAST_AFFECTED = 4  # End is inclusive
+RELEASE = 0xFFFFFFFF  # Prerelease string offset of a release version
+MAX_COMPONENT = 0xFFFFFFFF
+
+SEVERITIES = ["low", "medium", "high", "critical"]
+# GitHub advisory severities as found in OSV database_specific
+_SEVERITY_MAP = {"LOW": "low", "MODERATE": "medium", "MEDIUM": "medium", "HIGH": "high", "CRITICAL": "critical"}
+MAX_SUMMARY_LENGTH = 300
+
+
+class AdvisoryMatch(NamedTuple):
+    """An advisory affecting a package version."""
+    advisory_id: str
+    summary: str
+    severity: str
+    fixed: Optional[str]  # First fixed version of the matched range, if any
+
+
+def _severity(record: Dict) -> str:
+    """Map an OSV record to a finding severity."""
+    if record.get("id", "").startswith("MAL-"):
+        # Malicious package: every install is compromised
+        return "critical"
+    specific = record.get("database_specific") or {}
+    return _SEVERITY_MAP.get(str(specific.get("severity", "")).upper(), "medium")
+
+
+def _intervals(affected: Dict) -> Iterator[Tuple[Optional[str], Optional[str], int]]:
+    """
+    Turn an OSV "affected" entry into (introduced, end, end flag) intervals.
+    
+    SEMVER / ECOSYSTEM range events are paired up in order; the explicit
+    versions list is used only when there are no such ranges.
+    """
+    ranged = False
+    for version_range in affected.get("ranges") or []:
+        if version_range.get("type") not in ("SEMVER", "ECOSYSTEM"):
+            continue
+        ranged = True
+        introduced: Optional[str] = None
+        open_range = False
+        for event in version_range.get("events") or []:
+            if "introduced" in event:
+                introduced = None if event["introduced"] == "0" else event["introduced"]
+                open_range = True
+            elif open_range and "fixed" in event:
+                yield introduced, event["fixed"], END_FIXED
+                open_range = False
+            elif open_range and "last_affected" in event:
+                yield introduced, event["last_affected"], END_LAST_AFFECTED
+                open_range = False
+        if open_range:
+            yield introduced, None, 0
+    if not ranged:
+        for version in affected.get("versions") or []:
+            yield version, version, END_LAST_AFFECTED
+
+
+def iter_osv_records(source: str) -> Iterator[Dict]:
+    """
+    Read OSV records from a .zip (as published by OSV), a directory of
+    .json files, or a single .json file holding one record or a list.
+    """
+    def decode(data: bytes) -> Iterator[Dict]:
+        loaded = json.loads(data)
+        yield from loaded if isinstance(loaded, list) else [loaded]
+    
+    if os.path.isdir(source):
+        for directory, _, files in os.walk(source):
+            for name in sorted(files):
+                if name.endswith(".json"):
+                    with open(os.path.join(directory, name), "rb") as f:
+                        yield from decode(f.read())
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for name in archive.namelist():
+                if name.endswith(".json"):
+                    yield from decode(archive.read(name))
+    else:
+        with open(source, "rb") as f:
+            yield from decode(f.read())
+
+
+class _StringPool:
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets: Dict[str, int] = {}
+    
+    def add(self, text: str) -> int:
+        offset = self.offsets.get(text)
+        if offset is None:
+            encoded = text.encode("utf-8")[:0xFFFF]
+            offset = len(self.data)
+            self.data += STRING_LENGTH.pack(len(encoded)) + encoded
+            self.offsets[text] = offset
+        return offset
+
+
+def _pack_version(version: Optional[Version], strings: _StringPool) -> Tuple[int, int, int, int]:
+    if version is None:
+        return 0, 0, 0, RELEASE
+    prerelease = strings.add(version.prerelease) if version.prerelease else RELEASE
+    return version.major, version.minor, version.patch, prerelease
+
+
+def build_index(records: Iterator[Dict], output: str = ADVISORY_INDEX_PATH) -> Dict[str, int]:
+    """
+    Write the index for the npm advisories among OSV records.
+    
+    Withdrawn advisories, other ecosystems and unparseable versions are
+    skipped. The file is replaced atomically, so running servers keep
+    reading the old one until they reopen it.
+    
+    Returns:
+        Counts: packages, ranges, advisories, bytes
+    """
+    strings = _StringPool()
+    advisories: List[bytes] = []
+    advisory_numbers: Dict[str, int] = {}
+    ranges_by_package: Dict[str, List[bytes]] = {}
+    
+    for record in records:
+        if record.get("withdrawn") or not record.get("id"):
+            continue
+        for affected in record.get("affected") or []:
+            package = affected.get("package") or {}
+            if package.get("ecosystem") != "npm" or not package.get("name"):
+                continue
+            for introduced, end, end_flag in _intervals(affected):
+                start = parse_version(introduced) if introduced is not None else None
+                stop = parse_version(end) if end is not None else None
+                if (introduced is not None and start is None) or (end is not None and stop is None):
+                    continue
+                if any(part > MAX_COMPONENT for version in (start, stop) if version for part in version[:3]):
+                    continue
+                number = advisory_numbers.get(record["id"])
+                if number is None:
+                    number = advisory_numbers[record["id"]] = len(advisories)
+                    summary = (record.get("summary") or record.get("details") or "").strip()
+                    advisories.append(ADVISORY.pack(
+                        strings.add(record["id"]),
+                        strings.add(summary.splitlines()[0][:MAX_SUMMARY_LENGTH] if summary else ""),
+                        SEVERITIES.index(_severity(record))
+                    ))
+                flags = end_flag | (HAS_INTRODUCED if start is not None else 0)
+                ranges_by_package.setdefault(package["name"], []).append(RANGE.pack(
+                    *_pack_version(start, strings),
+                    *_pack_version(stop, strings),
+                    number,
+                    flags
+                ))
+    
+    packages = bytearray()
+    ranges = bytearray()
+    range_count = 0
+    names = sorted(ranges_by_package, key=lambda name: name.encode("utf-8"))
+    for name in names:
+        package_ranges = ranges_by_package[name]
+        packages += PACKAGE.pack(strings.add(name), range_count, len(package_ranges))
+        for packed in package_ranges:
+            ranges += packed
+        range_count += len(package_ranges)
+    
+    packages_offset = HEADER.size
+    ranges_offset = packages_offset + len(packages)
+    advisories_offset = ranges_offset + len(ranges)
+    strings_offset = advisories_offset + ADVISORY.size * len(advisories)
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, 0,
+        len(names), range_count, len(advisories),
+        packages_offset, ranges_offset, advisories_offset, strings_offset,
+        time.time()
+    )
+    
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    partial = f"{output}.{os.getpid()}.tmp"
+    with open(partial, "wb") as f:
+        f.write(header)
+        f.write(packages)
+        f.write(ranges)
+        f.write(b"".join(advisories))
+        f.write(strings.data)
+    os.replace(partial, output)
+    return {
+        "packages": len(names),
+        "ranges": range_count,
+        "advisories": len(advisories),
+        "bytes": strings_offset + len(strings.data)
+    }
+
+
+class AdvisoryIndex:
+    """Read-only view of an index file through mmap."""
+    
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map.size() < HEADER.size:
+            raise ValueError(f"Not an advisory index: {path}")
+        (
+            magic, version, _,
+            self.package_count, self.range_count, self.advisory_count,
+            self._packages, self._ranges, self._advisories, self._strings,
+            self.built_at
+        ) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Not an advisory index (format {FORMAT_VERSION}): {path}")
+    
+    def _string(self, offset: int) -> bytes:
+        start = self._strings + offset
+        (length,) = STRING_LENGTH.unpack_from(self._map, start)
+        return self._map[start + STRING_LENGTH.size:start + STRING_LENGTH.size + length]
+    
+    def _version(self, major: int, minor: int, patch: int, prerelease: int) -> Version:
+        text = "" if prerelease == RELEASE else self._string(prerelease).decode("utf-8")
+        return Version(major, minor, patch, text)
+    
+    def _find(self, name: str) -> Optional[Tuple[int, int]]:
+        """Binary search for a package: (first range, range count)."""
+        key = name.encode("utf-8")
+        low, high = 0, self.package_count
+        while low < high:
+            middle = (low + high) // 2
+            name_offset, first, count = PACKAGE.unpack_from(self._map, self._packages + middle * PACKAGE.size)
+            candidate = self._string(name_offset)
+            if candidate == key:
+                return first, count
+            if candidate < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+    
+    def lookup(self, name: str, version: Optional[Version]) -> List[AdvisoryMatch]:
+        """
+        Advisories affecting a package version.
+        
+        Args:
+            name: npm package name
+            version: Installed version, or None when unknown; then only
+                advisories covering every version (e.g. malicious
+                packages) match
+        
+        Returns:
+            One match per advisory
+        """
+        if version is None:
+            return self.lookup_range(name, None, None)
+        return self.lookup_range(name, version, version, True)
+    
+    def lookup_range(
+        self,
+        name: str,
+        floor: Optional[Version],
+        ceiling: Optional[Version],
+        ceiling_inclusive: bool = False
+    ) -> List[AdvisoryMatch]:
+        """
+        Advisories affecting every version from floor up to ceiling.
+        
+        A match needs one affected interval covering the whole span, so a
+        range reaching past the fixed version does not match.
+        
+        Args:
+            name: npm package name
+            floor: Lowest version, None for no lower bound
+            ceiling: Highest version, None for no upper bound
+            ceiling_inclusive: Whether ceiling itself is in the span
+        
+        Returns:
+            One match per advisory
+        """
+        found = self._find(name)
+        if found is None:
+            return []
+        first, count = found
+        matches: Dict[int, AdvisoryMatch] = {}
+        for index in range(first, first + count):
+            fields = RANGE.unpack_from(self._map, self._ranges + index * RANGE.size)
+            advisory, flags = fields[8], fields[9]
+            if advisory in matches:
+                continue
+            if flags & HAS_INTRODUCED and (
+                floor is None or compare_versions(floor, self._version(*fields[0:4])) < 0
+            ):
+                continue
+            end_kind = flags & (END_FIXED | END_LAST_AFFECTED)
+            if end_kind:
+                if ceiling is None:
+                    continue
+                order = compare_versions(ceiling, self._version(*fields[4:8]))
+                # Versions in the span must all sit below a fixed version
+                # and at or below a last affected one
+                if order > 0 or (order == 0 and end_kind == END_FIXED and ceiling_inclusive):
+                    continue
+            id_offset, summary_offset, severity = ADVISORY.unpack_from(
+                self._map, self._advisories + advisory * ADVISORY.size
+            )
+            matches[advisory] = AdvisoryMatch(
+                advisory_id=self._string(id_offset).decode("utf-8"),
+                summary=self._string(summary_offset).decode("utf-8"),
+                severity=SEVERITIES[severity],
+                fixed=str(self._version(*fields[4:8])) if end_kind == END_FIXED else None
+            )
+        return list(matches.values())
+    
+    def get_info(self) -> Dict:
+        return {
+            "path": self.path,
+            "packages": self.package_count,
+            "ranges": self.range_count,
+            "advisories": self.advisory_count,
+            "bytes": self._map.size(),
+            "builtAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.built_at))
+        }
+    
+    def close(self):
+        self._map.close()
+
+
+class AdvisoryIndexLoader:
+    """
+    Opens the index on first use and reopens it when the file is rebuilt.
+    
+    A replaced file is picked up on the next call to current(); scans
+    still holding the previous index keep a valid mapping of it.
+    """
+    
+    def __init__(self, path: str = ADVISORY_INDEX_PATH):
+        self.path = path
+        self._index: Optional[AdvisoryIndex] = None
+        self._lock = threading.Lock()
+    
+    def current(self) -> Optional[AdvisoryIndex]:
+        """The index, or None if no index file exists."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        index = self._index
+        if index is not None and index.identity == identity:
+            return index
+        with self._lock:
+            if self._index is None or self._index.identity != identity:
+                # The old mapping is left to the garbage collector: scans may still use it
+                self._index = AdvisoryIndex(self.path)
+            return self._index
+
+
+# Global advisory index instance
+advisory_index = AdvisoryIndexLoader()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI entry point: python -m src.advisory_index build SOURCE"""
+    parser = argparse.ArgumentParser(description="Build or inspect the offline npm advisory index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Index an OSV database (.zip, directory or .json)")
+    build.add_argument("source")
+    build.add_argument("--output", default=ADVISORY_INDEX_PATH)
+    check = commands.add_parser("check", help="Look up a package version")
+    check.add_argument("package")
+    check.add_argument("version", nargs="?")
+    check.add_argument("--index", default=ADVISORY_INDEX_PATH)
+    args = parser.parse_args(argv)
+    
+    if args.command == "build":
+        if not os.path.exists(args.source):
+            parser.error(f"Advisory database not found: {args.source}")
+        started = time.perf_counter()
+        counts = build_index(iter_osv_records(args.source), args.output)
+        print(
+            f"Indexed {counts['advisories']} advisories for {counts['packages']} packages "
+            f"into {args.output} ({counts['bytes']} bytes, {time.perf_counter() - started:.1f}s)"
+        )
+        return 0
+    
+    index = AdvisoryIndex(args.index)
+    version = parse_version(args.version) if args.version else None
+    if args.version and version is None:
+        parser.error(f"Not a semantic version: {args.version}")
+    for match in index.lookup(args.package, version):
+        fixed = f", fixed in {match.fixed}" if match.fixed else ""
+        print(f"{match.advisory_id} [{match.severity}] {match.summary}{fixed}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,189 @@
+"""Cancellation and deadlines for workflow executions."""
+import heapq
+import os
+import signal
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+from src.logger import workflow_logger
+from src.state_backend import StateBackend, state_backend
+
+
+# Seconds between checks for cancels requested on other workers (shared backends)
+CANCEL_POLL_INTERVAL = float(os.environ.get("CANCEL_POLL_INTERVAL", "0.5"))
+
+DEADLINE_REASON = "Deadline exceeded"
+
+
+class WorkflowCancelled(Exception):
+    """Raised inside a running workflow once it has been cancelled."""
+    
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def kill_process_group(process: subprocess.Popen):
+    """Kill a subprocess started with start_new_session=True and all its children."""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        # Already exited (and possibly reaped)
+        pass
+
+
+class CancellationRegistry:
+    """
+    Tracks cancel requests and deadlines of the threads running here.
+    
+    A cancel is recorded in the state backend, so a queued job sees it
+    when a worker picks it up. If the thread is running in this process,
+    its subprocess groups are killed at once and the next check() in the
+    workflow raises WorkflowCancelled. With a shared backend a watchdog
+    polls for cancels requested on other workers.
+    """
+    
+    def __init__(self, backend: StateBackend = state_backend, poll_interval: float = CANCEL_POLL_INTERVAL):
+        self.backend = backend
+        self.poll_interval = poll_interval
+        # Called with the thread_id when its deadline passes (defaults to cancel)
+        self.expiry_handler: Optional[Callable[[str], None]] = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._active: Set[str] = set()                      # Threads running in this process
+        self._cancelled: Dict[str, str] = {}                # Active thread_id -> reason
+        self._processes: Dict[str, Set[subprocess.Popen]] = {}
+        self._deadlines: Dict[str, float] = {}              # thread_id -> epoch seconds
+        self._deadline_heap: List[Tuple[float, str]] = []
+        self._watchdog: Optional[threading.Thread] = None
+    
+    def cancel(self, thread_id: str, reason: str):
+        """Cancel a thread wherever it runs; kills its subprocesses if it runs here."""
+        self.backend.request_cancel(thread_id, reason)
+        with self._lock:
+            self._deadlines.pop(thread_id, None)
+            if thread_id not in self._active:
+                return
+            self._cancelled.setdefault(thread_id, reason)
+            processes = list(self._processes.get(thread_id, ()))
+        for process in processes:
+            kill_process_group(process)
+    
+    def reason(self, thread_id: str) -> Optional[str]:
+        """Get the cancel reason of a thread running here (no backend query)."""
+        return self._cancelled.get(thread_id)
+    
+    def check(self, thread_id: str):
+        """Raise WorkflowCancelled if the thread has been cancelled."""
+        reason = self._cancelled.get(thread_id)
+        if reason is not None:
+            raise WorkflowCancelled(reason)
+    
+    @contextmanager
+    def running(self, thread_id: str) -> Iterator[Optional[str]]:
+        """
+        Mark a thread as executing in this process.
+        
+        Yields the cancel reason if the thread was cancelled before it
+        started, else None.
+        """
+        with self._lock:
+            self._active.add(thread_id)
+        self._ensure_watchdog()
+        try:
+            # Registered first, so a concurrent cancel() is seen by one side
+            reason = self.backend.cancel_reason(thread_id)
+            if reason is not None:
+                with self._lock:
+                    self._cancelled.setdefault(thread_id, reason)
+            yield self._cancelled.get(thread_id)
+        finally:
+            with self._lock:
+                self._active.discard(thread_id)
+                self._cancelled.pop(thread_id, None)
+                self._processes.pop(thread_id, None)
+    
+    @contextmanager
+    def track_process(self, thread_id: str, process: subprocess.Popen) -> Iterator[None]:
+        """Kill the process group of process if the thread is cancelled while it runs."""
+        with self._lock:
+            self._processes.setdefault(thread_id, set()).add(process)
+            cancelled = thread_id in self._cancelled
+        if cancelled:
+            kill_process_group(process)
+        try:
+            yield
+        finally:
+            with self._lock:
+                processes = self._processes.get(thread_id)
+                if processes is not None:
+                    processes.discard(process)
+    
+    def set_deadline(self, thread_id: str, deadline: float):
+        """Cancel the thread at deadline (epoch seconds) unless cleared first."""
+        with self._lock:
+            self._deadlines[thread_id] = deadline
+            heapq.heappush(self._deadline_heap, (deadline, thread_id))
+            self._wakeup.notify()
+        self._ensure_watchdog()
+    
+    def clear_deadline(self, thread_id: str):
+        """Drop a thread's deadline."""
+        with self._lock:
+            self._deadlines.pop(thread_id, None)
+    
+    def _ensure_watchdog(self):
+        if self._watchdog is not None:
+            return
+        with self._lock:
+            if self._watchdog is None:
+                self._watchdog = threading.Thread(target=self._watch, name="cancel-watchdog", daemon=True)
+                self._watchdog.start()
+    
+    def _expired(self, now: float) -> List[str]:
+        """Pop threads whose deadline has passed (lock held)."""
+        expired = []
+        while self._deadline_heap and self._deadline_heap[0][0] <= now:
+            deadline, thread_id = heapq.heappop(self._deadline_heap)
+            # Skip heap entries of cleared or replaced deadlines
+            if self._deadlines.get(thread_id) == deadline:
+                del self._deadlines[thread_id]
+                expired.append(thread_id)
+        return expired
+    
+    def _on_deadline(self, thread_id: str):
+        if self.expiry_handler is not None:
+            self.expiry_handler(thread_id)
+        else:
+            self.cancel(thread_id, DEADLINE_REASON)
+    
+    def _watch(self):
+        while True:
+            with self._lock:
+                timeout = self.poll_interval
+                if self._deadline_heap:
+                    timeout = min(timeout, max(0.0, self._deadline_heap[0][0] - time.time()))
+                self._wakeup.wait(timeout)
+                expired = self._expired(time.time())
+                active = list(self._active - set(self._cancelled)) if self.backend.shared else []
+            
+            for thread_id in expired:
+                try:
+                    self._on_deadline(thread_id)
+                except Exception as e:
+                    workflow_logger.log(thread_id, "error", f"Deadline handling failed: {str(e)}", "system")
+            
+            # Pick up cancels requested through other workers
+            for thread_id in active:
+                try:
+                    reason = self.backend.cancel_reason(thread_id)
+                    if reason is not None:
+                        self.cancel(thread_id, reason)
+                except Exception as e:
+                    workflow_logger.log(thread_id, "warn", f"Cancel poll failed: {str(e)}", "system")
+
+
+# Global cancellation registry
+cancellation_registry = CancellationRegistry()
@@ -0,0 +1,104 @@
+"""Bulk reads of the latest checkpoint of many threads."""
+from typing import Dict, Iterable, Iterator, List, Tuple
+from src.logger import workflow_logger
+
+
+# Stay well under SQLite's bound-parameter limit
+MAX_QUERY_IDS = 500
+
+# Latest checkpoint of each thread after the given thread_id, in thread_id order
+LATEST_CHECKPOINTS_SQL = """
+    SELECT c.thread_id, c.type, c.checkpoint
+    FROM checkpoints c
+    JOIN (
+        SELECT thread_id, MAX(checkpoint_id) AS checkpoint_id
+        FROM checkpoints
+        WHERE checkpoint_ns = '' AND thread_id > ?
+        GROUP BY thread_id
+        ORDER BY thread_id
+        LIMIT ?
+    ) latest
+    ON c.thread_id = latest.thread_id
+    AND c.checkpoint_ns = ''
+    AND c.checkpoint_id = latest.checkpoint_id
+    ORDER BY c.thread_id
+"""
+
+# Latest checkpoint of each listed thread
+LATEST_FOR_THREADS_SQL = """
+    SELECT c.thread_id, c.type, c.checkpoint
+    FROM checkpoints c
+    JOIN (
+        SELECT thread_id, MAX(checkpoint_id) AS checkpoint_id
+        FROM checkpoints
+        WHERE checkpoint_ns = '' AND thread_id IN ({placeholders})
+        GROUP BY thread_id
+    ) latest
+    ON c.thread_id = latest.thread_id
+    AND c.checkpoint_ns = ''
+    AND c.checkpoint_id = latest.checkpoint_id
+"""
+
+
+def _decode_rows(checkpointer, rows: List[Tuple]) -> Iterator[Tuple[str, Dict]]:
+    for thread_id, type_, blob in rows:
+        try:
+            checkpoint = checkpointer.serde.loads_typed((type_, blob))
+        except Exception as e:
+            workflow_logger.log(thread_id, "warn", f"Unreadable checkpoint: {str(e)}", "system")
+            continue
+        yield thread_id, checkpoint.get("channel_values", {})
+
+
+def iter_thread_states(checkpointer, batch_size: int = 500) -> Iterator[Tuple[str, Dict]]:
+    """
+    Yield (thread_id, channel_values) from the latest checkpoint of every thread.
+    
+    Reads in keyset-paginated batches so memory stays bounded no matter
+    how many threads the checkpoint database holds. Requires a SQL
+    checkpointer (one exposing cursor()).
+    """
+    after = ""
+    while True:
+        with checkpointer.cursor(transaction=False) as cur:
+            rows = cur.execute(LATEST_CHECKPOINTS_SQL, (after, batch_size)).fetchall()
+        if not rows:
+            return
+        yield from _decode_rows(checkpointer, rows)
+        after = rows[-1][0]
+
+
+def load_latest_values(checkpointer, thread_ids: Iterable[str]) -> Dict[str, Dict]:
+    """
+    Get the channel values of the latest checkpoint of each thread.
+    
+    SQL checkpointers are read with one query per MAX_QUERY_IDS threads
+    instead of one graph.get_state() per thread. Other checkpointers
+    (in-memory) are read tuple by tuple, which costs no round trips.
+    
+    Args:
+        checkpointer: LangGraph checkpoint saver
+        thread_ids: Threads to read
+    
+    Returns:
+        thread_id -> channel values, for threads that have a checkpoint
+    """
+    ids = list(dict.fromkeys(thread_ids))
+    values: Dict[str, Dict] = {}
+    if not ids:
+        return values
+    
+    if hasattr(checkpointer, "cursor"):
+        with checkpointer.cursor(transaction=False) as cur:
+            for start in range(0, len(ids), MAX_QUERY_IDS):
+                chunk = ids[start:start + MAX_QUERY_IDS]
+                sql = LATEST_FOR_THREADS_SQL.format(placeholders=",".join("?" * len(chunk)))
+                rows = cur.execute(sql, chunk).fetchall()
+                values.update(_decode_rows(checkpointer, rows))
+        return values
+    
+    for thread_id in ids:
+        checkpoint_tuple = checkpointer.get_tuple({"configurable": {"thread_id": thread_id}})
+        if checkpoint_tuple is not None:
+            values[thread_id] = checkpoint_tuple.checkpoint.get("channel_values", {})
+    return values
@@ -0,0 +1,148 @@
+"""Single-flight coalescing of identical concurrent analyses."""
+import copy
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+from src.logger import workflow_logger
+from src.tracing import tracer
+
+
+COALESCE_ANALYSES = os.environ.get("COALESCE_ANALYSES", "true").lower() == "true"
+
+
+class _Flight:
+    """One analysis run and the threads waiting for its result."""
+    
+    __slots__ = ("leader", "followers")
+    
+    def __init__(self, leader: str):
+        self.leader = leader
+        # (thread_id, resume callback, time joined in ns)
+        self.followers: List[Tuple[str, Callable[[], None], int]] = []
+
+
+class SingleFlight:
+    """
+    Runs one call per key at a time and shares its result.
+    
+    Workers call join() before running a job. The first thread to join a
+    key leads and runs the call; threads joining the same key while it is
+    in flight are attached as followers and give their worker back. When
+    the leader finishes, each follower gets a deep copy of its result
+    (so every workflow keeps its own state) and its resume callback
+    re-queues the job, which then picks the result up at once in run().
+    If the leader fails or is cancelled, its followers are re-queued
+    without a result and one of them leads the next run.
+    """
+    
+    def __init__(self, enabled: bool = COALESCE_ANALYSES):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._leading: Dict[str, Hashable] = {}  # leader thread -> key of its flight
+        self._handoffs: Dict[str, Any] = {}  # follower thread -> result copy not yet taken
+        self.leaders = 0
+        self.coalesced = 0
+    
+    def join(self, key: Hashable, thread_id: str, resume: Callable[[], None]) -> bool:
+        """
+        Claim the work for key before a worker starts on it.
+        
+        Args:
+            key: Identity of the work (e.g. content digest and analysis type)
+            thread_id: Workflow thread about to run
+            resume: Re-queues the thread's job; called once the run it
+                was attached to has finished
+        
+        Returns:
+            True if the caller should go ahead (it leads, already holds a
+            shared result, or coalescing is off); False if it was attached
+            to the identical run in flight and must give its worker back
+        """
+        if not self.enabled:
+            return True
+        with self._lock:
+            if thread_id in self._handoffs or thread_id in self._leading:
+                return True
+            flight = self._flights.get(key)
+            if flight is None:
+                self._flights[key] = _Flight(thread_id)
+                self._leading[thread_id] = key
+                self.leaders += 1
+                return True
+            flight.followers.append((thread_id, resume, time.time_ns()))
+        workflow_logger.log(
+            thread_id,
+            "info",
+            f"Sharing the result of the identical analysis in thread {flight.leader}",
+            "coalescing"
+        )
+        return False
+    
+    def run(self, key: Hashable, thread_id: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn for key, or return the result shared with this thread.
+        
+        Threads that did not join() first (e.g. recovered workflows) run
+        fn on their own.
+        """
+        if not self.enabled:
+            return fn()
+        with self._lock:
+            if thread_id in self._handoffs:
+                return self._handoffs.pop(thread_id)
+            leading = self._leading.get(thread_id) == key
+        if not leading:
+            return fn()
+        try:
+            result = fn()
+        except BaseException:
+            self.release(thread_id)
+            raise
+        self._finish(thread_id, result, succeeded=True)
+        return result
+    
+    def release(self, thread_id: str):
+        """
+        Drop whatever a thread still holds once its job is over.
+        
+        A leader that never completed its run hands it on: its followers
+        are re-queued without a result.
+        """
+        with self._lock:
+            self._handoffs.pop(thread_id, None)
+        self._finish(thread_id, None, succeeded=False)
+    
+    def _finish(self, thread_id: str, result: Any, succeeded: bool):
+        with self._lock:
+            key = self._leading.pop(thread_id, None)
+            if key is None:
+                return
+            flight = self._flights.pop(key)
+            if succeeded:
+                for follower, _, _ in flight.followers:
+                    self._handoffs[follower] = copy.deepcopy(result)
+                self.coalesced += len(flight.followers)
+        now = time.time_ns()
+        for follower, resume, joined in flight.followers:
+            tracer.record("coalescing.wait", follower, joined, now, leader=thread_id)
+            try:
+                resume()
+            except Exception as e:
+                workflow_logger.log(follower, "error", f"Failed to re-queue workflow: {str(e)}", "coalescing")
+    
+    def get_metrics(self) -> Dict:
+        """Analyses run vs. submissions that shared another one's result."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "in_flight": len(self._flights),
+                "waiting": sum(len(flight.followers) for flight in self._flights.values()),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced
+            }
+
+
+# Global single-flight group for file analyses
+analysis_flights = SingleFlight()
@@ -0,0 +1,299 @@
+"""Offline dependency vulnerability analysis against the local advisory index."""
+import bisect
+import json
+import os
+import re
+from typing import Dict, List, Optional, Tuple, Union
+from src.advisory_index import AdvisoryIndexLoader, AdvisoryMatch, advisory_index
+from src.logger import workflow_logger
+from src.semver import Version, VersionRange, parse_version, range_bounds
+from src.state import SecurityFinding
+
+
+DEPENDENCY_SCAN_ENABLED = os.environ.get("DEPENDENCY_SCAN_ENABLED", "true").lower() == "true"
+
+# Manifests and lockfiles analyzed in path scans (file_type "manifest")
+MANIFEST_FILES = {"package.json", "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml"}
+
+# package.json sections whose packages get installed
+DEPENDENCY_SECTIONS = ["dependencies", "devDependencies", "optionalDependencies"]
+
+# require("x"), import("x"), import ... from "x", import "x", export ... from "x"
+_SPECIFIER_PATTERN = re.compile(
+    r"""(?:\brequire\s*\(\s*|\bimport\s*\(\s*|\bimport\s+(?:[\w*${},\s]+?\s+from\s+)?|\bexport\s+[\w*${},\s]+?\s+from\s+)"""
+    r"""(["'])([^"'\n]+)\1"""
+)
+_PACKAGE_NAME_PATTERN = re.compile(r"^(?:@[a-z0-9-~][a-z0-9-._~]*/)?[a-z0-9-~][a-z0-9-._~]*$")
+
+NODE_BUILTINS = frozenset([
+    "assert", "async_hooks", "buffer", "child_process", "cluster", "console", "constants",
+    "crypto", "dgram", "diagnostics_channel", "dns", "domain", "events", "fs", "http", "http2",
+    "https", "inspector", "module", "net", "os", "path", "perf_hooks", "process", "punycode",
+    "querystring", "readline", "repl", "stream", "string_decoder", "sys", "timers", "tls",
+    "trace_events", "tty", "url", "util", "v8", "vm", "wasi", "worker_threads", "zlib"
+])
+
+# A dependency to check: package name, installed version or declared range
+# (None if unknown), line
+Dependency = Tuple[str, Union[Version, VersionRange, None], Optional[int]]
+
+_missing_index_logged = False
+
+
+class _LineIndex:
+    """Maps character offsets to 1-based line numbers."""
+    
+    def __init__(self, content: str):
+        self._newlines = [match.start() for match in re.finditer("\n", content)]
+    
+    def line(self, offset: int) -> int:
+        return bisect.bisect_right(self._newlines, offset - 1) + 1
+
+
+def package_name(specifier: str) -> Optional[str]:
+    """
+    npm package a module specifier resolves to ("lodash/fp" -> "lodash").
+    
+    Returns:
+        None for relative paths, Node built-ins, URLs and aliases
+    """
+    if specifier.startswith((".", "/", "node:")) or ":" in specifier:
+        return None
+    parts = specifier.split("/")
+    name = "/".join(parts[:2]) if specifier.startswith("@") else parts[0]
+    if name in NODE_BUILTINS or not _PACKAGE_NAME_PATTERN.match(name):
+        return None
+    return name
+
+
+def extract_imports(content: str) -> List[Dependency]:
+    """Packages required or imported by JS/TS source (version unknown)."""
+    lines = _LineIndex(content)
+    found: List[Dependency] = []
+    for match in _SPECIFIER_PATTERN.finditer(content):
+        name = package_name(match.group(2))
+        if name is not None:
+            found.append((name, None, lines.line(match.start(2))))
+    return found
+
+
+def _locate(content: str, lines: _LineIndex, key: str, start: int = 0) -> Optional[int]:
+    offset = content.find(f'"{key}"', start)
+    return lines.line(offset) if offset >= 0 else None
+
+
+def parse_package_json(content: str) -> List[Dependency]:
+    """Declared dependencies with the version ranges they allow."""
+    manifest = json.loads(content)
+    if not isinstance(manifest, dict):
+        raise ValueError("package.json is not an object")
+    lines = _LineIndex(content)
+    found: List[Dependency] = []
+    for section in DEPENDENCY_SECTIONS:
+        declared = manifest.get(section)
+        if not isinstance(declared, dict):
+            continue
+        section_start = content.find(f'"{section}"')
+        for key, spec in declared.items():
+            if not isinstance(spec, str):
+                continue
+            name = key
+            if spec.startswith("npm:"):
+                # Alias: "alias": "npm:real-name@range"
+                name, _, spec = spec[4:].rpartition("@")
+            found.append((name, range_bounds(spec), _locate(content, lines, key, max(section_start, 0))))
+    return found
+
+
+def parse_package_lock(content: str) -> List[Dependency]:
+    """Installed packages of package-lock.json / npm-shrinkwrap.json (v1-v3)."""
+    lock = json.loads(content)
+    if not isinstance(lock, dict):
+        raise ValueError("lockfile is not an object")
+    lines = _LineIndex(content)
+    found: List[Dependency] = []
+    packages = lock.get("packages")
+    if isinstance(packages, dict):
+        # v2/v3: "node_modules/a/node_modules/b" -> b
+        for path, entry in packages.items():
+            if "node_modules/" not in path or not isinstance(entry, dict) or entry.get("link"):
+                continue
+            name = entry.get("name") or path.rsplit("node_modules/", 1)[1]
+            version = parse_version(str(entry.get("version", "")))
+            found.append((name, version, _locate(content, lines, path)))
+        return found
+    
+    # v1: nested "dependencies" trees
+    def walk(dependencies: Dict):
+        for name, entry in dependencies.items():
+            if not isinstance(entry, dict):
+                continue
+            found.append((name, parse_version(str(entry.get("version", ""))), _locate(content, lines, name)))
+            if isinstance(entry.get("dependencies"), dict):
+                walk(entry["dependencies"])
+    
+    walk(lock.get("dependencies") or {})
+    return found
+
+
+_YARN_ENTRY_PATTERN = re.compile(r"^(\S[^\n]*):\s*$", re.MULTILINE)
+_YARN_VERSION_PATTERN = re.compile(r"""^\s+version:?\s+"?([^"\s]+)"?\s*$""", re.MULTILINE)
+
+
+def parse_yarn_lock(content: str) -> List[Dependency]:
+    """Resolved packages of yarn.lock (classic v1 and berry)."""
+    lines = _LineIndex(content)
+    found: List[Dependency] = []
+    entries = list(_YARN_ENTRY_PATTERN.finditer(content))
+    for position, entry in enumerate(entries):
+        # 'lodash@^4.17.0, lodash@^4.17.21' / '"@babel/core@npm:^7.0.0"'
+        selector = entry.group(1).split(",")[0].strip().strip('"')
+        name = selector[:selector.find("@", 1)] if selector.find("@", 1) > 0 else ""
+        if not name or name == "__metadata":
+            continue
+        end = entries[position + 1].start() if position + 1 < len(entries) else len(content)
+        version = _YARN_VERSION_PATTERN.search(content, entry.end(), end)
+        if version is not None:
+            found.append((name, parse_version(version.group(1)), lines.line(entry.start())))
+    return found
+
+
+# "  /lodash@4.17.21:" (v6), "  /lodash/4.17.21:" (v5), "  lodash@4.17.21:" and
+# "  'react-dom@18.2.0(react@18.2.0)':" (v9)
+_PNPM_PACKAGE_PATTERN = re.compile(
+    r"^ {2}'?/?((?:@[^/\s'@]+/)?[^/\s'@(]+)[@/](\d[^:'(\s_]*)",
+    re.MULTILINE
+)
+
+
+def parse_pnpm_lock(content: str) -> List[Dependency]:
+    """Resolved packages of pnpm-lock.yaml (v5-v9)."""
+    lines = _LineIndex(content)
+    sections = re.search(r"^(?:packages|snapshots):\s*$", content, re.MULTILINE)
+    start = sections.start() if sections else 0
+    return [
+        (match.group(1), parse_version(match.group(2)), lines.line(match.start()))
+        for match in _PNPM_PACKAGE_PATTERN.finditer(content, start)
+    ]
+
+
+MANIFEST_PARSERS = {
+    "package.json": parse_package_json,
+    "package-lock.json": parse_package_lock,
+    "npm-shrinkwrap.json": parse_package_lock,
+    "yarn.lock": parse_yarn_lock,
+    "pnpm-lock.yaml": parse_pnpm_lock
+}
+
+
+def extract_dependencies(file_content: str, file_type: str, file_name: Optional[str] = None) -> List[Dependency]:
+    """
+    Packages a file depends on.
+    
+    Source files yield their imports with unknown versions; manifests
+    (file_type "manifest") are parsed by file name.
+    
+    Raises:
+        ValueError: Malformed manifest
+    """
+    if file_type == "manifest":
+        parser = MANIFEST_PARSERS.get(os.path.basename(file_name or ""))
+        return parser(file_content) if parser else []
+    if file_type in ["js", "jsx", "ts", "tsx"]:
+        return extract_imports(file_content)
+    return []
+
+
+def _message(name: str, version: Union[Version, VersionRange, None], whole_range: bool, match: AdvisoryMatch) -> str:
+    if version is None:
+        subject = f"{name} (all versions affected)"
+    elif isinstance(version, VersionRange) and version.ceiling_inclusive and version.floor == version.ceiling:
+        subject = f"{name}@{version.floor} (declared)"
+    elif isinstance(version, VersionRange) and whole_range:
+        subject = f'{name} (every version "{version.spec}" allows is affected)'
+    elif isinstance(version, VersionRange):
+        subject = f'{name} ("{version.spec}" still allows affected {version.floor})'
+    else:
+        subject = f"{name}@{version}"
+    fix = f"; fixed in {match.fixed}" if match.fixed else "; no fixed version"
+    return f"{subject}: {match.summary} ({match.advisory_id}){fix}"
+
+
+def analyze_dependencies(
+    file_content: str,
+    file_type: str,
+    thread_id: str,
+    file_name: Optional[str] = None,
+    index: AdvisoryIndexLoader = advisory_index
+) -> List[SecurityFinding]:
+    """
+    Check a file's dependencies against the local advisory index.
+    
+    Versions come from lockfiles. A package.json range is reported at the
+    advisory's severity only if every version it allows is affected; if
+    just its lower versions are, npm installs a fixed one, so the finding
+    is low severity (the lockfile tells what is actually installed).
+    Imports in source files carry no version, so they match only
+    advisories affecting every version (e.g. malicious packages). No
+    network access is made.
+    
+    Returns:
+        One finding per affected package version and advisory
+    """
+    global _missing_index_logged
+    if not DEPENDENCY_SCAN_ENABLED:
+        return []
+    loaded = index.current()
+    if loaded is None:
+        if not _missing_index_logged:
+            _missing_index_logged = True
+            workflow_logger.log(
+                "system",
+                "warn",
+                f"Dependency scanning disabled: no advisory index at {index.path} "
+                f"(build one with python -m src.advisory_index build)",
+                "dependency_scanner"
+            )
+        return []
+    
+    try:
+        dependencies = extract_dependencies(file_content, file_type, file_name)
+    except ValueError as e:
+        workflow_logger.log(thread_id, "warn", f"Failed to parse {file_name}: {str(e)}", "dependency_scanner")
+        return []
+    
+    findings: List[SecurityFinding] = []
+    seen = set()
+    for name, version, line in dependencies:
+        if isinstance(version, VersionRange):
+            whole = loaded.lookup_range(name, version.floor, version.ceiling, version.ceiling_inclusive)
+            whole_ids = {match.advisory_id for match in whole}
+            matches = whole + [
+                match for match in loaded.lookup(name, version.floor) if match.advisory_id not in whole_ids
+            ]
+        else:
+            whole_ids = set()
+            matches = loaded.lookup(name, version)
+        for match in matches:
+            key = (name, version, match.advisory_id)
+            if key in seen:
+                continue
+            seen.add(key)
+            whole_range = match.advisory_id in whole_ids
+            findings.append({
+                "rule": f"dependency/{match.advisory_id}",
+                "severity": match.severity if whole_range or not isinstance(version, VersionRange) else "low",
+                "message": _message(name, version, whole_range, match),
+                "line": line,
+                "column": None
+            })
+    
+    if dependencies:
+        workflow_logger.log(
+            thread_id,
+            "info",
+            f"Dependency scan checked {len({name for name, _, _ in dependencies})} packages, "
+            f"found {len(findings)} known vulnerabilities",
+            "dependency_scanner"
+        )
+    return findings
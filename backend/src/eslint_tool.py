@@ -1,11 +1,246 @@
 """ESLint integration as a LangGraph tool."""
 import subprocess
 import json
+import re
 import tempfile
+import threading
+import time
 import os
-from typing import List, Dict
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional
 from src.state import SecurityFinding
 from src.logger import workflow_logger
+from src.cancellation import WorkflowCancelled, cancellation_registry, kill_process_group
+from src.dependency_scanner import analyze_dependencies
+from src.resource_limits import (
+    STDERR_TAIL_BYTES,
+    ResourceLimitExceeded,
+    apply_limits,
+    classify_failure,
+    resource_accounting,
+    wait_with_usage
+)
+from src.rule_profiler import format_breakdown, parse_stats, rule_profiler, should_profile
+from src.tracing import tracer
+
+# File extensions accepted by the analyzers (uploads and path scans)
+SUPPORTED_FILE_TYPES = ["js", "jsx", "ts", "tsx", "py"]
+
+# ESLint severity: 2=error, 1=warning, 0=off
+SEVERITY_MAP = {2: "critical", 1: "high", 0: "low"}
+
+# Security rules: eslint-plugin-security plus the core eval rules
+SECURITY_RULE_PATTERN = re.compile(rb"(?i:security)|no-eval|no-implied-eval")
+
+# JSON tokens the stream parser needs: strings (group 1 is None if the
+# string is cut off at the end of the buffer) and brackets
+_TOKEN_PATTERN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*(")?|[{}\[\]]')
+
+# ESLint writes ruleId first; the rest of the message, including fix and
+# suggestions (up to MESSAGE_NESTING levels deep), is then matched to its
+# closing brace in one regex call
+_MESSAGE_HEAD_PATTERN = re.compile(rb'\{\s*"ruleId"\s*:\s*("[^"\\]*(?:\\.[^"\\]*)*"|null)')
+MESSAGE_NESTING = 4
+
+
+def _nested_body_pattern(levels: int) -> bytes:
+    # Possessive quantifiers keep a truncated message from backtracking
+    body = rb'(?:[^"{}\[\]]++|"[^"\\]*+(?:\\.[^"\\]*+)*+")*+'
+    for _ in range(levels):
+        body = rb'(?:[^"{}\[\]]++|"[^"\\]*+(?:\\.[^"\\]*+)*+"|\{' + body + rb'\}|\[' + body + rb'\])*+'
+    return body
+
+
+_MESSAGE_REST_PATTERN = re.compile(_nested_body_pattern(MESSAGE_NESTING))
+
+# Bytes read from the ESLint pipe at a time
+READ_CHUNK_SIZE = 64 * 1024
+
+ESLINT_TIMEOUT = 30
+
+
+def _rule_list(name: str) -> List[str]:
+    return [rule.strip() for rule in os.environ.get(name, "").split(",") if rule.strip()]
+
+
+# Rule allow/deny lists for the hot path (comma-separated rule ids). With an
+# allow list only the listed rules run, as warnings; denied rules are turned off.
+ESLINT_RULE_ALLOWLIST = _rule_list("ESLINT_RULE_ALLOWLIST")
+ESLINT_RULE_DENYLIST = _rule_list("ESLINT_RULE_DENYLIST")
+
+
+def rule_args(allow: List[str] = ESLINT_RULE_ALLOWLIST, deny: List[str] = ESLINT_RULE_DENYLIST) -> List[str]:
+    """ESLint CLI arguments applying the rule allow and deny lists."""
+    args = []
+    if allow:
+        args.append("--no-config-lookup")
+        for rule in allow:
+            if rule not in deny:
+                args += ["--rule", f"{rule}: warn"]
+    for rule in deny:
+        args += ["--rule", f"{rule}: off"]
+    return args
+
+
+# Quoted ruleId token -> is a security rule
+_security_rule_cache: Dict[bytes, bool] = {}
+
+
+def _is_security_rule(rule_token: bytes) -> bool:
+    """Check a quoted ruleId token against the security rule set (memoized)."""
+    matched = _security_rule_cache.get(rule_token)
+    if matched is None:
+        matched = SECURITY_RULE_PATTERN.search(rule_token) is not None
+        _security_rule_cache[rule_token] = matched
+    return matched
+
+
+def _to_finding(raw_message: bytes) -> SecurityFinding:
+    message = json.loads(raw_message)
+    return {
+        "rule": message.get("ruleId", ""),
+        "severity": SEVERITY_MAP.get(message.get("severity", 1), "medium"),
+        "message": message.get("message", ""),
+        "line": message.get("line"),
+        "column": message.get("column")
+    }
+
+
+def iter_security_findings(
+    stream: BinaryIO,
+    chunk_size: int = READ_CHUNK_SIZE,
+    on_stats: Optional[Callable[[Dict], None]] = None
+) -> Iterator[SecurityFinding]:
+    """
+    Incrementally parse ESLint JSON output and yield security findings.
+    
+    The output is tokenized from the byte stream chunk by chunk. Only
+    the ruleId of each entry in a file's "messages" array is inspected;
+    messages of non-security rules are skipped without being decoded,
+    and only the bytes of the message currently being scanned are kept.
+    Complete messages in the buffer are matched with a single regex
+    call instead of token by token.
+    
+    Args:
+        stream: Binary stream of `eslint --format json` output
+        chunk_size: Bytes read per chunk
+        on_stats: Called with each file's decoded `stats` object
+            (`eslint --stats`); stats are skipped if None
+    
+    Raises:
+        ValueError: If the stream is not empty and not a complete
+            ESLint JSON array
+    """
+    buf = b""
+    pos = 0
+    depth = 0
+    saw_array = False
+    last_key = None           # Last string seen directly in a file object
+    in_messages = False       # Inside a file's "messages" array
+    message_start = None      # Buffer offset of a message that may be a finding
+    stats_start = None        # Buffer offset of a file's "stats" object
+    rule_expected = False     # Previous token was the "ruleId" key
+    is_security = False
+    prev_end = 0
+    received = False
+    eof = False
+    
+    while not eof:
+        chunk = stream.read(chunk_size)
+        if chunk:
+            buf += chunk
+            received = True
+        else:
+            eof = True
+        
+        while True:
+            match = _TOKEN_PATTERN.search(buf, pos)
+            if match is None:
+                break
+            token_start, token_end = match.span()
+            first = buf[token_start]
+            if first == 0x22:  # '"'
+                if match.group(1) is None:
+                    if eof:
+                        raise ValueError("Unterminated string in ESLint output")
+                    break  # Wait for the rest of the string
+                if depth == 0:
+                    raise ValueError("ESLint output is not a JSON array")
+                if depth == 2:
+                    last_key = buf[token_start:token_end]
+                elif depth == 4 and in_messages:
+                    if rule_expected and buf[prev_end:token_start].strip() == b":":
+                        is_security = _is_security_rule(buf[token_start:token_end])
+                        if not is_security:
+                            # Skip the rest of this message without buffering it
+                            message_start = None
+                    rule_expected = buf[token_start:token_end] == b'"ruleId"'
+            elif first == 0x7b or first == 0x5b:  # '{' or '['
+                depth += 1
+                if depth == 1:
+                    if first != 0x5b:
+                        raise ValueError("ESLint output is not a JSON array")
+                    saw_array = True
+                elif depth == 3:
+                    in_messages = first == 0x5b and last_key == b'"messages"'
+                    if on_stats is not None and first == 0x7b and last_key == b'"stats"':
+                        stats_start = token_start
+                elif depth == 4 and in_messages:
+                    rule_expected = False
+                    head = _MESSAGE_HEAD_PATTERN.match(buf, token_start)
+                    if head is None:
+                        # Decide token by token once ruleId shows up
+                        message_start = token_start
+                        is_security = False
+                    else:
+                        is_security = _is_security_rule(head.group(1))
+                        message_start = token_start if is_security else None
+                        rest_end = _MESSAGE_REST_PATTERN.match(buf, head.end()).end()
+                        if rest_end < len(buf) and buf[rest_end] == 0x7d:  # '}'
+                            if is_security:
+                                yield _to_finding(buf[token_start:rest_end + 1])
+                            depth -= 1
+                            message_start = None
+                            is_security = False
+                            pos = prev_end = rest_end + 1
+                            continue
+                        # Deeper nesting or end of buffer: tokenize the rest
+                        token_end = rest_end
+            else:  # '}' or ']'
+                if depth == 0:
+                    raise ValueError("Unbalanced brackets in ESLint output")
+                if depth == 4 and in_messages:
+                    if is_security and message_start is not None:
+                        yield _to_finding(buf[message_start:token_end])
+                    message_start = None
+                    is_security = False
+                elif depth == 3:
+                    in_messages = False
+                    if stats_start is not None:
+                        on_stats(json.loads(buf[stats_start:token_end]))
+                        stats_start = None
+                elif depth == 2:
+                    last_key = None
+                depth -= 1
+            pos = prev_end = token_end
+        
+        # Drop bytes that no longer matter
+        if message_start is not None:
+            keep_from = message_start
+        elif stats_start is not None:
+            keep_from = stats_start
+        else:
+            keep_from = pos
+        if keep_from:
+            buf = buf[keep_from:]
+            pos -= keep_from
+            prev_end -= keep_from
+            if message_start is not None:
+                message_start = 0
+            elif stats_start is not None:
+                stats_start = 0
+    
+    if received and (not saw_array or depth != 0):
+        raise ValueError("Incomplete ESLint JSON output")
 
 
 def run_eslint(file_content: str, file_type: str, thread_id: str) -> List[SecurityFinding]:
@@ -40,55 +275,104 @@ def run_eslint(file_content: str, file_type: str, thread_id: str) -> List[Securi
             tmp_file.write(file_content)
             tmp_path = tmp_file.name
         
+        # Kept to tell resource limit failures from other crashes
+        stderr_file = tempfile.TemporaryFile()
+        
         try:
+            # Opt-in per-rule timing (ESLint >= 9 adds a "stats" object per file)
+            profile = should_profile()
+            file_stats: List[Dict] = []
+            
             # Run ESLint with security plugin
             # Using npx to ensure we get the latest eslint-plugin-security
-            result = subprocess.run(
+            # Own process group, so npx and the node children it spawns die together
+            spawned = time.time_ns()
+            process = subprocess.Popen(
                 [
                     "npx", "--yes",
                     "eslint",
                     tmp_path,
                     "--format", "json",
-                    "--plugin", "security"
+                    "--plugin", "security",
+                    *rule_args(),
+                    *(["--stats"] if profile else [])
                 ],
-                capture_output=True,
-                text=True,
-                timeout=30
+                stdout=subprocess.PIPE,
+                stderr=stderr_file,
+                start_new_session=True
             )
+            timed_out = threading.Event()
             
-            # Parse ESLint output
+            def kill_on_timeout():
+                timed_out.set()
+                kill_process_group(process)
+            
+            timer = threading.Timer(ESLINT_TIMEOUT, kill_on_timeout)
+            
+            # Parse ESLint output as it streams in
             findings = []
-            if result.stdout:
+            first_output = process_span = parse_error = None
+            # Registered before anything else can fail, so the process is
+            # always killable by a cancel and always reaped below
+            with cancellation_registry.track_process(thread_id, process):
                 try:
-                    eslint_output = json.loads(result.stdout)
-                    for file_result in eslint_output:
-                        for message in file_result.get("messages", []):
-                            # Map ESLint severity: 2=error, 1=warning, 0=off
-                            severity_map = {
-                                2: "critical",
-                                1: "high",
-                                0: "low"
-                            }
-                            
-                            # Check if it's a security rule
-                            rule_id = message.get("ruleId", "")
-                            if "security" in rule_id.lower() or "no-eval" in rule_id or "no-implied-eval" in rule_id:
-                                severity = severity_map.get(message.get("severity", 1), "medium")
-                                
-                                findings.append({
-                                    "rule": rule_id,
-                                    "severity": severity,
-                                    "message": message.get("message", ""),
-                                    "line": message.get("line"),
-                                    "column": message.get("column")
-                                })
-                except json.JSONDecodeError:
-                    workflow_logger.log(
-                        thread_id,
-                        "warn",
-                        f"Failed to parse ESLint JSON output: {result.stdout}",
-                        "eslint_tool"
-                    )
+                    # Inherited by the node processes npx starts
+                    apply_limits(process.pid)
+                    timer.start()
+                    # ESLint writes its report only once linting is done
+                    process.stdout.peek(1)
+                    first_output = time.time_ns()
+                    process_span = tracer.record("eslint.process", thread_id, spawned, first_output)
+                    with tracer.span("eslint.parse", thread_id):
+                        findings = list(iter_security_findings(
+                            process.stdout,
+                            on_stats=file_stats.append if profile else None
+                        ))
+                except ValueError as e:
+                    parse_error = e
+                except BaseException:
+                    # Do not leave the group running, or block on it in wait4
+                    kill_process_group(process)
+                    raise
+                finally:
+                    process.stdout.close()
+                    usage = wait_with_usage(process)
+                    timer.cancel()
+            
+            stderr_file.seek(0, os.SEEK_END)
+            stderr_file.seek(max(0, stderr_file.tell() - STDERR_TAIL_BYTES))
+            stderr_tail = stderr_file.read()
+            exceeded = classify_failure(process.returncode, stderr_tail, usage)
+            resource_accounting.record(thread_id, usage, exceeded)
+            
+            cancellation_registry.check(thread_id)
+            if timed_out.is_set():
+                raise subprocess.TimeoutExpired(process.args, ESLINT_TIMEOUT)
+            if exceeded:
+                raise ResourceLimitExceeded("ESLint", exceeded, usage)
+            if parse_error is not None:
+                workflow_logger.log(
+                    thread_id,
+                    "warn",
+                    f"Failed to parse ESLint JSON output: {str(parse_error)}",
+                    "eslint_tool"
+                )
+            
+            for stats in file_stats:
+                timings = parse_stats(stats)
+                rule_profiler.record(timings)
+                workflow_logger.log(thread_id, "info", format_breakdown(timings), "eslint_tool")
+                # Split the process time into npx/node startup and linting
+                lint_started = max(spawned, first_output - int(timings["total_ms"] * 1e6))
+                tracer.record("eslint.startup", thread_id, spawned, lint_started, parent=process_span)
+                tracer.record(
+                    "eslint.lint",
+                    thread_id,
+                    lint_started,
+                    first_output,
+                    parent=process_span,
+                    rules=len(timings["rules"])
+                )
             
             workflow_logger.log(
                 thread_id,
@@ -100,10 +384,17 @@ def run_eslint(file_content: str, file_type: str, thread_id: str) -> List[Securi
             return findings
             
         finally:
-            # Clean up temp file
+            # Clean up temp files, also when the process could not be spawned
+            stderr_file.close()
             if os.path.exists(tmp_path):
                 os.unlink(tmp_path)
                 
+    except WorkflowCancelled:
+        raise
+    except ResourceLimitExceeded as e:
+        # Fails the node, unlike other ESLint errors, so the job shows what stopped it
+        workflow_logger.log(thread_id, "error", str(e), "eslint_tool")
+        raise
     except subprocess.TimeoutExpired:
         workflow_logger.log(
             thread_id,
@@ -122,13 +413,25 @@ def run_eslint(file_content: str, file_type: str, thread_id: str) -> List[Securi
         return []
 
 
-def analyze_security(file_content: str, file_type: str, thread_id: str) -> List[SecurityFinding]:
+def analyze_security(
+    file_content: str,
+    file_type: str,
+    thread_id: str,
+    file_name: Optional[str] = None
+) -> List[SecurityFinding]:
     """
     Analyze file for security issues.
-    Currently supports ESLint for JS/TS files.
+    Currently supports ESLint plus known-vulnerable imports for JS/TS
+    files, and known-vulnerable dependencies for manifests and lockfiles.
     """
     if file_type in ["js", "jsx", "ts", "tsx"]:
-        return run_eslint(file_content, file_type, thread_id)
+        with tracer.span("eslint.run", thread_id, file_type=file_type):
+            findings = run_eslint(file_content, file_type, thread_id)
+        with tracer.span("dependencies.scan", thread_id):
+            return findings + analyze_dependencies(file_content, file_type, thread_id, file_name)
+    elif file_type == "manifest":
+        with tracer.span("dependencies.scan", thread_id):
+            return analyze_dependencies(file_content, file_type, thread_id, file_name)
     elif file_type == "py":
         # Python analysis would go here (e.g., bandit, safety)
         workflow_logger.log(
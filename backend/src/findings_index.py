@@ -0,0 +1,198 @@
+"""Searchable index of findings across all analyses."""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+FINDINGS_DB_PATH = os.environ.get("FINDINGS_DB_PATH", "data/findings.db")
+MAX_PAGE_SIZE = 500
+
+
+def file_digest(file_content: str) -> str:
+    """SHA-256 of the analyzed file content."""
+    return hashlib.sha256(file_content.encode("utf-8")).hexdigest()
+
+
+class FindingsIndex:
+    """
+    SQLite table of every indexed finding.
+    
+    Each search filter has a composite index ending in (indexed_at, id),
+    and pages are fetched by keyset on that pair, so a query reads only
+    the rows of the page it returns however many threads were indexed.
+    """
+    
+    def __init__(self, db_path: str = FINDINGS_DB_PATH):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._connect().executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS indexed_threads (
+                thread_id TEXT PRIMARY KEY,
+                indexed_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS findings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                thread_id TEXT NOT NULL,
+                file_digest TEXT NOT NULL,
+                file_name TEXT,
+                file_type TEXT,
+                rule TEXT NOT NULL,
+                severity TEXT NOT NULL,
+                message TEXT NOT NULL,
+                line INTEGER,
+                "column" INTEGER,
+                indexed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS findings_rule ON findings (rule, indexed_at, id);
+            CREATE INDEX IF NOT EXISTS findings_severity ON findings (severity, indexed_at, id);
+            CREATE INDEX IF NOT EXISTS findings_time ON findings (indexed_at, id);
+            CREATE INDEX IF NOT EXISTS findings_digest ON findings (file_digest, indexed_at, id);
+            """
+        )
+    
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections are not thread-safe
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+    
+    def index_thread(
+        self,
+        thread_id: str,
+        findings: List[Dict],
+        digest: str,
+        file_name: Optional[str] = None,
+        file_type: Optional[str] = None
+    ) -> bool:
+        """
+        Add a thread's findings to the index, once per thread.
+        
+        Returns:
+            False if the thread was already indexed
+        """
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO indexed_threads (thread_id, indexed_at) VALUES (?, ?)",
+                (thread_id, now)
+            )
+            if cursor.rowcount == 0:
+                conn.execute("ROLLBACK")
+                return False
+            conn.executemany(
+                """
+                INSERT INTO findings (
+                    thread_id, file_digest, file_name, file_type,
+                    rule, severity, message, line, "column", indexed_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        thread_id, digest, file_name, file_type,
+                        f.get("rule") or "", f.get("severity", "medium"), f.get("message", ""),
+                        f.get("line"), f.get("column"), now
+                    )
+                    for f in findings
+                ]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return True
+    
+    def search(
+        self,
+        rule: Optional[str] = None,
+        severity: Optional[str] = None,
+        since: Optional[float] = None,
+        digest: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Find indexed findings, newest first.
+        
+        Args:
+            rule: Exact rule id
+            severity: critical, high, medium or low
+            since: Only findings indexed at or after this epoch time
+            digest: Only findings of this file digest
+            limit: Page size (at most MAX_PAGE_SIZE)
+            cursor: nextCursor of the previous page
+        
+        Returns:
+            (findings, next cursor or None on the last page)
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        clauses = []
+        params: List = []
+        for column, value in (("rule", rule), ("severity", severity), ("file_digest", digest)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("indexed_at >= ?")
+            params.append(since)
+        if cursor:
+            indexed_at, _, last_id = cursor.partition(":")
+            try:
+                position = (float(indexed_at), int(last_id))
+            except ValueError:
+                raise ValueError("Invalid cursor")
+            clauses.append("(indexed_at, id) < (?, ?)")
+            params.extend(position)
+        
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connect().execute(
+            f"""
+            SELECT id, thread_id, file_digest, file_name, file_type,
+                   rule, severity, message, line, "column", indexed_at
+            FROM findings {where}
+            ORDER BY indexed_at DESC, id DESC
+            LIMIT ?
+            """,
+            params + [limit + 1]
+        ).fetchall()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1][10]!r}:{rows[-1][0]}"
+        findings = [
+            {
+                "threadId": thread_id,
+                "fileDigest": digest_,
+                "fileName": file_name,
+                "fileType": file_type,
+                "rule": rule_,
+                "severity": severity_,
+                "message": message,
+                "line": line,
+                "column": column,
+                "indexedAt": datetime.utcfromtimestamp(indexed_at).isoformat() + "Z"
+            }
+            for (_, thread_id, digest_, file_name, file_type, rule_, severity_, message, line, column, indexed_at) in rows
+        ]
+        return findings, next_cursor
+
+
+# Global findings index instance
+findings_index = FindingsIndex()
@@ -0,0 +1,348 @@
+"""Hibernation of workflows parked for human approval."""
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Callable, Dict, List, Optional, Set
+from src.checkpoint_reader import load_latest_values
+from src.logger import workflow_logger
+from src.state_backend import StateBackend
+from src.status_store import NodeStatusStore
+
+
+HIBERNATION_ENABLED = os.environ.get("HIBERNATION_ENABLED", "true").lower() == "true"
+HIBERNATION_DB_PATH = os.environ.get("HIBERNATION_DB_PATH", "data/hibernated.db")
+# Seconds an interrupted thread stays resident after its last access
+HIBERNATE_AFTER = float(os.environ.get("HIBERNATE_AFTER", "300"))
+HIBERNATE_SWEEP_INTERVAL = float(os.environ.get("HIBERNATE_SWEEP_INTERVAL", "60"))
+
+
+class HibernationStore:
+    """Compressed hibernated thread records in SQLite, one row per thread."""
+    
+    def __init__(self, db_path: str = HIBERNATION_DB_PATH):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._connect().executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS hibernated (
+                thread_id TEXT PRIMARY KEY,
+                serde_type TEXT NOT NULL,
+                data BLOB NOT NULL,
+                hibernated_at REAL NOT NULL
+            );
+            """
+        )
+    
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections are not thread-safe
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            self._local.conn = conn
+        return conn
+    
+    def save(self, thread_id: str, serde_type: str, data: bytes):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO hibernated (thread_id, serde_type, data, hibernated_at) VALUES (?, ?, ?, ?)",
+                (thread_id, serde_type, zlib.compress(data), time.time())
+            )
+    
+    def load(self, thread_id: str) -> Optional[tuple]:
+        """Get (serde_type, data) of a hibernated thread."""
+        row = self._connect().execute(
+            "SELECT serde_type, data FROM hibernated WHERE thread_id = ?", (thread_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], zlib.decompress(row[1])
+    
+    def contains_many(self, thread_ids: List[str]) -> Set[str]:
+        """Get which of thread_ids are hibernated, with one query per 500 ids."""
+        found: Set[str] = set()
+        conn = self._connect()
+        for start in range(0, len(thread_ids), 500):
+            chunk = thread_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT thread_id FROM hibernated WHERE thread_id IN ({placeholders})", chunk
+            )
+            found.update(row[0] for row in rows)
+        return found
+    
+    def delete(self, thread_id: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM hibernated WHERE thread_id = ?", (thread_id,))
+    
+    def thread_ids(self) -> List[str]:
+        return [row[0] for row in self._connect().execute("SELECT thread_id FROM hibernated")]
+    
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM hibernated").fetchone()[0]
+    
+    def size(self) -> int:
+        """Total compressed bytes on disk."""
+        return self._connect().execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM hibernated").fetchone()[0]
+
+
+class Hibernator:
+    """
+    Moves idle interrupted threads out of process memory and back.
+    
+    A thread that stops for approval is parked. Once it has not been
+    accessed for HIBERNATE_AFTER seconds, its process-local state is
+    serialized with the checkpointer's serializer, compressed, written
+    to disk and evicted: the latest checkpoint (in-memory checkpointer
+    only; SQLite checkpoints already live on disk), its logs (in-memory
+    state backend only) and its node statuses. Every read or resume
+    calls ensure_resident() or ensure_resident_many() first, which
+    restores a hibernated thread before the caller touches its state.
+    """
+    
+    def __init__(
+        self,
+        get_checkpointer: Callable,
+        status_store: NodeStatusStore,
+        backend: StateBackend,
+        store: Optional[HibernationStore] = None,
+        idle_after: float = HIBERNATE_AFTER,
+        enabled: bool = HIBERNATION_ENABLED
+    ):
+        self.get_checkpointer = get_checkpointer
+        self.status_store = status_store
+        self.backend = backend
+        self.idle_after = idle_after
+        self.enabled = enabled
+        self._store = store
+        self._init_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._parked: Dict[str, float] = {}   # resident interrupted thread -> last access
+        self._hibernated: Optional[Set[str]] = None
+        self._hibernating: Optional[str] = None
+        self._sweeper: Optional[threading.Thread] = None
+        self.hibernations = 0
+        self.rehydrations = 0
+    
+    @property
+    def store(self) -> HibernationStore:
+        if self._store is None:
+            with self._init_lock:
+                if self._store is None:
+                    self._store = HibernationStore()
+        return self._store
+    
+    @property
+    def hibernated(self) -> Set[str]:
+        """
+        Ids of hibernated threads, loaded from disk on first use.
+        
+        Only a cache: other processes sharing the store may hibernate
+        threads later. Each sweep reloads it, and ensure_resident_many()
+        asks the store directly.
+        """
+        if self._hibernated is None:
+            ids = set(self.store.thread_ids())
+            with self._init_lock:
+                if self._hibernated is None:
+                    self._hibernated = ids
+        return self._hibernated
+    
+    def park(self, thread_id: str):
+        """Thread stopped for approval; hibernate it once it goes idle."""
+        if not self.enabled:
+            return
+        self._parked[thread_id] = time.monotonic()
+    
+    def unpark(self, thread_id: str):
+        """Thread left the interrupted state."""
+        self._parked.pop(thread_id, None)
+    
+    def ensure_resident(self, thread_id: str):
+        """
+        Restore a hibernated thread before its state is read.
+        
+        Checks only the cached ids, so polling costs no disk access; a
+        thread hibernated by another process is found after the next sweep.
+        """
+        if not self.enabled:
+            return
+        # Touch first: the sweeper re-checks access times after claiming a thread
+        if thread_id in self._parked:
+            self._parked[thread_id] = time.monotonic()
+        if thread_id not in self.hibernated and self._hibernating != thread_id:
+            return
+        with self._lock:
+            if thread_id in self.hibernated:
+                self._rehydrate(thread_id)
+    
+    def ensure_resident_many(self, thread_ids: List[str]):
+        """
+        Restore any of thread_ids hibernated here or by another process.
+        
+        Asks the store with one query for all ids, so use it for batches
+        and before acting on a thread rather than once per id.
+        """
+        if not self.enabled or not thread_ids:
+            return
+        for thread_id in thread_ids:
+            if thread_id in self._parked:
+                self._parked[thread_id] = time.monotonic()
+        with self._lock:
+            hibernated = self.store.contains_many(list(thread_ids))
+            for thread_id in thread_ids:
+                if thread_id in hibernated:
+                    self._rehydrate(thread_id)
+                else:
+                    self.hibernated.discard(thread_id)
+    
+    def _rehydrate(self, thread_id: str):
+        record = self.store.load(thread_id)
+        if record is None:
+            # Rehydrated by another process since the ids were cached
+            self.hibernated.discard(thread_id)
+            return
+        checkpointer = self.get_checkpointer()
+        snapshot = checkpointer.serde.loads_typed(record)
+        saved = snapshot.get("checkpoint")
+        if saved is not None:
+            config = checkpointer.put(
+                {"configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": "",
+                    "checkpoint_id": saved["parent_id"]
+                }},
+                saved["checkpoint"],
+                saved["metadata"],
+                saved["checkpoint"]["channel_versions"]
+            )
+            writes_by_task: Dict[str, List] = {}
+            for task_id, channel, value in saved["pending_writes"]:
+                writes_by_task.setdefault(task_id, []).append((channel, value))
+            for task_id, writes in writes_by_task.items():
+                checkpointer.put_writes(config, writes, task_id)
+        for entry in snapshot.get("logs") or []:
+            self.backend.append_log(thread_id, entry)
+        if snapshot.get("node_statuses"):
+            self.status_store.restore(thread_id, snapshot["node_statuses"])
+        self.store.delete(thread_id)
+        self.hibernated.discard(thread_id)
+        self._parked[thread_id] = time.monotonic()
+        self.rehydrations += 1
+        workflow_logger.log(thread_id, "info", "Workflow rehydrated from hibernation", "system")
+    
+    def sweep(self) -> int:
+        """
+        Hibernate parked threads idle for longer than idle_after.
+        
+        Returns:
+            Number of threads hibernated
+        """
+        with self._lock:
+            # Pick up threads other processes hibernated or rehydrated
+            self._hibernated = set(self.store.thread_ids())
+        cutoff = time.monotonic() - self.idle_after
+        idle = [thread_id for thread_id, accessed in list(self._parked.items()) if accessed <= cutoff]
+        if not idle:
+            return 0
+        checkpointer = self.get_checkpointer()
+        values_by_thread = load_latest_values(checkpointer, idle)
+        count = 0
+        for thread_id in idle:
+            values = values_by_thread.get(thread_id) or {}
+            if values.get("status") != "interrupted" or values.get("approval_decision"):
+                # Resumed or cancelled since it was parked
+                self.unpark(thread_id)
+                continue
+            if self.backend.lease_owner(f"thread:{thread_id}") is not None:
+                continue
+            try:
+                if self._hibernate(thread_id, cutoff):
+                    count += 1
+            except Exception as e:
+                workflow_logger.log(thread_id, "warn", f"Hibernation failed: {str(e)}", "system")
+        return count
+    
+    def _hibernate(self, thread_id: str, cutoff: float) -> bool:
+        checkpointer = self.get_checkpointer()
+        with self._lock:
+            self._hibernating = thread_id
+            try:
+                if self._parked.get(thread_id, 0) > cutoff:
+                    # Accessed after the sweep started
+                    return False
+                config = {"configurable": {"thread_id": thread_id}}
+                in_memory = not hasattr(checkpointer, "cursor")
+                snapshot: Dict = {}
+                if in_memory:
+                    saved = checkpointer.get_tuple(config)
+                    if saved is None:
+                        return False
+                    snapshot["checkpoint"] = {
+                        "checkpoint": saved.checkpoint,
+                        "metadata": saved.metadata,
+                        "parent_id": (saved.parent_config or {}).get("configurable", {}).get("checkpoint_id"),
+                        "pending_writes": [list(write) for write in saved.pending_writes or []]
+                    }
+                if not self.backend.shared:
+                    snapshot["logs"] = self.backend.get_logs(thread_id)
+                snapshot["node_statuses"] = dict(self.status_store.get(thread_id))
+                
+                self.store.save(thread_id, *checkpointer.serde.dumps_typed(snapshot))
+                self.hibernated.add(thread_id)
+                self._parked.pop(thread_id, None)
+                
+                # Evict only once the record is safely on disk
+                if in_memory:
+                    _delete_checkpoints(checkpointer, thread_id)
+                if not self.backend.shared:
+                    self.backend.clear_logs(thread_id)
+                self.status_store.evict(thread_id)
+                self.hibernations += 1
+                return True
+            finally:
+                self._hibernating = None
+    
+    def get_metrics(self) -> Dict:
+        """Interrupted threads resident in this process vs. hibernated in the store."""
+        return {
+            "enabled": self.enabled,
+            "hibernateAfter": self.idle_after,
+            "resident": len(self._parked),
+            "hibernated": self.store.count(),
+            "hibernatedBytes": self.store.size(),
+            "hibernations": self.hibernations,
+            "rehydrations": self.rehydrations
+        }
+    
+    def start(self, interval: float = HIBERNATE_SWEEP_INTERVAL):
+        """Start the background sweeper."""
+        if self._sweeper is not None or not self.enabled:
+            return
+        
+        def sweep_loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.sweep()
+                except Exception as e:
+                    workflow_logger.log("system", "error", f"Hibernation sweep failed: {str(e)}", "system")
+        
+        self._sweeper = threading.Thread(target=sweep_loop, name="hibernation", daemon=True)
+        self._sweeper.start()
+
+
+def _delete_checkpoints(checkpointer, thread_id: str):
+    """Drop a thread from an in-memory checkpointer."""
+    if hasattr(checkpointer, "delete_thread"):
+        checkpointer.delete_thread(thread_id)
+        return
+    # Older MemorySaver releases have no delete_thread
+    checkpointer.storage.pop(thread_id, None)
+    for key in [key for key in checkpointer.writes if key[0] == thread_id]:
+        del checkpointer.writes[key]
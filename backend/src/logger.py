@@ -4,13 +4,15 @@ import json
 from datetime import datetime
 from typing import Optional, Dict, List
 from pythonjsonlogger import jsonlogger
+from src.metrics import dashboard_metrics
+from src.state_backend import StateBackend, state_backend
 
 
 class WorkflowLogger:
-    """Logger that stores logs in memory for API retrieval."""
+    """Logger that stores logs in the state backend for API retrieval."""
     
-    def __init__(self):
-        self.logs: Dict[str, List[Dict]] = {}  # thread_id -> list of logs
+    def __init__(self, backend: StateBackend = state_backend):
+        self.backend = backend
         self._setup_logger()
     
     def _setup_logger(self):
@@ -40,10 +42,8 @@ class WorkflowLogger:
             "node": node
         }
         
-        if thread_id not in self.logs:
-            self.logs[thread_id] = []
-        
-        self.logs[thread_id].append(log_entry)
+        self.backend.append_log(thread_id, log_entry)
+        dashboard_metrics.record_log(node, level)
         
         # Also log to standard logger
         log_method = getattr(self.logger, level.lower(), self.logger.info)
@@ -51,12 +51,11 @@ class WorkflowLogger:
     
     def get_logs(self, thread_id: str) -> List[Dict]:
         """Get all logs for a thread."""
-        return self.logs.get(thread_id, [])
+        return self.backend.get_logs(thread_id)
     
     def clear_logs(self, thread_id: str):
         """Clear logs for a thread (optional cleanup)."""
-        if thread_id in self.logs:
-            del self.logs[thread_id]
+        self.backend.clear_logs(thread_id)
 
 
 # Global logger instance
@@ -1,19 +1,44 @@
 """FastAPI application for security analysis backend."""
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Query
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from datetime import datetime, timezone
 from typing import Optional
+import asyncio
 import os
+import threading
+import time
 from src.models import (
     StartAnalysisRequest,
     StartAnalysisResponse,
     StatusResponse,
     ResumeRequest,
-    ResumeResponse
+    ResumeResponse,
+    CancelRequest,
+    CancelResponse,
+    ScanPathRequest,
+    ScanPathResponse,
+    BatchStatusRequest,
+    BatchStatusResponse,
+    FindingsSearchResponse
 )
 from src.workflow_manager import workflow_manager
 from src.logger import workflow_logger
 from src.report_generator import generate_report, get_report_summary
+from src.eslint_tool import ESLINT_RULE_ALLOWLIST, ESLINT_RULE_DENYLIST, SUPPORTED_FILE_TYPES
+from src.repo_scanner import repo_scanner
+from src.scheduler import workflow_scheduler
+from src.coalescing import analysis_flights
+from src.resource_limits import resource_accounting
+from src.webhooks import CallbackRejected, validate_callback_url, webhook_notifier
+from src.tracing import format_waterfall, tracer
+from src.recovery import RECOVERY_ENABLED, recover_workflows
+from src.serialization import fast_response
+from src.metrics import dashboard_cache, dashboard_metrics
+from src.findings_index import MAX_PAGE_SIZE, findings_index
+from src.rule_profiler import ESLINT_PROFILE_RATE, rule_profiler
+from src.advisory_index import advisory_index
+from src.dependency_scanner import DEPENDENCY_SCAN_ENABLED
 
 app = FastAPI(title="Clickit Academy Security Analysis API", version="1.0.0")
 
@@ -30,17 +55,98 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+async def warm_up_workflow():
+    """Compile the workflow graph in the background so /health answers immediately."""
+    threading.Thread(target=workflow_manager.warm_up, name="warm-up", daemon=True).start()
+
+
+@app.on_event("startup")
+async def start_job_dispatcher():
+    """Pull queued jobs from a shared state backend (no-op for the in-memory backend)."""
+    workflow_manager.start_dispatcher()
+
+
+@app.on_event("startup")
+async def start_recovery():
+    """Re-enqueue workflows left running by a crash, without delaying startup."""
+    if RECOVERY_ENABLED:
+        threading.Thread(
+            target=recover_workflows,
+            args=(workflow_manager,),
+            name="recovery",
+            daemon=True
+        ).start()
+
+
+@app.on_event("startup")
+async def start_hibernation():
+    """Move workflows idle in approval out of memory on a timer."""
+    workflow_manager.hibernation.start()
+
+
+@app.on_event("startup")
+async def start_trace_export():
+    """Export finished spans in the background (TRACE_EXPORT)."""
+    tracer.start()
+
+
+@app.on_event("startup")
+async def start_metrics_refresh():
+    """Recompute the dashboard snapshot on a timer."""
+    dashboard_cache.start()
+
+
+@app.on_event("shutdown")
+async def flush_webhooks():
+    """Give queued completion callbacks a last chance to be delivered."""
+    await asyncio.to_thread(webhook_notifier.flush)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count requests, server errors and latency for the dashboard."""
+    started = time.perf_counter()
+    # Start of the request for trace spans (before the body is parsed)
+    request.state.received_ns = time.time_ns()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        dashboard_metrics.record_request(
+            request.url.path,
+            status_code,
+            (time.perf_counter() - started) * 1000,
+            get_client_id(request)
+        )
+
+
 def get_file_type(filename: str) -> str:
     """Extract file type from filename."""
     ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
     return ext
 
 
+def get_client_id(request: Request) -> str:
+    """Fair-sharing key for the scheduler: API key, client header or remote address."""
+    return (
+        request.headers.get("x-api-key")
+        or request.headers.get("x-client-id")
+        or (request.client.host if request.client else "anonymous")
+    )
+
+
 @app.post("/api/start-analysis", response_model=StartAnalysisResponse)
 async def start_analysis(
+    request: Request,
     file: Optional[UploadFile] = File(None),
     fileContent: Optional[str] = Form(None),
-    analysisType: str = Form(...)
+    analysisType: str = Form(...),
+    priority: str = Form("interactive"),
+    deadlineSeconds: Optional[float] = Form(None),
+    callbackUrl: Optional[str] = Form(None)
 ):
     """
     Start a new security analysis workflow.
@@ -49,24 +155,28 @@ async def start_analysis(
     - multipart/form-data with file upload
     - application/json with fileContent string
     """
+    handler_started = time.time_ns()
     try:
         # Get file content
         if file:
             content = await file.read()
             file_content = content.decode("utf-8")
             file_type = get_file_type(file.filename)
+            file_name = file.filename
         elif fileContent:
             file_content = fileContent
             # Try to infer file type from content or default to js
             file_type = "js"  # Default, could be enhanced
+            file_name = None
         else:
             raise HTTPException(
                 status_code=400,
                 detail="Either 'file' or 'fileContent' must be provided"
             )
+        decoded = time.time_ns()
         
         # Validate file type
-        valid_types = ["js", "jsx", "ts", "tsx", "py"]
+        valid_types = SUPPORTED_FILE_TYPES
         if file_type not in valid_types:
             raise HTTPException(
                 status_code=400,
@@ -80,13 +190,52 @@ async def start_analysis(
                 detail="analysisType must be one of: security, performance, quality"
             )
         
+        # Validate priority class
+        if priority not in ["interactive", "batch"]:
+            raise HTTPException(
+                status_code=400,
+                detail="priority must be one of: interactive, batch"
+            )
+        
+        # Validate deadline
+        if deadlineSeconds is not None and deadlineSeconds <= 0:
+            raise HTTPException(
+                status_code=400,
+                detail="deadlineSeconds must be greater than 0"
+            )
+        
+        # Validate callback URL; its host is resolved, so off the event loop
+        if callbackUrl is not None:
+            try:
+                await asyncio.to_thread(validate_callback_url, callbackUrl)
+            except CallbackRejected as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        
         # Start workflow
         thread_id = workflow_manager.start_analysis(
             file_content=file_content,
             file_type=file_type,
-            analysis_type=analysisType
+            analysis_type=analysisType,
+            priority=priority,
+            client_id=get_client_id(request),
+            deadline=time.time() + deadlineSeconds if deadlineSeconds is not None else None,
+            file_name=file_name,
+            callback_url=callbackUrl
         )
         
+        # The thread id exists only now, so the request's stages are recorded afterwards
+        received = getattr(request.state, "received_ns", handler_started)
+        api_span = tracer.record(
+            "api.start_analysis",
+            thread_id,
+            received,
+            time.time_ns(),
+            bytes=len(file_content),
+            file_type=file_type
+        )
+        tracer.record("upload.receive", thread_id, received, handler_started, parent=api_span)
+        tracer.record("upload.decode", thread_id, handler_started, decoded, parent=api_span)
+        
         return StartAnalysisResponse(threadId=thread_id, status="running")
         
     except HTTPException:
@@ -96,8 +245,10 @@ async def start_analysis(
         raise HTTPException(status_code=500, detail="Failed to start analysis")
 
 
+# Handlers that read checkpoints or SQLite are plain functions, so FastAPI
+# runs them in its threadpool instead of blocking the event loop
 @app.get("/api/status", response_model=StatusResponse)
-async def get_status(threadId: str = Query(..., description="Thread identifier")):
+def get_status(threadId: str = Query(..., description="Thread identifier")):
     """
     Get the current status of a workflow execution.
     """
@@ -109,11 +260,29 @@ async def get_status(threadId: str = Query(..., description="Thread identifier")
     if status_data is None:
         raise HTTPException(status_code=404, detail="Thread not found")
     
-    return StatusResponse(**status_data)
+    return fast_response(
+        StatusResponse,
+        {field: status_data[field] for field in StatusResponse.model_fields}
+    )
+
+
+@app.post("/api/status/batch", response_model=BatchStatusResponse, response_model_exclude_unset=True)
+def get_status_batch(request: BatchStatusRequest):
+    """
+    Get compact status summaries of many workflows in one request.
+    
+    Only the requested fields are returned for each thread; unknown
+    threads map to null.
+    """
+    if not request.threadIds:
+        raise HTTPException(status_code=400, detail="threadIds must not be empty")
+    
+    results = workflow_manager.get_statuses(request.threadIds, list(dict.fromkeys(request.fields)))
+    return fast_response(BatchStatusResponse, {"results": results}, exclude_unset=True)
 
 
 @app.post("/api/resume", response_model=ResumeResponse)
-async def resume_workflow(request: ResumeRequest):
+def resume_workflow(request: ResumeRequest):
     """
     Resume an interrupted workflow with human decision.
     """
@@ -155,8 +324,30 @@ async def resume_workflow(request: ResumeRequest):
         )
 
 
+@app.post("/api/cancel", response_model=CancelResponse)
+def cancel_workflow(request: CancelRequest):
+    """
+    Cancel a queued, running or interrupted workflow.
+    """
+    if not request.threadId:
+        raise HTTPException(status_code=400, detail="threadId is required")
+    
+    status = workflow_manager.cancel_workflow(request.threadId, request.reason or "Cancelled by user")
+    
+    if status is None:
+        raise HTTPException(status_code=404, detail="Thread not found")
+    
+    if status != "cancelled":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Workflow already finished with status '{status}'"
+        )
+    
+    return CancelResponse(status="cancelled", message="Workflow cancelled")
+
+
 @app.get("/api/report/{threadId}")
-async def get_report(threadId: str):
+def get_report(threadId: str):
     """
     Get a human-readable security analysis report for a completed workflow.
     """
@@ -179,7 +370,7 @@ async def get_report(threadId: str):
 
 
 @app.get("/api/report/{threadId}/summary")
-async def get_report_summary_endpoint(threadId: str):
+def get_report_summary_endpoint(threadId: str):
     """
     Get a brief summary of the analysis results.
     """
@@ -196,6 +387,173 @@ async def get_report_summary_endpoint(threadId: str):
     return summary
 
 
+@app.post("/api/scan-path", response_model=ScanPathResponse)
+async def scan_path(request: ScanPathRequest):
+    """
+    Start analysing every supported file under a locally mounted directory.
+    """
+    try:
+        scan_id = repo_scanner.start_scan(request.path, request.analysisType)
+    except PermissionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        workflow_logger.log("system", "error", f"Start scan error: {str(e)}", "api")
+        raise HTTPException(status_code=500, detail="Failed to start scan")
+    
+    return ScanPathResponse(scanId=scan_id, status="running")
+
+
+@app.get("/api/scan/{scanId}")
+async def get_scan(scanId: str):
+    """
+    Get progress of a path scan, broken down per directory.
+    """
+    scan_data = repo_scanner.get_scan(scanId)
+    
+    if scan_data is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    
+    return scan_data
+
+
+@app.get("/api/findings", response_model=FindingsSearchResponse)
+def search_findings(
+    rule: Optional[str] = Query(None, description="Exact rule id"),
+    severity: Optional[str] = Query(None, description="critical, high, medium or low"),
+    since: Optional[str] = Query(None, description="ISO8601 timestamp; findings indexed at or after it"),
+    fileDigest: Optional[str] = Query(None, description="SHA-256 of the file content"),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    cursor: Optional[str] = Query(None, description="nextCursor of the previous page")
+):
+    """
+    Search findings across all analyses, newest first.
+    
+    Findings are indexed when a workflow completes, fails, is cancelled
+    or stops for approval.
+    """
+    if severity is not None and severity not in ["critical", "high", "medium", "low"]:
+        raise HTTPException(
+            status_code=400,
+            detail="severity must be one of: critical, high, medium, low"
+        )
+    
+    since_ts = None
+    if since is not None:
+        try:
+            parsed = datetime.fromisoformat(since.replace("Z", "+00:00"))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="since must be an ISO8601 timestamp")
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        since_ts = parsed.timestamp()
+    
+    try:
+        findings, next_cursor = findings_index.search(
+            rule=rule,
+            severity=severity,
+            since=since_ts,
+            digest=fileDigest,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    return fast_response(FindingsSearchResponse, {"findings": findings, "nextCursor": next_cursor})
+
+
+@app.get("/api/scheduler/metrics")
+async def get_scheduler_metrics():
+    """
+    Get queue depth and queue latency per priority class, how many
+    submissions shared an identical in-flight analysis, and the resources
+    used by analyzer subprocesses.
+    """
+    metrics = workflow_scheduler.get_metrics()
+    metrics["coalescing"] = analysis_flights.get_metrics()
+    metrics["subprocesses"] = resource_accounting.get_metrics()
+    return metrics
+
+
+@app.get("/api/eslint/rule-profile")
+async def get_rule_profile(limit: Optional[int] = Query(None, ge=1, description="Most expensive rules only")):
+    """
+    Get ESLint rule timings aggregated across profiled runs, most expensive first.
+    """
+    report = rule_profiler.report(limit)
+    report["profileRate"] = ESLINT_PROFILE_RATE
+    report["allowlist"] = ESLINT_RULE_ALLOWLIST
+    report["denylist"] = ESLINT_RULE_DENYLIST
+    return report
+
+
+@app.get("/api/advisories")
+def get_advisory_index():
+    """
+    Get the offline advisory index used for dependency scanning.
+    """
+    index = advisory_index.current()
+    return {
+        "enabled": DEPENDENCY_SCAN_ENABLED and index is not None,
+        "index": index.get_info() if index is not None else None
+    }
+
+
+@app.get("/api/hibernation/metrics")
+async def get_hibernation_metrics():
+    """
+    Get the number of interrupted workflows resident in memory vs. hibernated to disk.
+    """
+    return workflow_manager.hibernation.get_metrics()
+
+
+@app.get("/api/webhooks/metrics")
+async def get_webhook_metrics():
+    """
+    Get completion callback delivery counts and events still pending.
+    """
+    return webhook_notifier.get_metrics()
+
+
+@app.get("/api/trace/{threadId}")
+async def get_trace(threadId: str, format: str = Query("json", description="json or text")):
+    """
+    Get the trace of a workflow as a waterfall of timed stages.
+    """
+    if format not in ["json", "text"]:
+        raise HTTPException(status_code=400, detail="format must be one of: json, text")
+    
+    trace = tracer.waterfall(threadId)
+    
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    
+    if format == "text":
+        return Response(content=format_waterfall(trace), media_type="text/plain; charset=utf-8")
+    return trace
+
+
+@app.get("/metrics/dashboard")
+async def get_dashboard_metrics(request: Request):
+    """
+    Get the dashboard summary, time series and breakdown in one response.
+    
+    Served from a snapshot refreshed every METRICS_REFRESH_INTERVAL seconds;
+    clients revalidate with If-None-Match and get 304 until it changes.
+    """
+    snapshot = dashboard_cache.get()
+    headers = {
+        "ETag": snapshot.etag,
+        "Cache-Control": f"public, max-age={dashboard_cache.max_age()}"
+    }
+    requested = [tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")]
+    if "*" in requested or snapshot.etag in requested:
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
@@ -0,0 +1,204 @@
+"""Request and workflow metrics served to the dashboard."""
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, NamedTuple, Optional
+
+
+# Seconds between dashboard snapshot refreshes (also the client cache lifetime)
+METRICS_REFRESH_INTERVAL = float(os.environ.get("METRICS_REFRESH_INTERVAL", "30"))
+METRICS_WINDOW_HOURS = int(os.environ.get("METRICS_WINDOW_HOURS", "24"))
+# Clients seen within this many seconds count as active users
+ACTIVE_USER_WINDOW = 300.0
+
+# Not counted as traffic: dashboard polling and health checks
+EXCLUDED_PATH_PREFIXES = ("/metrics", "/health")
+
+
+class _HourBucket:
+    """Counters for one hour of traffic and workflow logs."""
+    
+    __slots__ = ("requests", "errors", "total_ms", "node_errors", "node_warnings")
+    
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.node_errors: Dict[str, int] = {}
+        self.node_warnings: Dict[str, int] = {}
+
+
+class MetricsCollector:
+    """
+    Hourly request and log counters over a sliding window.
+    
+    Recording is a dict update under one lock; all aggregation happens in
+    compute(), which the dashboard cache calls once per refresh interval.
+    """
+    
+    def __init__(self, window_hours: int = METRICS_WINDOW_HOURS):
+        self.window_hours = window_hours
+        self._lock = threading.Lock()
+        self._buckets: Dict[int, _HourBucket] = {}  # hour since epoch -> counters
+        self._clients: Dict[str, float] = {}        # client_id -> last seen
+    
+    def _bucket(self, now: float) -> _HourBucket:
+        hour = int(now // 3600)
+        bucket = self._buckets.get(hour)
+        if bucket is None:
+            bucket = self._buckets[hour] = _HourBucket()
+            oldest = hour - self.window_hours
+            for stale in [h for h in self._buckets if h <= oldest]:
+                del self._buckets[stale]
+        return bucket
+    
+    def record_request(self, path: str, status_code: int, duration_ms: float, client_id: str):
+        """Count an HTTP request; 5xx responses count as errors."""
+        if path.startswith(EXCLUDED_PATH_PREFIXES):
+            return
+        now = time.time()
+        with self._lock:
+            bucket = self._bucket(now)
+            bucket.requests += 1
+            bucket.total_ms += duration_ms
+            if status_code >= 500:
+                bucket.errors += 1
+            self._clients[client_id] = now
+    
+    def record_log(self, node: Optional[str], level: str):
+        """Count warning and error log entries per node."""
+        if level not in ("warn", "error"):
+            return
+        service = node or "system"
+        with self._lock:
+            bucket = self._bucket(time.time())
+            counts = bucket.node_errors if level == "error" else bucket.node_warnings
+            counts[service] = counts.get(service, 0) + 1
+    
+    def compute(self) -> Dict:
+        """
+        Build the dashboard datasets.
+        
+        Returns:
+            summary, timeSeries (one point per hour, oldest first) and
+            breakdown (warning/error logs per node)
+        """
+        now = time.time()
+        current_hour = int(now // 3600)
+        with self._lock:
+            self._clients = {c: seen for c, seen in self._clients.items() if now - seen <= ACTIVE_USER_WINDOW}
+            active_users = len(self._clients)
+            hours = range(current_hour - self.window_hours + 1, current_hour + 1)
+            rows = [(hour, self._buckets.get(hour)) for hour in hours]
+            
+            requests = errors = 0
+            total_ms = 0.0
+            time_series = []
+            node_errors: Dict[str, int] = {}
+            node_warnings: Dict[str, int] = {}
+            for hour, bucket in rows:
+                label = datetime.fromtimestamp(hour * 3600, tz=timezone.utc).strftime("%H:00")
+                if bucket is None:
+                    time_series.append({"time": label, "requests": 0, "errors": 0})
+                    continue
+                requests += bucket.requests
+                errors += bucket.errors
+                total_ms += bucket.total_ms
+                time_series.append({"time": label, "requests": bucket.requests, "errors": bucket.errors})
+                for service, count in bucket.node_errors.items():
+                    node_errors[service] = node_errors.get(service, 0) + count
+                for service, count in bucket.node_warnings.items():
+                    node_warnings[service] = node_warnings.get(service, 0) + count
+        
+        breakdown = [
+            {
+                "service": service,
+                "errors": node_errors.get(service, 0),
+                "warnings": node_warnings.get(service, 0)
+            }
+            for service in set(node_errors) | set(node_warnings)
+        ]
+        breakdown.sort(key=lambda row: (-(row["errors"] + row["warnings"]), row["service"]))
+        
+        return {
+            "summary": {
+                "totalRequests": requests,
+                "errorRate": round(errors / requests * 100, 2) if requests else 0.0,
+                "avgResponseTime": round(total_ms / requests) if requests else 0,
+                "activeUsers": active_users
+            },
+            "timeSeries": time_series,
+            "breakdown": breakdown
+        }
+
+
+class DashboardSnapshot(NamedTuple):
+    body: bytes
+    etag: str
+    refreshed_at: float
+
+
+class DashboardCache:
+    """
+    One precomputed dashboard snapshot shared by every client.
+    
+    A background timer recomputes it every interval, so request cost
+    does not grow with the number of open dashboards. The ETag only
+    changes when the data does.
+    """
+    
+    def __init__(self, collector: MetricsCollector, interval: float = METRICS_REFRESH_INTERVAL):
+        self.collector = collector
+        self.interval = interval
+        self._snapshot: Optional[DashboardSnapshot] = None
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+    
+    def refresh(self) -> DashboardSnapshot:
+        """Recompute and publish the snapshot."""
+        # Imported here so logging does not pull in the web framework
+        from src.serialization import dumps
+        body = dumps(self.collector.compute())
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        snapshot = DashboardSnapshot(body, etag, time.time())
+        self._snapshot = snapshot
+        return snapshot
+    
+    def get(self) -> DashboardSnapshot:
+        """Get the current snapshot, computing the first one on demand."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                snapshot = self._snapshot or self.refresh()
+        return snapshot
+    
+    def max_age(self) -> int:
+        """Seconds until the next refresh, for Cache-Control."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return 0
+        return max(0, int(snapshot.refreshed_at + self.interval - time.time()))
+    
+    def start(self):
+        """Start the background refresh timer."""
+        if self._refresher is not None:
+            return
+        
+        def refresh_loop():
+            while True:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logging.getLogger("workflow").error(f"Metrics refresh failed: {str(e)}")
+                time.sleep(self.interval)
+        
+        self._refresher = threading.Thread(target=refresh_loop, name="metrics-refresh", daemon=True)
+        self._refresher.start()
+
+
+# Global metrics instances
+dashboard_metrics = MetricsCollector()
+dashboard_cache = DashboardCache(dashboard_metrics)
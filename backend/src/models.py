@@ -18,12 +18,23 @@ class StartAnalysisResponse(BaseModel):
     status: Literal["running"] = Field(..., description="Initial workflow status")
 
 
+class ResourceUsage(BaseModel):
+    """Resources used by the analyzer subprocesses a node ran."""
+    peak_rss_mb: float = Field(..., description="Peak resident set size (MB)")
+    cpu_seconds: float = Field(..., description="User + system CPU time")
+    limit_exceeded: Optional[Literal["memory", "cpu", "open_files"]] = Field(
+        None,
+        description="Resource limit the subprocess was stopped by"
+    )
+
+
 class NodeStatus(BaseModel):
     """Status of a workflow node."""
     status: Literal["pending", "running", "completed", "failed"]
     started_at: Optional[str] = Field(None, description="ISO8601 timestamp")
     completed_at: Optional[str] = Field(None, description="ISO8601 timestamp")
     error: Optional[str] = Field(None, description="Error message if failed")
+    resource_usage: Optional[ResourceUsage] = Field(None, description="Analyzer subprocess usage")
 
 
 class LogEntry(BaseModel):
@@ -52,7 +63,7 @@ class InterruptPayload(BaseModel):
 
 class StatusResponse(BaseModel):
     """Response model for workflow status."""
-    status: Literal["running", "completed", "error", "interrupted"]
+    status: Literal["running", "completed", "error", "interrupted", "cancelled"]
     node_statuses: Dict[str, NodeStatus] = Field(default_factory=dict)
     logs: List[LogEntry] = Field(default_factory=list)
     interrupt_payload: Optional[InterruptPayload] = None
@@ -70,3 +81,75 @@ class ResumeResponse(BaseModel):
     status: Literal["running", "error"]
     message: str
 
+
+class CancelRequest(BaseModel):
+    """Request model for cancelling a workflow."""
+    threadId: str = Field(..., description="Thread identifier")
+    reason: Optional[str] = Field(None, description="Recorded as the workflow's error message")
+
+
+class CancelResponse(BaseModel):
+    """Response model for cancelling a workflow."""
+    status: Literal["cancelled"]
+    message: str
+
+
+class ScanPathRequest(BaseModel):
+    """Request model for scanning a locally mounted directory."""
+    path: str = Field(..., description="Directory to scan, within the allowed scan roots")
+    analysisType: Literal["security", "performance", "quality"] = Field(
+        "security", description="Type of analysis to perform"
+    )
+
+
+class ScanPathResponse(BaseModel):
+    """Response model for starting a path scan."""
+    scanId: str = Field(..., description="Unique scan identifier")
+    status: Literal["running"] = Field(..., description="Initial scan status")
+
+
+StatusField = Literal["status", "error", "node_statuses", "logs", "interrupt_payload", "findings_summary"]
+
+
+class BatchStatusRequest(BaseModel):
+    """Request model for polling many workflows at once."""
+    threadIds: List[str] = Field(..., max_length=500, description="Thread identifiers (at most 500)")
+    fields: List[StatusField] = Field(
+        default_factory=lambda: ["status", "error"],
+        description="Fields to include in each summary"
+    )
+
+
+class ThreadStatusSummary(BaseModel):
+    """Compact per-thread status; only the requested fields are set."""
+    status: Optional[Literal["running", "completed", "error", "interrupted", "cancelled"]] = None
+    error: Optional[str] = None
+    node_statuses: Optional[Dict[str, NodeStatus]] = None
+    logs: Optional[List[LogEntry]] = None
+    interrupt_payload: Optional[InterruptPayload] = None
+    findings_summary: Optional[Dict[str, int]] = None
+
+
+class BatchStatusResponse(BaseModel):
+    """Response model for batch status; unknown threads map to null."""
+    results: Dict[str, Optional[ThreadStatusSummary]]
+
+
+class IndexedFinding(BaseModel):
+    """A finding from the cross-analysis findings index."""
+    threadId: str
+    fileDigest: str = Field(..., description="SHA-256 of the analyzed file content")
+    fileName: Optional[str] = None
+    fileType: Optional[str] = None
+    rule: str
+    severity: Literal["critical", "high", "medium", "low"]
+    message: str
+    line: Optional[int] = None
+    column: Optional[int] = None
+    indexedAt: str = Field(..., description="ISO8601 timestamp")
+
+
+class FindingsSearchResponse(BaseModel):
+    """Response model for findings search, newest first."""
+    findings: List[IndexedFinding]
+    nextCursor: Optional[str] = Field(None, description="Cursor of the next page; null on the last page")
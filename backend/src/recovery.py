@@ -0,0 +1,86 @@
+"""Startup recovery of workflows left in flight by a crash or restart."""
+import os
+import time
+from typing import Dict, List
+from src.checkpoint_reader import iter_thread_states
+from src.logger import workflow_logger
+
+
+RECOVERY_ENABLED = os.environ.get("RECOVERY_ENABLED", "true").lower() == "true"
+# Threads decoded per checkpoint query
+RECOVERY_BATCH_SIZE = int(os.environ.get("RECOVERY_BATCH_SIZE", "500"))
+# Upper bound on threads re-enqueued by one recovery pass
+RECOVERY_MAX_THREADS = int(os.environ.get("RECOVERY_MAX_THREADS", "10000"))
+
+def needs_recovery(values: Dict) -> bool:
+    """A thread needs recovery if it was running, or resuming after a decision."""
+    status = values.get("status", "running")
+    if status == "running":
+        return True
+    return status == "interrupted" and bool(values.get("approval_decision"))
+
+
+def recover_workflows(manager, max_threads: int = RECOVERY_MAX_THREADS) -> Dict[str, int]:
+    """
+    Find non-terminal threads in the durable checkpointer and re-enqueue them.
+    
+    Running threads (and interrupted ones whose resume was cut short) are
+    queued on the scheduler, which continues them from their last
+    checkpoint in parallel on its bounded worker pool. Interrupted threads
+    still awaiting a decision are left resumable. Threads whose execution
+    lease is held by another live process are skipped; leases left behind
+    by the crashed process are waited out once, then re-checked.
+    
+    Returns:
+        Counters: scanned, requeued, interrupted, busy
+    """
+    summary = {"scanned": 0, "requeued": 0, "interrupted": 0, "busy": 0}
+    if not hasattr(manager.checkpointer, "cursor"):
+        # In-memory checkpoints do not survive a restart: nothing to recover
+        return summary
+    
+    started = time.monotonic()
+    held: List[str] = []
+    
+    def requeue(thread_id: str) -> bool:
+        if summary["requeued"] >= max_threads:
+            return False
+        manager.recover_thread(thread_id)
+        summary["requeued"] += 1
+        return True
+    
+    for thread_id, values in iter_thread_states(manager.checkpointer, RECOVERY_BATCH_SIZE):
+        summary["scanned"] += 1
+        if not needs_recovery(values):
+            if values.get("status") == "interrupted":
+                summary["interrupted"] += 1
+            continue
+        owner = manager.backend.lease_owner(f"thread:{thread_id}")
+        if owner == manager.owner_id:
+            # Started by this process after boot
+            continue
+        if owner is not None:
+            held.append(thread_id)
+            continue
+        if not requeue(thread_id):
+            break
+    
+    if held:
+        # Leases from a crashed process expire after LEASE_TTL; live owners renew theirs
+        from src.workflow_manager import LEASE_TTL
+        time.sleep(LEASE_TTL)
+        for thread_id in held:
+            if manager.backend.lease_owner(f"thread:{thread_id}") is not None:
+                summary["busy"] += 1
+            elif not requeue(thread_id):
+                break
+    
+    workflow_logger.log(
+        "system",
+        "info",
+        f"Recovery pass: scanned {summary['scanned']} threads, re-enqueued {summary['requeued']}, "
+        f"{summary['interrupted']} awaiting approval, {summary['busy']} owned by live workers "
+        f"({(time.monotonic() - started) * 1000:.0f} ms)",
+        "recovery"
+    )
+    return summary
@@ -0,0 +1,479 @@
+"""Repository/directory scan mode for full-tree security analysis."""
+import argparse
+import fnmatch
+import json
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from src.dependency_scanner import MANIFEST_FILES
+from src.eslint_tool import SUPPORTED_FILE_TYPES
+from src.logger import workflow_logger
+
+
+# Directories allowed for path scans (comma separated, relative to the working dir)
+SCAN_ROOTS = [
+    root.strip()
+    for root in os.environ.get("SCAN_ROOTS", "examples").split(",")
+    if root.strip()
+]
+SCAN_DISCOVERY_WORKERS = int(os.environ.get("SCAN_DISCOVERY_WORKERS", "8"))
+SCAN_MAX_IN_FLIGHT = int(os.environ.get("SCAN_MAX_IN_FLIGHT", "16"))
+SCAN_QUEUE_SIZE = int(os.environ.get("SCAN_QUEUE_SIZE", "256"))
+SCAN_MAX_FILE_BYTES = int(os.environ.get("SCAN_MAX_FILE_BYTES", str(1024 * 1024)))
+# Lockfiles of large projects run to several MB
+SCAN_MAX_MANIFEST_BYTES = int(os.environ.get("SCAN_MAX_MANIFEST_BYTES", str(16 * 1024 * 1024)))
+
+# Statuses after which a file's workflow no longer holds an analysis slot
+FINISHED_STATUSES = ["completed", "error", "interrupted", "cancelled"]
+
+
+class DiscoveredFile(NamedTuple):
+    """A file found by the directory walk."""
+    path: str
+    rel_path: str
+    directory: str
+    file_type: str
+
+
+class LoadedFile(NamedTuple):
+    """A discovered file with its decoded content."""
+    file: DiscoveredFile
+    content: str
+
+
+class GitIgnore:
+    """Patterns from a single .gitignore file, relative to its directory."""
+
+    def __init__(self, base_dir: str, lines: List[str]):
+        self.base_dir = base_dir
+        self.rules: List[Tuple[re.Pattern, bool, bool]] = []  # (regex, negated, dir_only)
+        for raw in lines:
+            line = raw.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            if line.startswith("\\"):
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            # A slash anywhere but the end anchors the pattern to base_dir
+            anchored = "/" in line
+            line = line.lstrip("/")
+            self.rules.append((self._compile(line, anchored), negated, dir_only))
+
+    @staticmethod
+    def _compile(pattern: str, anchored: bool) -> re.Pattern:
+        """Translate a gitignore glob into a regex over '/'-separated paths."""
+        parts = []
+        i = 0
+        while i < len(pattern):
+            if pattern.startswith("**/", i):
+                parts.append("(?:.*/)?")
+                i += 3
+            elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+                parts.append("/.*")
+                i += 3
+            elif pattern.startswith("**", i):
+                parts.append(".*")
+                i += 2
+            elif pattern[i] == "*":
+                parts.append("[^/]*")
+                i += 1
+            elif pattern[i] == "?":
+                parts.append("[^/]")
+                i += 1
+            else:
+                # Bracket expressions and literals are handled by fnmatch
+                j = i
+                while j < len(pattern) and pattern[j] not in "*?":
+                    j += 1
+                literal = fnmatch.translate(pattern[i:j])
+                # fnmatch wraps as (?s:...)\Z - keep only the body
+                parts.append(literal[4:-3])
+                i = j
+        body = "".join(parts)
+        prefix = "" if anchored else "(?:.*/)?"
+        return re.compile(f"^{prefix}{body}$", re.DOTALL)
+
+    def match(self, path: str, is_dir: bool) -> Optional[bool]:
+        """
+        Check a path against the rules.
+
+        Returns:
+            True if ignored, False if re-included, None if no rule matches
+        """
+        rel = os.path.relpath(path, self.base_dir).replace(os.sep, "/")
+        result = None
+        for regex, negated, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel):
+                result = not negated
+        return result
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["GitIgnore"]:
+        """Load directory/.gitignore if it exists."""
+        ignore_path = os.path.join(directory, ".gitignore")
+        try:
+            with open(ignore_path, "r", encoding="utf-8", errors="replace") as f:
+                return cls(directory, f.readlines())
+        except OSError:
+            return None
+
+
+def is_ignored(path: str, is_dir: bool, ignores: Tuple[GitIgnore, ...]) -> bool:
+    """Apply .gitignore files from the root down; the deepest match wins."""
+    ignored = False
+    for gitignore in ignores:
+        result = gitignore.match(path, is_dir)
+        if result is not None:
+            ignored = result
+    return ignored
+
+
+def discover_files(
+    root: str,
+    max_workers: int = SCAN_DISCOVERY_WORKERS,
+    queue_size: int = SCAN_QUEUE_SIZE,
+    stop_event: Optional[threading.Event] = None
+) -> Iterator[DiscoveredFile]:
+    """
+    Walk a directory tree in parallel, yielding supported files.
+
+    Each directory is listed by a worker thread; results flow through a
+    bounded queue so the walk never runs far ahead of the consumer.
+
+    Args:
+        root: Directory to scan
+        max_workers: Number of directory listing threads
+        queue_size: Maximum number of discovered files buffered
+        stop_event: Set to abort the walk early
+
+    Yields:
+        DiscoveredFile for every non-ignored file with a supported extension,
+        and for package manifests and lockfiles (file_type "manifest")
+        outside node_modules
+    """
+    root = os.path.realpath(root)
+    stop_event = stop_event or threading.Event()
+    results: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    done = object()
+    pending = [0]
+    pending_lock = threading.Lock()
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scan-walk")
+
+    def put(item) -> bool:
+        while not stop_event.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def submit(directory: str, ignores: Tuple[GitIgnore, ...]):
+        with pending_lock:
+            pending[0] += 1
+        try:
+            executor.submit(scan_directory, directory, ignores)
+        except RuntimeError:
+            # The executor was shut down because the walk was stopped
+            with pending_lock:
+                pending[0] -= 1
+
+    def scan_directory(directory: str, ignores: Tuple[GitIgnore, ...]):
+        try:
+            gitignore = GitIgnore.load(directory)
+            if gitignore is not None:
+                ignores = ignores + (gitignore,)
+            rel_dir = os.path.relpath(directory, root).replace(os.sep, "/")
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if stop_event.is_set():
+                        return
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        is_file = entry.is_file(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if is_dir:
+                        if entry.name == ".git" or is_ignored(entry.path, True, ignores):
+                            continue
+                        submit(entry.path, ignores)
+                    elif is_file:
+                        file_type = entry.name.rsplit(".", 1)[-1].lower() if "." in entry.name else ""
+                        if entry.name in MANIFEST_FILES and "node_modules" not in rel_dir.split("/"):
+                            # Installed packages are covered by the project's lockfile
+                            file_type = "manifest"
+                        elif file_type not in SUPPORTED_FILE_TYPES:
+                            continue
+                        if is_ignored(entry.path, False, ignores):
+                            continue
+                        rel_path = os.path.relpath(entry.path, root).replace(os.sep, "/")
+                        if not put(DiscoveredFile(entry.path, rel_path, rel_dir, file_type)):
+                            return
+        except OSError as e:
+            workflow_logger.log("system", "warn", f"Cannot list {directory}: {str(e)}", "repo_scanner")
+        finally:
+            with pending_lock:
+                pending[0] -= 1
+                finished = pending[0] == 0
+            if finished:
+                put(done)
+
+    submit(root, ())
+    try:
+        while True:
+            item = results.get()
+            if item is done:
+                return
+            yield item
+    finally:
+        stop_event.set()
+        executor.shutdown(wait=False)
+
+
+def load_files(
+    files: Iterator[DiscoveredFile],
+    max_bytes: int = SCAN_MAX_FILE_BYTES,
+    on_skip=None
+) -> Iterator[LoadedFile]:
+    """
+    Read discovered files, skipping oversized or non UTF-8 content.
+
+    Args:
+        files: Discovered files
+        max_bytes: Source files larger than this are skipped
+            (manifests are limited by SCAN_MAX_MANIFEST_BYTES)
+        on_skip: Optional callback(file, reason) for skipped files
+    """
+    for discovered in files:
+        limit = SCAN_MAX_MANIFEST_BYTES if discovered.file_type == "manifest" else max_bytes
+        try:
+            if os.path.getsize(discovered.path) > limit:
+                raise ValueError(f"larger than {limit} bytes")
+            with open(discovered.path, "rb") as f:
+                content = f.read().decode("utf-8")
+        except (OSError, ValueError) as e:
+            if on_skip is not None:
+                on_skip(discovered, str(e))
+            continue
+        yield LoadedFile(discovered, content)
+
+
+class ScanJob:
+    """Tracks a single path scan and its per-directory progress."""
+
+    def __init__(self, scan_id: str, path: str, analysis_type: str):
+        self.scan_id = scan_id
+        self.path = path
+        self.analysis_type = analysis_type
+        self.status = "running"
+        self.error: Optional[str] = None
+        self.started_at = datetime.utcnow().isoformat() + "Z"
+        self.completed_at: Optional[str] = None
+        self.threads: Dict[str, str] = {}  # thread_id -> relative file path
+        self.directories: Dict[str, Dict[str, int]] = {}  # directory -> counters
+        self._lock = threading.Lock()
+
+    def record(self, directory: str, counter: str, amount: int = 1) -> Dict[str, int]:
+        """
+        Increment a progress counter for a directory.
+
+        Returns:
+            Copy of the directory's counters right after the update
+        """
+        with self._lock:
+            counters = self.directories.setdefault(
+                directory,
+                {"discovered": 0, "skipped": 0, "submitted": 0, "completed": 0}
+            )
+            counters[counter] += amount
+            return dict(counters)
+
+    def to_dict(self) -> Dict:
+        """Snapshot of the scan progress."""
+        with self._lock:
+            directories = {d: dict(c) for d, c in self.directories.items()}
+            threads = dict(self.threads)
+        totals = {"discovered": 0, "skipped": 0, "submitted": 0, "completed": 0}
+        for counters in directories.values():
+            for key in totals:
+                totals[key] += counters[key]
+        return {
+            "scanId": self.scan_id,
+            "path": self.path,
+            "analysisType": self.analysis_type,
+            "status": self.status,
+            "error": self.error,
+            "started_at": self.started_at,
+            "completed_at": self.completed_at,
+            "totals": totals,
+            "directories": directories,
+            "threads": threads
+        }
+
+
+class RepoScanner:
+    """Runs path scans through the workflow manager."""
+
+    def __init__(self, max_in_flight: int = SCAN_MAX_IN_FLIGHT):
+        self.max_in_flight = max_in_flight
+        self.jobs: Dict[str, ScanJob] = {}
+
+    def resolve_path(self, path: str) -> str:
+        """
+        Resolve a scan path and check it lies within an allowed root.
+
+        Raises:
+            PermissionError: Path is outside SCAN_ROOTS
+            FileNotFoundError: Path is not an existing directory
+        """
+        resolved = os.path.realpath(path)
+        allowed = [os.path.realpath(root) for root in SCAN_ROOTS]
+        if not any(resolved == root or resolved.startswith(root + os.sep) for root in allowed):
+            raise PermissionError(f"Path is outside the allowed scan roots: {', '.join(SCAN_ROOTS)}")
+        if not os.path.isdir(resolved):
+            raise FileNotFoundError(f"Directory not found: {path}")
+        return resolved
+
+    def start_scan(self, path: str, analysis_type: str) -> str:
+        """
+        Start scanning a directory in the background.
+
+        Returns:
+            scan_id: Identifier for polling progress
+        """
+        resolved = self.resolve_path(path)
+        scan_id = str(uuid.uuid4())
+        job = ScanJob(scan_id, resolved, analysis_type)
+        self.jobs[scan_id] = job
+        thread = threading.Thread(target=self.run_scan, args=(job,), daemon=True)
+        thread.start()
+        return scan_id
+
+    def get_scan(self, scan_id: str) -> Optional[Dict]:
+        """Get scan progress or None if unknown."""
+        job = self.jobs.get(scan_id)
+        return job.to_dict() if job else None
+
+    def run_scan(self, job: ScanJob, on_directory_done=None):
+        """
+        Execute a scan: discover -> load -> analyze with bounded concurrency.
+
+        Args:
+            job: Scan to execute
+            on_directory_done: Optional callback(directory, counters) used by the
+                CLI, called with a copy of the counters whenever a file of the
+                directory completes or is skipped
+        """
+        # Imported here so the CLI and API share one manager without import cycles
+        from src.workflow_manager import workflow_manager
+
+        in_flight: Dict[str, str] = {}  # thread_id -> directory
+        log_id = f"scan:{job.scan_id}"
+
+        def on_skip(discovered: DiscoveredFile, reason: str):
+            counters = job.record(discovered.directory, "skipped")
+            workflow_logger.log(log_id, "warn", f"Skipped {discovered.rel_path}: {reason}", "repo_scanner")
+            # Skipping may be what finishes the directory
+            if on_directory_done is not None:
+                on_directory_done(discovered.directory, counters)
+
+        def reap(block: bool):
+            # Release slots for finished workflows; wait while the pipeline is full
+            while in_flight:
+                for thread_id, directory in list(in_flight.items()):
+                    if workflow_manager.get_thread_status(thread_id) in FINISHED_STATUSES:
+                        del in_flight[thread_id]
+                        counters = job.record(directory, "completed")
+                        if on_directory_done is not None:
+                            on_directory_done(directory, counters)
+                if not block or len(in_flight) < self.max_in_flight:
+                    return
+                time.sleep(0.05)
+
+        def counted(files: Iterator[DiscoveredFile]) -> Iterator[DiscoveredFile]:
+            for discovered in files:
+                job.record(discovered.directory, "discovered")
+                yield discovered
+
+        workflow_logger.log(log_id, "info", f"Scan started: {job.path}", "repo_scanner")
+        try:
+            for loaded in load_files(counted(discover_files(job.path)), on_skip=on_skip):
+                reap(block=True)
+                thread_id = workflow_manager.start_analysis(
+                    file_content=loaded.content,
+                    file_type=loaded.file.file_type,
+                    analysis_type=job.analysis_type,
+                    priority="batch",
+                    client_id=log_id,
+                    file_name=loaded.file.rel_path
+                )
+                with job._lock:
+                    job.threads[thread_id] = loaded.file.rel_path
+                in_flight[thread_id] = loaded.file.directory
+                job.record(loaded.file.directory, "submitted")
+            while in_flight:
+                reap(block=False)
+                time.sleep(0.05)
+            job.status = "completed"
+        except Exception as e:
+            job.status = "error"
+            job.error = str(e)
+            workflow_logger.log(log_id, "error", f"Scan failed: {str(e)}", "repo_scanner")
+        finally:
+            job.completed_at = datetime.utcnow().isoformat() + "Z"
+
+        workflow_logger.log(
+            log_id,
+            "info",
+            f"Scan finished with status {job.status}: {len(job.threads)} files analyzed",
+            "repo_scanner"
+        )
+
+
+# Global repository scanner instance
+repo_scanner = RepoScanner()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI entry point: python -m src.repo_scanner PATH"""
+    parser = argparse.ArgumentParser(description="Scan a directory tree for security issues")
+    parser.add_argument("path", help="Directory to scan")
+    parser.add_argument(
+        "--analysis-type",
+        default="security",
+        choices=["security", "performance", "quality"]
+    )
+    parser.add_argument("--max-in-flight", type=int, default=SCAN_MAX_IN_FLIGHT)
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.path):
+        parser.error(f"Directory not found: {args.path}")
+
+    scanner = RepoScanner(max_in_flight=args.max_in_flight)
+    job = ScanJob(str(uuid.uuid4()), os.path.realpath(args.path), args.analysis_type)
+
+    def on_directory_done(directory: str, counters: Dict[str, int]):
+        done = counters["completed"] + counters["skipped"]
+        print(f"[{directory}] {done}/{counters['discovered']} files", flush=True)
+
+    scanner.run_scan(job, on_directory_done=on_directory_done)
+    print(json.dumps(job.to_dict()["totals"]))
+    return 0 if job.status == "completed" else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -48,6 +48,8 @@ def generate_report(thread_id: str, status_data: Dict) -> str:
         report_lines.append("⏸️ Analysis paused for human review.")
     elif status == "error":
         report_lines.append(f"❌ Analysis failed: {error or 'Unknown error'}")
+    elif status == "cancelled":
+        report_lines.append(f"⏹️ Analysis cancelled: {error or 'Cancelled'}")
     elif status == "running":
         report_lines.append("🔄 Analysis in progress...")
     
@@ -0,0 +1,186 @@
+"""Resource limits and usage accounting for analyzer subprocesses."""
+import os
+import re
+import signal
+import subprocess
+import threading
+from typing import Dict, NamedTuple, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+# Limits applied to each analyzer process group (0 disables a limit)
+# Address space, not RSS: node reserves far more than it uses, so off unless set
+ESLINT_MEMORY_LIMIT_MB = int(os.environ.get("ESLINT_MEMORY_LIMIT_MB", "0"))
+ESLINT_CPU_LIMIT = int(os.environ.get("ESLINT_CPU_LIMIT", "20"))                # CPU seconds
+ESLINT_MAX_OPEN_FILES = int(os.environ.get("ESLINT_MAX_OPEN_FILES", "1024"))
+
+# Bytes of stderr kept to tell which limit a failed run hit
+STDERR_TAIL_BYTES = 8192
+
+_MEMORY_PATTERN = re.compile(rb"(?i)out of memory|\bOOM\b|ENOMEM|cannot allocate memory|bad_alloc")
+_OPEN_FILES_PATTERN = re.compile(rb"(?i)EMFILE|too many open files")
+_CPU_PATTERN = re.compile(rb"(?i)CPU time limit exceeded")
+
+LIMIT_DESCRIPTIONS = {
+    "memory": lambda: f"memory limit ({ESLINT_MEMORY_LIMIT_MB} MB address space)",
+    "cpu": lambda: f"CPU limit ({ESLINT_CPU_LIMIT} s)",
+    "open_files": lambda: f"open files limit ({ESLINT_MAX_OPEN_FILES})"
+}
+
+
+class SubprocessUsage(NamedTuple):
+    """Resources used by a finished process and the children it waited for."""
+    peak_rss_mb: float
+    cpu_seconds: float
+    exit_code: int
+
+
+class ResourceLimitExceeded(Exception):
+    """Raised when an analyzer subprocess is stopped by one of its limits."""
+    
+    def __init__(self, tool: str, limit: str, usage: Optional[SubprocessUsage] = None):
+        message = f"{tool} exceeded its {LIMIT_DESCRIPTIONS[limit]()}"
+        if usage is not None:
+            message += f": peak RSS {usage.peak_rss_mb:.0f} MB, CPU {usage.cpu_seconds:.1f} s"
+        super().__init__(message)
+        self.tool = tool
+        self.limit = limit
+        self.usage = usage
+
+
+def apply_limits(pid: int):
+    """
+    Set the configured rlimits on a freshly started process.
+    
+    Children it starts afterwards (npx -> node eslint) inherit them.
+    Setting them from the parent with prlimit avoids a preexec_fn, which
+    is not safe to run in a multi-threaded server.
+    """
+    if resource is None or not hasattr(resource, "prlimit"):
+        return
+    for limit, value in (
+        (resource.RLIMIT_AS, ESLINT_MEMORY_LIMIT_MB << 20),
+        (resource.RLIMIT_CPU, ESLINT_CPU_LIMIT),
+        (resource.RLIMIT_NOFILE, ESLINT_MAX_OPEN_FILES)
+    ):
+        if value <= 0:
+            continue
+        # Hard CPU limit one second later: SIGXCPU first, then SIGKILL
+        hard = value + 1 if limit == resource.RLIMIT_CPU else value
+        try:
+            resource.prlimit(pid, limit, (value, hard))
+        except (ProcessLookupError, ValueError, PermissionError):
+            # Exited already, or the limit is above this process's own hard limit
+            pass
+
+
+def wait_with_usage(process: subprocess.Popen) -> Optional[SubprocessUsage]:
+    """
+    Reap a process with wait4 and return its resource usage.
+    
+    Returns:
+        Usage, or None where wait4 is unavailable (the process is still reaped)
+    """
+    if not hasattr(os, "wait4"):
+        process.wait()
+        return None
+    try:
+        _, status, rusage = os.wait4(process.pid, 0)
+    except ChildProcessError:
+        # Reaped elsewhere
+        process.wait()
+        return None
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return SubprocessUsage(
+        peak_rss_mb=round(rusage.ru_maxrss / 1024, 1),  # ru_maxrss is in KB on Linux
+        cpu_seconds=round(rusage.ru_utime + rusage.ru_stime, 3),
+        exit_code=process.returncode
+    )
+
+
+def classify_failure(exit_code: int, stderr_tail: bytes, usage: Optional[SubprocessUsage]) -> Optional[str]:
+    """
+    Tell whether a failed run was stopped by a resource limit.
+    
+    Returns:
+        "memory", "cpu", "open_files" or None for other failures
+    """
+    if exit_code == 0:
+        return None
+    # Killed directly (-N), or through the shell npx runs the tool with (128 + N)
+    signum = -exit_code if exit_code < 0 else exit_code - 128 if exit_code > 128 else None
+    # Past the soft CPU limit a process gets SIGXCPU, past the hard one SIGKILL
+    cpu_spent = ESLINT_CPU_LIMIT > 0 and usage is not None and usage.cpu_seconds >= ESLINT_CPU_LIMIT
+    if signum == signal.SIGXCPU or _CPU_PATTERN.search(stderr_tail) or (signum == signal.SIGKILL and cpu_spent):
+        return "cpu"
+    if _MEMORY_PATTERN.search(stderr_tail):
+        return "memory"
+    if _OPEN_FILES_PATTERN.search(stderr_tail):
+        return "open_files"
+    return None
+
+
+class ResourceAccounting:
+    """
+    Usage of analyzer subprocesses, per workflow thread and process-wide.
+    
+    Runs are held per thread until the workflow manager attaches them to
+    the node that started them.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Dict] = {}  # thread_id -> usage not yet attached to a node
+        self.runs = 0
+        self.cpu_seconds = 0.0
+        self.peak_rss_mb = 0.0
+        self.exceeded = {limit: 0 for limit in LIMIT_DESCRIPTIONS}
+    
+    def record(self, thread_id: str, usage: Optional[SubprocessUsage], exceeded: Optional[str] = None):
+        """Count a finished subprocess run of a thread."""
+        if usage is None:
+            return
+        with self._lock:
+            self.runs += 1
+            self.cpu_seconds += usage.cpu_seconds
+            self.peak_rss_mb = max(self.peak_rss_mb, usage.peak_rss_mb)
+            if exceeded:
+                self.exceeded[exceeded] += 1
+            pending = self._pending.get(thread_id)
+            if pending is None:
+                self._pending[thread_id] = {
+                    "peak_rss_mb": usage.peak_rss_mb,
+                    "cpu_seconds": usage.cpu_seconds,
+                    "limit_exceeded": exceeded
+                }
+            else:
+                pending["peak_rss_mb"] = max(pending["peak_rss_mb"], usage.peak_rss_mb)
+                pending["cpu_seconds"] = round(pending["cpu_seconds"] + usage.cpu_seconds, 3)
+                pending["limit_exceeded"] = pending["limit_exceeded"] or exceeded
+    
+    def take(self, thread_id: str) -> Optional[Dict]:
+        """Usage recorded for a thread since the last take(), for its node status."""
+        with self._lock:
+            return self._pending.pop(thread_id, None)
+    
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "cpu_seconds": round(self.cpu_seconds, 3),
+                "peak_rss_mb": self.peak_rss_mb,
+                "limit_exceeded": dict(self.exceeded),
+                "limits": {
+                    "memory_mb": ESLINT_MEMORY_LIMIT_MB,
+                    "cpu_seconds": ESLINT_CPU_LIMIT,
+                    "open_files": ESLINT_MAX_OPEN_FILES
+                }
+            }
+
+
+# Global subprocess accounting instance
+resource_accounting = ResourceAccounting()
@@ -0,0 +1,124 @@
+"""Per-rule ESLint timing, aggregated across profiled runs."""
+import os
+import random
+import threading
+from typing import Dict, List, Optional
+
+
+# Fraction of ESLint runs executed with --stats (0 disables profiling, 1 profiles every run)
+ESLINT_PROFILE_RATE = float(os.environ.get("ESLINT_PROFILE_RATE", "0"))
+# Rules listed in a thread's log after a profiled run
+PROFILE_LOG_TOP_RULES = 5
+
+
+def should_profile(rate: float = ESLINT_PROFILE_RATE) -> bool:
+    """Decide whether this ESLint run collects per-rule timings."""
+    return rate > 0 and (rate >= 1 or random.random() < rate)
+
+
+def parse_stats(stats: Dict) -> Dict:
+    """
+    Sum the timings of an ESLint result's `stats` object over its passes.
+    
+    Args:
+        stats: `stats` of one file result from `eslint --stats --format json`
+    
+    Returns:
+        {"rules": {rule_id: ms}, "parse_ms": float, "total_ms": float}
+    """
+    rules: Dict[str, float] = {}
+    parse_ms = 0.0
+    total_ms = 0.0
+    for timing in (stats.get("times") or {}).get("passes") or []:
+        for rule_id, rule_timing in (timing.get("rules") or {}).items():
+            rules[rule_id] = rules.get(rule_id, 0.0) + rule_timing.get("total", 0.0)
+        parse_ms += (timing.get("parse") or {}).get("total", 0.0)
+        total_ms += timing.get("total", 0.0)
+    return {"rules": rules, "parse_ms": parse_ms, "total_ms": total_ms}
+
+
+def format_breakdown(timings: Dict, top: int = PROFILE_LOG_TOP_RULES) -> str:
+    """One-line summary of the most expensive rules of a run."""
+    ranked = sorted(timings["rules"].items(), key=lambda item: item[1], reverse=True)[:top]
+    rules = ", ".join(f"{rule_id} {ms:.2f} ms" for rule_id, ms in ranked) or "no rules ran"
+    return f"ESLint rule timings: {rules} (parse {timings['parse_ms']:.2f} ms, total {timings['total_ms']:.2f} ms)"
+
+
+class _RuleTotals:
+    """Accumulated cost of one rule."""
+    
+    __slots__ = ("runs", "total_ms", "max_ms")
+    
+    def __init__(self):
+        self.runs = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+
+class RuleProfiler:
+    """
+    Aggregates per-rule timings of profiled ESLint runs.
+    
+    Counters are per worker process and kept for the process lifetime;
+    the set of rules is bounded by the configured ruleset.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rules: Dict[str, _RuleTotals] = {}
+        self._runs = 0
+        self._parse_ms = 0.0
+        self._total_ms = 0.0
+    
+    def record(self, timings: Dict):
+        """Add one run's parse_stats() result."""
+        with self._lock:
+            self._runs += 1
+            self._parse_ms += timings["parse_ms"]
+            self._total_ms += timings["total_ms"]
+            for rule_id, ms in timings["rules"].items():
+                totals = self._rules.get(rule_id)
+                if totals is None:
+                    totals = self._rules[rule_id] = _RuleTotals()
+                totals.runs += 1
+                totals.total_ms += ms
+                if ms > totals.max_ms:
+                    totals.max_ms = ms
+    
+    def report(self, limit: Optional[int] = None) -> Dict:
+        """
+        Rules ranked by total time across all profiled runs.
+        
+        Args:
+            limit: Return only the most expensive rules
+        
+        Returns:
+            Run count, parse and lint totals, and per-rule totals with
+            their share of all rule time
+        """
+        with self._lock:
+            rules = [(rule_id, t.runs, t.total_ms, t.max_ms) for rule_id, t in self._rules.items()]
+            runs, parse_ms, total_ms = self._runs, self._parse_ms, self._total_ms
+        rules.sort(key=lambda rule: rule[2], reverse=True)
+        rule_ms = sum(rule[2] for rule in rules)
+        ranked: List[Dict] = [
+            {
+                "rule": rule_id,
+                "runs": rule_runs,
+                "totalMs": round(rule_total, 3),
+                "avgMs": round(rule_total / rule_runs, 3),
+                "maxMs": round(rule_max, 3),
+                "share": round(rule_total / rule_ms * 100, 1) if rule_ms else 0.0
+            }
+            for rule_id, rule_runs, rule_total, rule_max in rules[:limit]
+        ]
+        return {
+            "runs": runs,
+            "parseMs": round(parse_ms, 3),
+            "totalMs": round(total_ms, 3),
+            "rules": ranked
+        }
+
+
+# Global rule profiler instance
+rule_profiler = RuleProfiler()
@@ -0,0 +1,246 @@
+"""Priority scheduling with per-client fair queuing for workflow execution."""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Deque, Dict, List, Optional
+from src.logger import workflow_logger
+
+
+# Priority classes, highest first. "resume" always runs before anything else.
+PRIORITY_CLASSES = ["resume", "interactive", "batch"]
+
+SCHEDULER_WORKERS = int(os.environ.get("SCHEDULER_WORKERS", "4"))
+
+
+def _parse_weights(value: str) -> Dict[str, int]:
+    """Parse "name:weight,name:weight" into a dict."""
+    weights = {}
+    for item in value.split(","):
+        if ":" not in item:
+            continue
+        name, weight = item.rsplit(":", 1)
+        try:
+            weights[name.strip()] = max(1, int(weight))
+        except ValueError:
+            continue
+    return weights
+
+
+# Share of dispatches between interactive and batch when both have work queued
+CLASS_WEIGHTS = {"interactive": 8, "batch": 1}
+CLASS_WEIGHTS.update({
+    name: weight
+    for name, weight in _parse_weights(os.environ.get("SCHEDULER_CLASS_WEIGHTS", "")).items()
+    if name in CLASS_WEIGHTS
+})
+
+# Per-client round-robin weights, e.g. "ci-bot:1,security-team:4" (default 1)
+CLIENT_WEIGHTS = _parse_weights(os.environ.get("SCHEDULER_CLIENT_WEIGHTS", ""))
+
+# Number of recent queue latencies kept per class for percentiles
+LATENCY_SAMPLES = 1000
+
+
+class _Job:
+    """A queued unit of work."""
+
+    __slots__ = ("fn", "future", "priority", "client_id", "enqueued_at")
+
+    def __init__(self, fn: Callable, priority: str, client_id: str):
+        self.fn = fn
+        self.future: Future = Future()
+        self.priority = priority
+        self.client_id = client_id
+        self.enqueued_at = time.monotonic()
+
+
+class _FairQueue:
+    """Weighted round-robin over per-client FIFO queues."""
+
+    def __init__(self):
+        self.clients: Dict[str, Deque[_Job]] = {}
+        self.order: Deque[str] = deque()  # clients with queued jobs, in service order
+        self.credit: Dict[str, int] = {}  # jobs left in the current turn per client
+        self.size = 0
+
+    def push(self, job: _Job):
+        client_queue = self.clients.get(job.client_id)
+        if client_queue is None:
+            client_queue = self.clients[job.client_id] = deque()
+            self.order.append(job.client_id)
+        client_queue.append(job)
+        self.size += 1
+
+    def pop(self) -> Optional[_Job]:
+        if not self.order:
+            return None
+        client_id = self.order[0]
+        client_queue = self.clients[client_id]
+        job = client_queue.popleft()
+        self.size -= 1
+
+        credit = self.credit.get(client_id, CLIENT_WEIGHTS.get(client_id, 1)) - 1
+        if not client_queue:
+            # Client drained: drop it so idle clients cost nothing
+            del self.clients[client_id]
+            self.credit.pop(client_id, None)
+            self.order.popleft()
+        elif credit <= 0:
+            # Turn used up: move to the back of the line
+            self.credit.pop(client_id, None)
+            self.order.rotate(-1)
+        else:
+            self.credit[client_id] = credit
+        return job
+
+
+class _LatencyStats:
+    """Queue wait statistics for one priority class."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def to_dict(self) -> Dict:
+        ordered = sorted(self.samples)
+
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            "p50_ms": round(percentile(0.50) * 1000, 2),
+            "p95_ms": round(percentile(0.95) * 1000, 2),
+            "max_ms": round(self.max * 1000, 2)
+        }
+
+
+class WorkflowScheduler:
+    """
+    Runs submitted callables on a fixed worker pool.
+
+    Jobs are ordered by priority class: resumed workflows first, then
+    interactive and batch work shared by CLASS_WEIGHTS. Within a class,
+    clients are served weighted round-robin so one client's bulk
+    submission cannot starve the others.
+    """
+
+    def __init__(self, workers: int = SCHEDULER_WORKERS):
+        self.workers = workers
+        self._queues: Dict[str, _FairQueue] = {p: _FairQueue() for p in PRIORITY_CLASSES}
+        self._current_weight: Dict[str, int] = {p: 0 for p in CLASS_WEIGHTS}
+        self._latency: Dict[str, _LatencyStats] = {p: _LatencyStats() for p in PRIORITY_CLASSES}
+        self._running = 0
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+
+    def _ensure_workers(self):
+        # Workers start lazily so importing the module stays cheap
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker,
+                name=f"scheduler-{i}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, fn: Callable, priority: str = "interactive", client_id: str = "anonymous") -> Future:
+        """
+        Queue a callable for execution.
+
+        Args:
+            fn: Callable taking no arguments
+            priority: One of PRIORITY_CLASSES
+            client_id: Fair-sharing key (API key, client header, ...)
+
+        Returns:
+            Future resolved with the callable's result
+        """
+        if priority not in self._queues:
+            raise ValueError(f"priority must be one of: {', '.join(PRIORITY_CLASSES)}")
+        job = _Job(fn, priority, client_id)
+        with self._cond:
+            self._ensure_workers()
+            self._queues[priority].push(job)
+            self._cond.notify()
+        return job.future
+
+    def _next_job(self) -> Optional[_Job]:
+        """Pick the next job. Caller holds the condition lock."""
+        if self._queues["resume"].size:
+            return self._queues["resume"].pop()
+
+        # Smooth weighted round-robin between the non-empty classes
+        candidates = [p for p in CLASS_WEIGHTS if self._queues[p].size]
+        if not candidates:
+            return None
+        total = 0
+        for p in candidates:
+            self._current_weight[p] += CLASS_WEIGHTS[p]
+            total += CLASS_WEIGHTS[p]
+        chosen = max(candidates, key=lambda p: self._current_weight[p])
+        self._current_weight[chosen] -= total
+        return self._queues[chosen].pop()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    self._cond.wait()
+                    job = self._next_job()
+                self._running += 1
+                self._latency[job.priority].record(time.monotonic() - job.enqueued_at)
+
+            if job.future.set_running_or_notify_cancel():
+                try:
+                    job.future.set_result(job.fn())
+                except BaseException as e:
+                    job.future.set_exception(e)
+                    workflow_logger.log("system", "error", f"Scheduled job failed: {str(e)}", "scheduler")
+
+            with self._cond:
+                self._running -= 1
+                self._cond.notify_all()
+
+    def has_capacity(self) -> bool:
+        """True if a worker is idle and nothing is queued locally."""
+        with self._cond:
+            queued = sum(q.size for q in self._queues.values())
+            return self._running + queued < self.workers
+
+    def get_metrics(self) -> Dict:
+        """Queue depth and queue latency per priority class."""
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "running": self._running,
+                "classes": {
+                    p: {
+                        "queued": self._queues[p].size,
+                        "clients": len(self._queues[p].clients),
+                        "queue_latency": self._latency[p].to_dict()
+                    }
+                    for p in PRIORITY_CLASSES
+                }
+            }
+
+
+# Global scheduler instance
+workflow_scheduler = WorkflowScheduler()
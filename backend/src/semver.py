@@ -0,0 +1,179 @@
+"""Semantic version parsing and npm range helpers for dependency scanning."""
+import re
+from typing import NamedTuple, Optional, Tuple
+
+
+_VERSION_PATTERN = re.compile(
+    r"^\s*[v=]?\s*(\d+)\.(\d+)\.(\d+)(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?\s*$"
+)
+# Partial versions in npm ranges: "1", "1.2", "1.x", "1.2.*"
+_PARTIAL_PATTERN = re.compile(
+    r"^[v=]?(\d+|[xX*])(?:\.(\d+|[xX*]))?(?:\.(\d+|[xX*]))?(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$"
+)
+_COMPARATOR_PATTERN = re.compile(r"^(>=|<=|>|<|=|\^|~>|~)?\s*(.*)$")
+
+
+class Version(NamedTuple):
+    """A parsed semantic version (build metadata is dropped)."""
+    major: int
+    minor: int
+    patch: int
+    prerelease: str = ""  # Empty for releases
+    
+    def __str__(self) -> str:
+        base = f"{self.major}.{self.minor}.{self.patch}"
+        return f"{base}-{self.prerelease}" if self.prerelease else base
+
+
+def parse_version(text: str) -> Optional[Version]:
+    """Parse an exact version such as "4.17.21" or "1.0.0-rc.1"."""
+    match = _VERSION_PATTERN.match(text)
+    if not match:
+        return None
+    major, minor, patch, prerelease = match.groups()
+    return Version(int(major), int(minor), int(patch), prerelease or "")
+
+
+def compare_prerelease(a: str, b: str) -> int:
+    """
+    Order two prerelease strings by semver precedence.
+    
+    A release (empty string) is higher than any prerelease. Identifiers
+    compare numerically when both are numeric, numeric ones sort first,
+    and a shorter list of equal identifiers sorts first.
+    
+    Returns:
+        Negative, zero or positive like cmp()
+    """
+    if a == b:
+        return 0
+    if not a:
+        return 1
+    if not b:
+        return -1
+    for left, right in zip(a.split("."), b.split(".")):
+        if left == right:
+            continue
+        left_numeric, right_numeric = left.isdigit(), right.isdigit()
+        if left_numeric and right_numeric:
+            return -1 if int(left) < int(right) else 1
+        if left_numeric != right_numeric:
+            return -1 if left_numeric else 1
+        return -1 if left < right else 1
+    return -1 if len(a.split(".")) < len(b.split(".")) else 1
+
+
+def compare_versions(a: Version, b: Version) -> int:
+    """Order two versions by semver precedence (negative, zero or positive)."""
+    if a[:3] != b[:3]:
+        return -1 if a[:3] < b[:3] else 1
+    return compare_prerelease(a.prerelease, b.prerelease)
+
+
+class VersionRange(NamedTuple):
+    """Versions an npm dependency range admits, from floor up to ceiling."""
+    spec: str
+    floor: Version
+    ceiling: Optional[Version]  # None when unbounded
+    ceiling_inclusive: bool = False
+
+
+ZERO = Version(0, 0, 0)
+
+# An upper bound: (version, inclusive)
+_Bound = Tuple[Version, bool]
+
+
+def _comparator_bounds(comparator: str) -> Optional[Tuple[Version, Optional[_Bound]]]:
+    """Lowest version and upper bound (None if unbounded) of a single comparator."""
+    operator, text = _COMPARATOR_PATTERN.match(comparator).groups()
+    operator = operator or "="
+    if text in ("", "*", "x", "X"):
+        return ZERO, None
+    match = _PARTIAL_PATTERN.match(text)
+    if not match:
+        return None
+    parts = [None if part is None or part in "xX*" else int(part) for part in match.groups()[:3]]
+    prerelease = match.group(4) or ""
+    major, minor, patch = parts
+    if major is None:
+        return ZERO, None
+    exact = Version(major, minor or 0, patch or 0, prerelease if patch is not None else "")
+    # First version past a partial one, at the precision it was given with ("1.2" -> 1.3.0)
+    if minor is None:
+        above = Version(major + 1, 0, 0)
+    elif patch is None:
+        above = Version(major, minor + 1, 0)
+    else:
+        above = None
+    if operator == "<":
+        return ZERO, (exact, False)
+    if operator == "<=":
+        return ZERO, (above, False) if above else (exact, True)
+    if operator == ">":
+        return above or Version(major, minor, patch + 1), None
+    if operator == ">=":
+        return exact, None
+    if operator in ("~", "~>"):
+        return exact, (Version(major + 1, 0, 0) if minor is None else Version(major, minor + 1, 0), False)
+    if operator == "^":
+        # Up to the next change of the left-most non-zero component
+        if major > 0 or minor is None:
+            return exact, (Version(major + 1, 0, 0), False)
+        if minor > 0 or patch is None:
+            return exact, (Version(0, minor + 1, 0), False)
+        return exact, (Version(0, 0, patch + 1), False)
+    return exact, (above, False) if above else (exact, True)
+
+
+def _bound_order(a: _Bound, b: _Bound) -> int:
+    """Order upper bounds; an exclusive bound is lower than an inclusive one at the same version."""
+    order = compare_versions(a[0], b[0])
+    return order if order else int(a[1]) - int(b[1])
+
+
+def range_bounds(spec: str) -> Optional[VersionRange]:
+    """
+    Versions an npm dependency range admits, e.g. "^4.17.0" -> 4.17.0 up
+    to (excluding) 5.0.0. Alternatives joined by || are merged into one
+    span from the lowest floor to the highest ceiling.
+    
+    Returns:
+        The range, or None for specs that are not version ranges (any
+        version, tags, URLs, git, file:, workspace: ...)
+    """
+    spec = spec.strip()
+    if not spec or spec in ("*", "x", "X", "latest", "next"):
+        return None
+    if ":" in spec or "/" in spec:
+        return None
+    floor: Optional[Version] = None
+    ceiling: Optional[_Bound] = None
+    unbounded = False
+    for alternative in spec.split("||"):
+        alternative = alternative.strip()
+        if " - " in alternative:
+            # Hyphen range: both ends are inclusive
+            low, high = alternative.split(" - ", 1)
+            alternative = f">={low.strip()} <={high.strip()}"
+        # Operators may be separated from their version by spaces (">= 1.2.3")
+        comparators = re.sub(r"(>=|<=|>|<|=|\^|~>|~)\s+", r"\1", alternative).split()
+        lower = ZERO
+        upper: Optional[_Bound] = None
+        for comparator in comparators or ["*"]:
+            bounds = _comparator_bounds(comparator)
+            if bounds is None:
+                return None
+            if compare_versions(bounds[0], lower) > 0:
+                lower = bounds[0]
+            if bounds[1] is not None and (upper is None or _bound_order(bounds[1], upper) < 0):
+                upper = bounds[1]
+        if floor is None or compare_versions(lower, floor) < 0:
+            floor = lower
+        if upper is None:
+            unbounded = True
+        elif ceiling is None or _bound_order(upper, ceiling) > 0:
+            ceiling = upper
+    if unbounded or ceiling is None:
+        return VersionRange(spec, floor, None)
+    return VersionRange(spec, floor, ceiling[0], ceiling[1])
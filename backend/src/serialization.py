@@ -0,0 +1,53 @@
+"""Fast JSON serialization for hot API responses."""
+import json
+import os
+from typing import Any, Type
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # Falls back to stdlib json
+    orjson = None
+
+
+# Validate responses against their models before sending (debug mode)
+VALIDATE_RESPONSES = os.environ.get("VALIDATE_RESPONSES", "false").lower() == "true"
+
+
+def dumps(data: Any) -> bytes:
+    """Encode JSON-compatible data to UTF-8 bytes."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response encoded with orjson when available."""
+    
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_response(model: Type[BaseModel], data: Any, exclude_unset: bool = False) -> Response:
+    """
+    Serialize trusted internal data straight to JSON bytes.
+    
+    Returning a Response skips FastAPI's response_model validation, so the
+    data is neither validated nor copied into model instances. With
+    VALIDATE_RESPONSES=true it is validated against the model first, and a
+    mismatch raises instead of going out.
+    
+    Args:
+        model: Response model the data must conform to
+        data: Plain dicts/lists as built by the workflow manager
+        exclude_unset: Leave out fields missing from the data (debug mode)
+    
+    Returns:
+        JSON response
+    """
+    if VALIDATE_RESPONSES:
+        data = model.model_validate(data).model_dump(mode="json", exclude_unset=exclude_unset)
+    return FastJSONResponse(data)
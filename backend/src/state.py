@@ -1,6 +1,5 @@
 """LangGraph state definition for security analysis workflow."""
-from typing import TypedDict, List, Optional, Literal, Annotated
-from langgraph.graph.message import add_messages
+from typing import TypedDict, List, Optional, Literal
 
 
 class SecurityFinding(TypedDict):
@@ -16,11 +15,12 @@ class WorkflowState(TypedDict):
     """State passed through the LangGraph workflow."""
     # File information
     file_content: str
-    file_type: str  # "js", "ts", "py"
+    file_type: str  # "js", "ts", "py", or "manifest" (package.json / lockfile, path scans)
+    file_name: Optional[str]
     analysis_type: Literal["security", "performance", "quality"]
     
     # Analysis results
-    security_findings: Annotated[List[SecurityFinding], add_messages]
+    security_findings: List[SecurityFinding]
     
     # Workflow metadata
     thread_id: str
@@ -31,6 +31,9 @@ class WorkflowState(TypedDict):
     approval_decision: Optional[Literal["approve", "reject"]]
     
     # Status tracking
-    status: Literal["running", "completed", "error", "interrupted"]
+    status: Literal["running", "completed", "error", "interrupted", "cancelled"]
     error_message: Optional[str]
+    
+    # Completion callback (POSTed the report summary when the workflow stops)
+    callback_url: Optional[str]
 
@@ -0,0 +1,440 @@
+"""Pluggable storage for job dispatch, node statuses and logs.
+
+The in-memory backend keeps the original single-process behaviour. The
+SQLite and Redis backends are shared, so several uvicorn workers or
+replicas can pull work from one queue and answer status requests for
+threads started elsewhere.
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# "memory", "sqlite" or "redis"
+STATE_BACKEND = os.environ.get("STATE_BACKEND", "memory").lower()
+STATE_DB_PATH = os.environ.get("STATE_DB_PATH", "data/state.db")
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+REDIS_KEY_PREFIX = os.environ.get("REDIS_KEY_PREFIX", "clickit")
+
+
+class StateBackend:
+    """Interface shared by all state backends."""
+    
+    # True if other processes see the same jobs, logs and node statuses
+    shared = False
+    
+    def register_thread(self, thread_id: str):
+        """Record that a thread exists, before it has any checkpoint."""
+        raise NotImplementedError
+    
+    def thread_exists(self, thread_id: str) -> bool:
+        """Check whether a thread was registered."""
+        raise NotImplementedError
+    
+    def append_log(self, thread_id: str, entry: Dict):
+        """Append a log entry for a thread."""
+        raise NotImplementedError
+    
+    def get_logs(self, thread_id: str) -> List[Dict]:
+        """Get all log entries for a thread, oldest first."""
+        raise NotImplementedError
+    
+    def clear_logs(self, thread_id: str):
+        """Remove all log entries for a thread."""
+        raise NotImplementedError
+    
+    def set_node_status(self, thread_id: str, node: str, status: Dict):
+        """Store the status of one workflow node."""
+        raise NotImplementedError
+    
+    def get_node_statuses(self, thread_id: str) -> Dict[str, Dict]:
+        """Get node_id -> status for a thread."""
+        raise NotImplementedError
+    
+    def clear_node_statuses(self, thread_id: str):
+        """Remove all node statuses for a thread."""
+        raise NotImplementedError
+    
+    def push_job(self, job: Dict):
+        """Queue a JSON-serialisable job for any worker."""
+        raise NotImplementedError
+    
+    def pop_job(self, timeout: float = 1.0) -> Optional[Dict]:
+        """Claim the oldest queued job, waiting up to timeout seconds."""
+        raise NotImplementedError
+    
+    def acquire_lease(self, key: str, owner: str, ttl: float) -> bool:
+        """
+        Take or renew an expiring lease.
+        
+        Returns:
+            True if owner now holds the lease, False if another owner does
+        """
+        raise NotImplementedError
+    
+    def release_lease(self, key: str, owner: str):
+        """Drop a lease if owner holds it."""
+        raise NotImplementedError
+    
+    def lease_owner(self, key: str) -> Optional[str]:
+        """Get the current holder of an unexpired lease."""
+        raise NotImplementedError
+    
+    def request_cancel(self, thread_id: str, reason: str):
+        """Record that a thread must stop, for whichever worker runs it."""
+        raise NotImplementedError
+    
+    def cancel_reason(self, thread_id: str) -> Optional[str]:
+        """Get the reason a thread was cancelled, or None."""
+        raise NotImplementedError
+
+
+class MemoryBackend(StateBackend):
+    """Process-local dicts; only valid with a single worker process."""
+    
+    def __init__(self):
+        self.threads: set = set()
+        self.logs: Dict[str, List[Dict]] = {}  # thread_id -> list of logs
+        self.node_statuses: Dict[str, Dict[str, Dict]] = {}  # thread_id -> node_id -> status
+        self.jobs: "queue.Queue[Dict]" = queue.Queue()
+        self.leases: Dict[str, Tuple[str, float]] = {}  # key -> (owner, expires_at)
+        self._lease_lock = threading.Lock()
+        self.cancellations: Dict[str, str] = {}  # thread_id -> reason
+    
+    def register_thread(self, thread_id: str):
+        self.threads.add(thread_id)
+    
+    def thread_exists(self, thread_id: str) -> bool:
+        return thread_id in self.threads
+    
+    def append_log(self, thread_id: str, entry: Dict):
+        self.logs.setdefault(thread_id, []).append(entry)
+    
+    def get_logs(self, thread_id: str) -> List[Dict]:
+        return self.logs.get(thread_id, [])
+    
+    def clear_logs(self, thread_id: str):
+        self.logs.pop(thread_id, None)
+    
+    def set_node_status(self, thread_id: str, node: str, status: Dict):
+        self.node_statuses.setdefault(thread_id, {})[node] = status
+    
+    def get_node_statuses(self, thread_id: str) -> Dict[str, Dict]:
+        return self.node_statuses.get(thread_id, {})
+    
+    def clear_node_statuses(self, thread_id: str):
+        self.node_statuses.pop(thread_id, None)
+    
+    def push_job(self, job: Dict):
+        self.jobs.put(job)
+    
+    def pop_job(self, timeout: float = 1.0) -> Optional[Dict]:
+        try:
+            return self.jobs.get(timeout=timeout)
+        except queue.Empty:
+            return None
+    
+    def acquire_lease(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lease_lock:
+            current = self.leases.get(key)
+            if current is not None and current[0] != owner and current[1] > now:
+                return False
+            self.leases[key] = (owner, now + ttl)
+            return True
+    
+    def release_lease(self, key: str, owner: str):
+        with self._lease_lock:
+            if self.leases.get(key, (None, 0))[0] == owner:
+                del self.leases[key]
+    
+    def lease_owner(self, key: str) -> Optional[str]:
+        current = self.leases.get(key)
+        if current is None or current[1] <= time.time():
+            return None
+        return current[0]
+    
+    def request_cancel(self, thread_id: str, reason: str):
+        self.cancellations.setdefault(thread_id, reason)
+    
+    def cancel_reason(self, thread_id: str) -> Optional[str]:
+        return self.cancellations.get(thread_id)
+
+
+class SQLiteBackend(StateBackend):
+    """File-backed backend for several workers on one host or shared volume."""
+    
+    shared = True
+    
+    POLL_INTERVAL = 0.1
+    
+    def __init__(self, db_path: str = STATE_DB_PATH):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._connect().executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS threads (
+                thread_id TEXT PRIMARY KEY,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                thread_id TEXT NOT NULL,
+                entry TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS logs_thread ON logs (thread_id, id);
+            CREATE TABLE IF NOT EXISTS node_statuses (
+                thread_id TEXT NOT NULL,
+                node TEXT NOT NULL,
+                status TEXT NOT NULL,
+                PRIMARY KEY (thread_id, node)
+            );
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS leases (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS cancellations (
+                thread_id TEXT PRIMARY KEY,
+                reason TEXT NOT NULL
+            );
+            """
+        )
+    
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections are not thread-safe
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+    
+    def register_thread(self, thread_id: str):
+        self._connect().execute(
+            "INSERT OR IGNORE INTO threads (thread_id, created_at) VALUES (?, ?)",
+            (thread_id, time.time())
+        )
+    
+    def thread_exists(self, thread_id: str) -> bool:
+        row = self._connect().execute(
+            "SELECT 1 FROM threads WHERE thread_id = ?", (thread_id,)
+        ).fetchone()
+        return row is not None
+    
+    def append_log(self, thread_id: str, entry: Dict):
+        self._connect().execute(
+            "INSERT INTO logs (thread_id, entry) VALUES (?, ?)",
+            (thread_id, json.dumps(entry))
+        )
+    
+    def get_logs(self, thread_id: str) -> List[Dict]:
+        rows = self._connect().execute(
+            "SELECT entry FROM logs WHERE thread_id = ? ORDER BY id", (thread_id,)
+        )
+        return [json.loads(entry) for (entry,) in rows]
+    
+    def clear_logs(self, thread_id: str):
+        self._connect().execute("DELETE FROM logs WHERE thread_id = ?", (thread_id,))
+    
+    def set_node_status(self, thread_id: str, node: str, status: Dict):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO node_statuses (thread_id, node, status) VALUES (?, ?, ?)",
+            (thread_id, node, json.dumps(status))
+        )
+    
+    def get_node_statuses(self, thread_id: str) -> Dict[str, Dict]:
+        rows = self._connect().execute(
+            "SELECT node, status FROM node_statuses WHERE thread_id = ?", (thread_id,)
+        )
+        return {node: json.loads(status) for node, status in rows}
+    
+    def clear_node_statuses(self, thread_id: str):
+        self._connect().execute("DELETE FROM node_statuses WHERE thread_id = ?", (thread_id,))
+    
+    def push_job(self, job: Dict):
+        self._connect().execute("INSERT INTO jobs (payload) VALUES (?)", (json.dumps(job),))
+    
+    def pop_job(self, timeout: float = 1.0) -> Optional[Dict]:
+        conn = self._connect()
+        deadline = time.monotonic() + timeout
+        while True:
+            # Claim atomically: the write lock is held from SELECT to DELETE
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT id, payload FROM jobs ORDER BY id LIMIT 1").fetchone()
+                if row is not None:
+                    conn.execute("DELETE FROM jobs WHERE id = ?", (row[0],))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            if row is not None:
+                return json.loads(row[1])
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.POLL_INTERVAL)
+    
+    def acquire_lease(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        cursor = self._connect().execute(
+            """
+            INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+            WHERE leases.owner = excluded.owner OR leases.expires_at <= ?
+            """,
+            (key, owner, now + ttl, now)
+        )
+        return cursor.rowcount == 1
+    
+    def release_lease(self, key: str, owner: str):
+        self._connect().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+    
+    def lease_owner(self, key: str) -> Optional[str]:
+        row = self._connect().execute(
+            "SELECT owner FROM leases WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+    
+    def request_cancel(self, thread_id: str, reason: str):
+        self._connect().execute(
+            "INSERT OR IGNORE INTO cancellations (thread_id, reason) VALUES (?, ?)",
+            (thread_id, reason)
+        )
+    
+    def cancel_reason(self, thread_id: str) -> Optional[str]:
+        row = self._connect().execute(
+            "SELECT reason FROM cancellations WHERE thread_id = ?", (thread_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+
+# Lease updates compare the owner and act in one step: a lease that expired
+# and was taken by another replica in between must not be extended or deleted
+_ACQUIRE_LEASE_SCRIPT = """
+if redis.call("SET", KEYS[1], ARGV[1], "NX", "PX", ARGV[2]) then
+    return 1
+end
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    redis.call("PEXPIRE", KEYS[1], ARGV[2])
+    return 1
+end
+return 0
+"""
+_RELEASE_LEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class RedisBackend(StateBackend):
+    """
+    Redis-compatible backend for replicas on different hosts.
+    
+    Accepts any client with the redis-py command interface, so a local
+    stand-in such as fakeredis can be passed in for testing.
+    """
+    
+    shared = True
+    
+    def __init__(self, client: Any = None, url: str = REDIS_URL, prefix: str = REDIS_KEY_PREFIX):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError(
+                    "STATE_BACKEND=redis requires the 'redis' package (pip install redis)"
+                ) from e
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+    
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.prefix,) + parts)
+    
+    @staticmethod
+    def _text(value) -> str:
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+    
+    def register_thread(self, thread_id: str):
+        self.client.set(self._key("thread", thread_id), "1")
+    
+    def thread_exists(self, thread_id: str) -> bool:
+        return bool(self.client.exists(self._key("thread", thread_id)))
+    
+    def append_log(self, thread_id: str, entry: Dict):
+        self.client.rpush(self._key("logs", thread_id), json.dumps(entry))
+    
+    def get_logs(self, thread_id: str) -> List[Dict]:
+        entries = self.client.lrange(self._key("logs", thread_id), 0, -1)
+        return [json.loads(self._text(entry)) for entry in entries]
+    
+    def clear_logs(self, thread_id: str):
+        self.client.delete(self._key("logs", thread_id))
+    
+    def set_node_status(self, thread_id: str, node: str, status: Dict):
+        self.client.hset(self._key("nodes", thread_id), node, json.dumps(status))
+    
+    def get_node_statuses(self, thread_id: str) -> Dict[str, Dict]:
+        statuses = self.client.hgetall(self._key("nodes", thread_id))
+        return {self._text(node): json.loads(self._text(status)) for node, status in statuses.items()}
+    
+    def clear_node_statuses(self, thread_id: str):
+        self.client.delete(self._key("nodes", thread_id))
+    
+    def push_job(self, job: Dict):
+        self.client.lpush(self._key("jobs"), json.dumps(job))
+    
+    def pop_job(self, timeout: float = 1.0) -> Optional[Dict]:
+        # BRPOP only accepts whole seconds on older servers
+        result = self.client.brpop(self._key("jobs"), timeout=max(1, int(timeout)))
+        if result is None:
+            return None
+        return json.loads(self._text(result[1]))
+    
+    def acquire_lease(self, key: str, owner: str, ttl: float) -> bool:
+        ttl_ms = max(1, int(ttl * 1000))
+        return bool(self.client.eval(_ACQUIRE_LEASE_SCRIPT, 1, self._key("lease", key), owner, ttl_ms))
+    
+    def release_lease(self, key: str, owner: str):
+        self.client.eval(_RELEASE_LEASE_SCRIPT, 1, self._key("lease", key), owner)
+    
+    def lease_owner(self, key: str) -> Optional[str]:
+        owner = self.client.get(self._key("lease", key))
+        return self._text(owner) if owner is not None else None
+    
+    def request_cancel(self, thread_id: str, reason: str):
+        self.client.set(self._key("cancel", thread_id), reason, nx=True)
+    
+    def cancel_reason(self, thread_id: str) -> Optional[str]:
+        reason = self.client.get(self._key("cancel", thread_id))
+        return self._text(reason) if reason is not None else None
+
+
+def create_backend(kind: str = STATE_BACKEND) -> StateBackend:
+    """Create the state backend selected by STATE_BACKEND."""
+    if kind == "sqlite":
+        return SQLiteBackend(STATE_DB_PATH)
+    if kind == "redis":
+        return RedisBackend(url=REDIS_URL)
+    if kind != "memory":
+        raise ValueError("STATE_BACKEND must be one of: memory, sqlite, redis")
+    return MemoryBackend()
+
+
+# Global state backend instance
+state_backend = create_backend()
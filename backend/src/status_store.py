@@ -0,0 +1,160 @@
+"""Thread-safe store for workflow node statuses."""
+import heapq
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from src.state_backend import StateBackend, state_backend
+
+
+# Seconds a finished thread's node statuses are kept before collection
+NODE_STATUS_TTL = float(os.environ.get("NODE_STATUS_TTL", "3600"))
+NODE_STATUS_STRIPES = int(os.environ.get("NODE_STATUS_STRIPES", "16"))
+# Minimum seconds between garbage collection sweeps
+GC_INTERVAL = 30.0
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+class _Stripe:
+    """One lock and the snapshots of the threads hashed to it."""
+    
+    __slots__ = ("lock", "snapshots")
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshots: Dict[str, Dict[str, Dict]] = {}  # thread_id -> node_id -> status
+
+
+class NodeStatusStore:
+    """
+    Node lifecycle tracking (pending -> running -> completed/failed).
+    
+    Writers for different threads contend only on their stripe's lock.
+    Each write publishes a new per-thread snapshot instead of mutating the
+    old one, so readers take no lock and never see a half-applied update.
+    Snapshots returned by get() must be treated as read-only.
+    
+    With a shared state backend every transition is also written through,
+    and reads go to the backend so any replica sees every thread.
+    """
+    
+    def __init__(
+        self,
+        backend: StateBackend = state_backend,
+        stripes: int = NODE_STATUS_STRIPES,
+        ttl: float = NODE_STATUS_TTL
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self._stripes = [_Stripe() for _ in range(stripes)]
+        self._expiry: List[Tuple[float, str]] = []  # heap of (expires_at, thread_id)
+        self._expiry_lock = threading.Lock()
+        self._last_gc = time.monotonic()
+    
+    def _stripe(self, thread_id: str) -> _Stripe:
+        return self._stripes[hash(thread_id) % len(self._stripes)]
+    
+    def _transition(
+        self,
+        thread_id: str,
+        node: str,
+        status: str,
+        error: Optional[str] = None,
+        resource_usage: Optional[Dict] = None
+    ):
+        stripe = self._stripe(thread_id)
+        with stripe.lock:
+            current = stripe.snapshots.get(thread_id, {})
+            previous = current.get(node)
+            now = _now()
+            if status == "pending":
+                entry = {"status": "pending", "started_at": None, "completed_at": None, "error": None}
+            elif status == "running":
+                entry = {"status": "running", "started_at": now, "completed_at": None, "error": None}
+            else:
+                started_at = previous.get("started_at") if previous else None
+                entry = {"status": status, "started_at": started_at or now, "completed_at": now, "error": error}
+                if resource_usage:
+                    entry["resource_usage"] = resource_usage
+            snapshot = dict(current)
+            snapshot[node] = entry
+            stripe.snapshots[thread_id] = snapshot
+        if self.backend.shared:
+            self.backend.set_node_status(thread_id, node, entry)
+        self._maybe_collect()
+    
+    def mark_pending(self, thread_id: str, node: str):
+        """Node is scheduled to run next."""
+        self._transition(thread_id, node, "pending")
+    
+    def mark_running(self, thread_id: str, node: str):
+        """Node started executing."""
+        self._transition(thread_id, node, "running")
+    
+    def mark_completed(self, thread_id: str, node: str, resource_usage: Optional[Dict] = None):
+        """Node finished successfully."""
+        self._transition(thread_id, node, "completed", resource_usage=resource_usage)
+    
+    def mark_failed(self, thread_id: str, node: str, error: str, resource_usage: Optional[Dict] = None):
+        """Node raised an error."""
+        self._transition(thread_id, node, "failed", error, resource_usage)
+    
+    def get(self, thread_id: str) -> Dict[str, Dict]:
+        """Get node_id -> status for a thread (read-only snapshot)."""
+        if self.backend.shared:
+            return self.backend.get_node_statuses(thread_id)
+        return self._stripe(thread_id).snapshots.get(thread_id, {})
+    
+    def evict(self, thread_id: str):
+        """Drop a thread's local snapshot (the shared backend keeps its copy)."""
+        stripe = self._stripe(thread_id)
+        with stripe.lock:
+            stripe.snapshots.pop(thread_id, None)
+    
+    def restore(self, thread_id: str, snapshot: Dict[str, Dict]):
+        """Reinstate a snapshot taken before evict()."""
+        stripe = self._stripe(thread_id)
+        with stripe.lock:
+            stripe.snapshots[thread_id] = dict(snapshot)
+        if self.backend.shared:
+            for node, entry in snapshot.items():
+                self.backend.set_node_status(thread_id, node, entry)
+    
+    def finish(self, thread_id: str):
+        """Thread reached a terminal status; collect its entries after the TTL."""
+        with self._expiry_lock:
+            heapq.heappush(self._expiry, (time.monotonic() + self.ttl, thread_id))
+    
+    def _maybe_collect(self):
+        now = time.monotonic()
+        if now - self._last_gc < GC_INTERVAL:
+            return
+        self._last_gc = now
+        self.collect_garbage(now)
+    
+    def collect_garbage(self, now: Optional[float] = None) -> int:
+        """
+        Drop entries of finished threads whose TTL has passed.
+        
+        Returns:
+            Number of threads collected
+        """
+        now = time.monotonic() if now is None else now
+        expired = []
+        with self._expiry_lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                expired.append(heapq.heappop(self._expiry)[1])
+        for thread_id in expired:
+            stripe = self._stripe(thread_id)
+            with stripe.lock:
+                stripe.snapshots.pop(thread_id, None)
+            if self.backend.shared:
+                self.backend.clear_node_statuses(thread_id)
+        return len(expired)
+    
+    def __len__(self) -> int:
+        return sum(len(stripe.snapshots) for stripe in self._stripes)
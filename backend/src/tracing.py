@@ -0,0 +1,371 @@
+"""Lightweight tracing of analysis stages, correlated by threadId."""
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+
+TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "true").lower() == "true"
+# "jsonl", "otlp" or empty for in-memory traces only
+TRACE_EXPORT = os.environ.get("TRACE_EXPORT", "").lower()
+TRACE_JSONL_PATH = os.environ.get("TRACE_JSONL_PATH", "data/traces.jsonl")
+TRACE_OTLP_ENDPOINT = os.environ.get("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACE_SERVICE_NAME = os.environ.get("TRACE_SERVICE_NAME", "security-analysis-backend")
+# Threads whose spans are kept for GET /api/trace, and spans kept per thread
+TRACE_MAX_THREADS = int(os.environ.get("TRACE_MAX_THREADS", "1000"))
+TRACE_MAX_SPANS = 500
+# Seconds between export batches
+TRACE_EXPORT_INTERVAL = 1.0
+# Spans waiting for export; the oldest are dropped when the exporter falls
+# behind or was never started (e.g. the repo_scanner CLI)
+TRACE_EXPORT_QUEUE = int(os.environ.get("TRACE_EXPORT_QUEUE", "10000"))
+
+
+def trace_id_for(thread_id: str) -> str:
+    """OTLP trace id (32 hex chars) of a thread: its UUID without dashes."""
+    try:
+        return uuid.UUID(thread_id).hex
+    except ValueError:
+        return uuid.uuid5(uuid.NAMESPACE_OID, thread_id).hex
+
+
+class Span:
+    """A timed stage; attributes must be str, int, float or bool."""
+    
+    __slots__ = ("name", "thread_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error", "previous")
+    
+    def __init__(self, name: str, thread_id: str, parent_id: Optional[str], start_ns: int, attributes: Dict):
+        self.name = name
+        self.thread_id = thread_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = start_ns
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self.previous: Optional["Span"] = None  # Active span of the thread before this one
+    
+    def set(self, **attributes: Any):
+        self.attributes.update(attributes)
+    
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "threadId": self.thread_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+
+class Tracer:
+    """
+    Records spans in memory per thread and exports them in the background.
+    
+    A new span's parent is the innermost open span of the same workflow
+    thread (one execution runs per thread at a time), so spans opened in
+    graph executor threads still nest under the node that runs them.
+    Recording a span is a few attribute writes
+    and a deque append; serialization and export happen on a background
+    thread every TRACE_EXPORT_INTERVAL seconds.
+    """
+    
+    def __init__(
+        self,
+        enabled: bool = TRACING_ENABLED,
+        export: str = TRACE_EXPORT,
+        max_threads: int = TRACE_MAX_THREADS,
+        max_queued: int = TRACE_EXPORT_QUEUE
+    ):
+        if export not in ("", "jsonl", "otlp"):
+            raise ValueError("TRACE_EXPORT must be one of: jsonl, otlp (or empty)")
+        self.enabled = enabled
+        self.export = export
+        self.max_threads = max_threads
+        self._active: Dict[str, Span] = {}                      # thread_id -> innermost open span
+        self._active_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._outbox: deque = deque(maxlen=max_queued)
+        self.dropped = 0  # Spans lost to a full export queue or a failed export
+        self._dropped_reported = 0
+        self._exporter: Optional[threading.Thread] = None
+    
+    def start_span(self, name: str, thread_id: str, **attributes: Any) -> Optional[Span]:
+        """Open a span; close it with end_span(). Returns None when tracing is off."""
+        if not self.enabled:
+            return None
+        with self._active_lock:
+            parent = self._active.get(thread_id)
+            span = Span(name, thread_id, parent.span_id if parent else None, time.time_ns(), attributes)
+            span.previous = parent
+            self._active[thread_id] = span
+        return span
+    
+    def end_span(self, span: Optional[Span], error: Optional[str] = None):
+        if span is None:
+            return
+        span.end_ns = time.time_ns()
+        span.error = error
+        with self._active_lock:
+            # Spans of one thread may end out of order across OS threads:
+            # unlink this one wherever it sits in the chain of open spans
+            innermost = self._active.get(span.thread_id)
+            if innermost is span:
+                if span.previous is None:
+                    del self._active[span.thread_id]
+                else:
+                    self._active[span.thread_id] = span.previous
+            else:
+                while innermost is not None and innermost.previous is not span:
+                    innermost = innermost.previous
+                if innermost is not None:
+                    innermost.previous = span.previous
+            span.previous = None
+        self._record(span)
+    
+    def current(self, thread_id: str) -> Optional[Span]:
+        """Innermost open span of a thread."""
+        return self._active.get(thread_id)
+    
+    @contextmanager
+    def span(self, name: str, thread_id: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Time the enclosed block as a child of the thread's innermost open span."""
+        span = self.start_span(name, thread_id, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            self.end_span(span, error=f"{type(e).__name__}: {e}")
+            raise
+        self.end_span(span)
+    
+    def record(
+        self,
+        name: str,
+        thread_id: str,
+        start_ns: int,
+        end_ns: int,
+        parent: Optional[Span] = None,
+        **attributes: Any
+    ) -> Optional[Span]:
+        """Record a stage measured elsewhere (e.g. time spent queued)."""
+        if not self.enabled:
+            return None
+        if parent is None:
+            parent = self._active.get(thread_id)
+        span = Span(name, thread_id, parent.span_id if parent else None, start_ns, attributes)
+        span.end_ns = end_ns
+        self._record(span)
+        return span
+    
+    def _record(self, span: Span):
+        thread_id = span.thread_id
+        with self._lock:
+            spans = self._traces.get(thread_id)
+            if spans is None:
+                spans = self._traces[thread_id] = []
+                if len(self._traces) > self.max_threads:
+                    self._traces.popitem(last=False)
+            if len(spans) < TRACE_MAX_SPANS:
+                spans.append(span)
+            if self.export:
+                if len(self._outbox) == self._outbox.maxlen:
+                    self.dropped += 1
+                self._outbox.append(span)
+    
+    def get_spans(self, thread_id: str) -> List[Span]:
+        with self._lock:
+            return list(self._traces.get(thread_id, ()))
+    
+    def waterfall(self, thread_id: str) -> Optional[Dict]:
+        """
+        Spans of a thread ordered by start time, with offsets from the first.
+        
+        Returns:
+            None if no spans were recorded for the thread
+        """
+        spans = sorted(self.get_spans(thread_id), key=lambda span: span.start_ns)
+        if not spans:
+            return None
+        origin = spans[0].start_ns
+        end = max(span.end_ns for span in spans)
+        ids = {span.span_id for span in spans}
+        parents = {span.span_id: span.parent_id for span in spans}
+        
+        def depth(span_id: str) -> int:
+            level = 0
+            parent = parents.get(span_id)
+            while parent in ids and level < 32:
+                level += 1
+                parent = parents.get(parent)
+            return level
+        
+        return {
+            "threadId": thread_id,
+            "traceId": trace_id_for(thread_id),
+            "durationMs": round((end - origin) / 1e6, 3),
+            "spans": [
+                {
+                    "name": span.name,
+                    "spanId": span.span_id,
+                    "parentSpanId": span.parent_id,
+                    "depth": depth(span.span_id),
+                    "startMs": round((span.start_ns - origin) / 1e6, 3),
+                    "durationMs": round((span.end_ns - span.start_ns) / 1e6, 3),
+                    "attributes": span.attributes,
+                    "error": span.error
+                }
+                for span in spans
+            ]
+        }
+    
+    def start(self):
+        """Start the background exporter (no-op without TRACE_EXPORT)."""
+        if not self.enabled or not self.export or self._exporter is not None:
+            return
+        
+        def export_loop():
+            while True:
+                time.sleep(TRACE_EXPORT_INTERVAL)
+                self.flush()
+        
+        self._exporter = threading.Thread(target=export_loop, name="trace-exporter", daemon=True)
+        self._exporter.start()
+    
+    def flush(self) -> int:
+        """
+        Export queued spans.
+        
+        Returns:
+            Number of spans exported
+        """
+        with self._lock:
+            batch = list(self._outbox)
+            self._outbox.clear()
+            overflowed = self.dropped - self._dropped_reported
+            self._dropped_reported = self.dropped
+        if overflowed:
+            logging.getLogger("workflow").warning(
+                f"Trace export queue full: {overflowed} spans dropped (TRACE_EXPORT_QUEUE={self._outbox.maxlen})"
+            )
+        if not batch:
+            return 0
+        try:
+            if self.export == "jsonl":
+                _export_jsonl(batch)
+            else:
+                _export_otlp(batch)
+        except Exception as e:
+            with self._lock:
+                self.dropped += len(batch)
+                self._dropped_reported += len(batch)
+            logging.getLogger("workflow").error(f"Trace export failed ({len(batch)} spans dropped): {str(e)}")
+            return 0
+        return len(batch)
+
+
+def _export_jsonl(batch: List[Span], path: str = TRACE_JSONL_PATH):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for span in batch:
+            record = span.to_dict()
+            record["traceId"] = trace_id_for(span.thread_id)
+            f.write(json.dumps(record) + "\n")
+
+
+def _otlp_value(value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _export_otlp(batch: List[Span], endpoint: str = TRACE_OTLP_ENDPOINT):
+    """POST spans as OTLP/HTTP JSON (any OpenTelemetry collector accepts it)."""
+    spans = []
+    for span in batch:
+        attributes = dict(span.attributes, **{"thread.id": span.thread_id})
+        otlp_span = {
+            "traceId": trace_id_for(span.thread_id),
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        spans.append(otlp_span)
+    body = {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": TRACE_SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "src.tracing"}, "spans": spans}]
+        }]
+    }
+    request = urllib.request.Request(
+        endpoint,
+        data=json.dumps(body).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=5) as response:
+        response.read()
+
+
+def trace_checkpointer(checkpointer):
+    """
+    Time a checkpointer's writes as checkpoint.put / checkpoint.put_writes spans.
+    
+    The graph writes checkpoints from a background executor while the
+    next node may already be running, so these spans are recorded as
+    leaves and never become the parent of other spans.
+    """
+    for method in ("put", "put_writes"):
+        original = getattr(checkpointer, method)
+        
+        def traced(config, *args, _original=original, _name=f"checkpoint.{method}", **kwargs):
+            thread_id = config.get("configurable", {}).get("thread_id")
+            if thread_id is None or not tracer.enabled:
+                return _original(config, *args, **kwargs)
+            parent = tracer.current(thread_id)
+            started = time.time_ns()
+            try:
+                return _original(config, *args, **kwargs)
+            finally:
+                tracer.record(_name, thread_id, started, time.time_ns(), parent=parent)
+        
+        setattr(checkpointer, method, traced)
+    return checkpointer
+
+
+def format_waterfall(trace: Dict, width: int = 40) -> str:
+    """Render a waterfall() result as text, one bar per span."""
+    total = trace["durationMs"] or 1.0
+    lines = [f"trace {trace['traceId']} (thread {trace['threadId']}) {trace['durationMs']:.1f} ms"]
+    for span in trace["spans"]:
+        start = int(span["startMs"] / total * width)
+        length = max(1, int(span["durationMs"] / total * width))
+        bar = " " * start + "█" * min(length, width - start)
+        label = "  " * span["depth"] + span["name"]
+        lines.append(f"{label:<36} {span['startMs']:>10.1f} {span['durationMs']:>10.1f} ms |{bar:<{width}}|")
+    return "\n".join(lines) + "\n"
+
+
+# Global tracer instance
+tracer = Tracer()
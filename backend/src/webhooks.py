@@ -0,0 +1,336 @@
+"""Completion callbacks: batched webhook delivery of workflow summaries."""
+import asyncio
+import ipaddress
+import os
+import random
+import socket
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from src.logger import workflow_logger
+
+
+# Seconds events for one receiver are collected before they are sent together
+WEBHOOK_BATCH_WINDOW = float(os.environ.get("WEBHOOK_BATCH_WINDOW", "0.5"))
+WEBHOOK_MAX_BATCH = int(os.environ.get("WEBHOOK_MAX_BATCH", "100"))
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get("WEBHOOK_MAX_ATTEMPTS", "5"))
+# Exponential backoff between attempts: base, base * 2, ... up to the cap (seconds)
+WEBHOOK_BACKOFF = float(os.environ.get("WEBHOOK_BACKOFF", "1.0"))
+WEBHOOK_BACKOFF_MAX = float(os.environ.get("WEBHOOK_BACKOFF_MAX", "30"))
+WEBHOOK_TIMEOUT = float(os.environ.get("WEBHOOK_TIMEOUT", "10"))
+# Pooled connections shared by all receivers
+WEBHOOK_MAX_CONNECTIONS = int(os.environ.get("WEBHOOK_MAX_CONNECTIONS", "50"))
+
+# Trusted callback hosts, comma-separated: "hooks.example.com", or
+# ".example.com" for its subdomains. When set, only these hosts are accepted,
+# and they may resolve to private addresses (e.g. an internal receiver).
+# When empty, any host is accepted that resolves to public addresses only.
+WEBHOOK_ALLOWED_HOSTS = [
+    host.strip().lower() for host in os.environ.get("WEBHOOK_ALLOWED_HOSTS", "").split(",") if host.strip()
+]
+
+# Responses worth retrying besides 5xx
+RETRYABLE_STATUS = {408, 425, 429}
+
+# IPv6 prefixes that embed an IPv4 address (NAT64)
+_NAT64_PREFIX = ipaddress.ip_network("64:ff9b::/96")
+
+
+class CallbackRejected(ValueError):
+    """A callback URL the server must not send to."""
+
+
+def _is_public(address: str) -> bool:
+    """True for globally routable unicast addresses, IPv4 embedded in IPv6 included."""
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6:
+        if ip.ipv4_mapped is not None:
+            ip = ip.ipv4_mapped
+        elif ip.sixtofour is not None:
+            ip = ip.sixtofour
+        elif ip in _NAT64_PREFIX:
+            ip = ipaddress.ip_address(int(ip) & 0xFFFFFFFF)
+    return ip.is_global and not ip.is_multicast
+
+
+def _host_listed(host: str, allowed: List[str]) -> bool:
+    return any(host == entry or (entry.startswith(".") and host.endswith(entry)) for entry in allowed)
+
+
+def parse_callback_url(url: str, allowed: List[str] = WEBHOOK_ALLOWED_HOSTS) -> Tuple[str, int, bool]:
+    """
+    Check the form of a callback URL and its host against the allowlist.
+    
+    Returns:
+        (host, port, trusted); untrusted hosts must still pass
+        check_addresses() for every address they resolve to
+    
+    Raises:
+        CallbackRejected: Not an absolute http(s) URL, or a host outside
+            WEBHOOK_ALLOWED_HOSTS
+    """
+    parsed = urlparse(url)
+    try:
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    except ValueError:
+        raise CallbackRejected("callbackUrl has an invalid port")
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise CallbackRejected("callbackUrl must be an absolute http(s) URL")
+    host = parsed.hostname.lower()
+    if allowed and not _host_listed(host, allowed):
+        raise CallbackRejected(f"callbackUrl host {host} is not in WEBHOOK_ALLOWED_HOSTS")
+    return host, port, bool(allowed)
+
+
+def check_addresses(host: str, addresses: List[str]) -> str:
+    """
+    Refuse hosts resolving to loopback, private, link-local or reserved addresses.
+    
+    Returns:
+        The address to connect to
+    """
+    if not addresses:
+        raise CallbackRejected(f"callbackUrl host {host} does not resolve")
+    for address in addresses:
+        if not _is_public(address):
+            raise CallbackRejected(f"callbackUrl host {host} resolves to a non-public address ({address})")
+    return addresses[0]
+
+
+def _addresses(infos: List) -> List[str]:
+    return list(dict.fromkeys(info[4][0] for info in infos))
+
+
+def validate_callback_url(url: str, allowed: List[str] = WEBHOOK_ALLOWED_HOSTS):
+    """
+    Validate a callback URL at submission, resolving its host (blocking).
+    
+    Delivery checks the host again, since its DNS answer may change.
+    
+    Raises:
+        CallbackRejected: With a message fit for the client
+    """
+    host, port, trusted = parse_callback_url(url, allowed)
+    if trusted:
+        return
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror:
+        raise CallbackRejected(f"callbackUrl host {host} does not resolve")
+    check_addresses(host, _addresses(infos))
+
+
+class WebhookNotifier:
+    """
+    Delivers workflow events to callback URLs from a background event loop.
+    
+    notify() is safe to call from any thread and never blocks on the
+    network. Events for the same receiver URL are collected for
+    batch_window seconds and POSTed together as {"events": [...]}; a
+    receiver gets its batches one at a time, in order. Failed batches are
+    retried with exponential backoff (honouring Retry-After), and all
+    receivers share one pooled async HTTP client.
+    
+    Hosts outside WEBHOOK_ALLOWED_HOSTS are resolved before every attempt
+    and the request goes to the checked address (keeping the original
+    Host header and TLS server name), so a DNS answer that changes after
+    submission cannot point the server at an internal address.
+    """
+    
+    def __init__(
+        self,
+        batch_window: float = WEBHOOK_BATCH_WINDOW,
+        max_batch: int = WEBHOOK_MAX_BATCH,
+        max_attempts: int = WEBHOOK_MAX_ATTEMPTS,
+        backoff: float = WEBHOOK_BACKOFF,
+        timeout: float = WEBHOOK_TIMEOUT,
+        max_connections: int = WEBHOOK_MAX_CONNECTIONS,
+        allowed_hosts: List[str] = WEBHOOK_ALLOWED_HOSTS
+    ):
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.allowed_hosts = allowed_hosts
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client = None
+        self._start_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._queues: Dict[str, List[Dict]] = {}  # receiver URL -> events not yet sent
+        self._senders: Dict[str, asyncio.Task] = {}  # receiver URL -> its delivery task (loop only)
+        self.delivered = 0
+        self.batches = 0
+        self.retries = 0
+        self.failed = 0
+    
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="webhooks", daemon=True).start()
+                self._loop = loop
+        return self._loop
+    
+    def notify(self, url: str, thread_id: str, summary: Dict):
+        """
+        Queue a workflow event for delivery.
+        
+        Args:
+            url: Callback URL given at submission
+            thread_id: Thread the event is about
+            summary: Report summary of the thread
+        """
+        event = {
+            "eventId": str(uuid.uuid4()),  # Stable across retries, for de-duplication
+            "threadId": thread_id,
+            "status": summary.get("status"),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "summary": summary
+        }
+        self._ensure_loop().call_soon_threadsafe(self._enqueue, url, event)
+    
+    def _enqueue(self, url: str, event: Dict):
+        with self._lock:
+            self._queues.setdefault(url, []).append(event)
+        if url not in self._senders:
+            self._senders[url] = self._loop.create_task(self._drain(url))
+    
+    async def _drain(self, url: str):
+        """Send a receiver's queued events in batches until none are left."""
+        try:
+            while True:
+                await asyncio.sleep(self.batch_window)
+                with self._lock:
+                    pending = self._queues.get(url)
+                    if not pending:
+                        self._queues.pop(url, None)
+                        return
+                    batch = pending[:self.max_batch]
+                    del pending[:self.max_batch]
+                await self._deliver(url, batch)
+        finally:
+            self._senders.pop(url, None)
+    
+    def _get_client(self):
+        if self._client is None:
+            # Imported on first delivery, keeping it off the startup path
+            import httpx
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._client
+    
+    async def _target(self, url: str):
+        """
+        Request URL, headers and extensions for one delivery attempt.
+        
+        Raises:
+            CallbackRejected: The host is not allowed (anymore)
+        """
+        import httpx
+        host, port, trusted = parse_callback_url(url, self.allowed_hosts)
+        if trusted:
+            return url, {}, {}
+        try:
+            infos = await self._loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise httpx.ConnectError(f"Cannot resolve {host}: {e}")
+        address = check_addresses(host, _addresses(infos))
+        target = httpx.URL(url)
+        extensions = {"sni_hostname": host} if target.scheme == "https" else {}
+        return target.copy_with(host=address), {"Host": target.netloc.decode("ascii")}, extensions
+    
+    async def _deliver(self, url: str, batch: List[Dict]):
+        """POST one batch, retrying transient failures."""
+        import httpx
+        client = self._get_client()
+        error = None
+        for attempt in range(1, self.max_attempts + 1):
+            retry_after = None
+            try:
+                target, headers, extensions = await self._target(url)
+                response = await client.post(target, json={"events": batch}, headers=headers, extensions=extensions)
+                if response.status_code < 300:
+                    with self._lock:
+                        self.delivered += len(batch)
+                        self.batches += 1
+                    for event in batch:
+                        workflow_logger.log(
+                            event["threadId"],
+                            "info",
+                            f"Callback delivered ({event['status']})",
+                            "webhooks"
+                        )
+                    return
+                error = f"HTTP {response.status_code}"
+                if response.status_code < 500 and response.status_code not in RETRYABLE_STATUS:
+                    # Rejected by the receiver: retrying will not help
+                    break
+                retry_after = response.headers.get("Retry-After")
+            except CallbackRejected as e:
+                error = str(e)
+                break
+            except httpx.HTTPError as e:
+                error = str(e) or type(e).__name__
+            if attempt == self.max_attempts:
+                break
+            with self._lock:
+                self.retries += 1
+            # Jitter spreads the retries of many batches to a receiver that was down
+            delay = min(WEBHOOK_BACKOFF_MAX, self.backoff * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+            if retry_after and retry_after.isdigit():
+                delay = min(WEBHOOK_BACKOFF_MAX, max(delay, float(retry_after)))
+            await asyncio.sleep(delay)
+        
+        with self._lock:
+            self.failed += len(batch)
+        for event in batch:
+            workflow_logger.log(
+                event["threadId"],
+                "warn",
+                f"Callback delivery to {url} failed after {attempt} attempt(s): {error}",
+                "webhooks"
+            )
+    
+    async def _wait_idle(self):
+        while self._senders:
+            await asyncio.gather(*list(self._senders.values()), return_exceptions=True)
+    
+    def flush(self, timeout: float = WEBHOOK_TIMEOUT) -> bool:
+        """
+        Wait for queued events to be delivered (or given up on).
+        
+        Returns:
+            True if nothing is left pending
+        """
+        if self._loop is None:
+            return True
+        future = asyncio.run_coroutine_threadsafe(self._wait_idle(), self._loop)
+        try:
+            future.result(timeout)
+            return True
+        except Exception:
+            return False
+    
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "receivers": len(self._queues),
+                "pending": sum(len(events) for events in self._queues.values()),
+                "delivered": self.delivered,
+                "batches": self.batches,
+                "retries": self.retries,
+                "failed": self.failed
+            }
+
+
+# Global webhook notifier instance
+webhook_notifier = WebhookNotifier()
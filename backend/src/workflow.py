@@ -1,13 +1,23 @@
 """LangGraph workflow definition for security analysis."""
+import os
 from typing import Literal
-from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.graph.message import add_messages
 from src.state import WorkflowState, SecurityFinding
+from src.coalescing import analysis_flights
 from src.eslint_tool import analyze_security
+from src.findings_index import file_digest
 from src.logger import workflow_logger
 
 
+def analysis_key(state: WorkflowState) -> tuple:
+    """
+    Identity of a file analysis for coalescing: content digest, file type
+    and analysis type (plus file name for manifests, which are parsed by it).
+    """
+    file_name = state.get("file_name")
+    manifest = os.path.basename(file_name or "") if state["file_type"] == "manifest" else None
+    return (file_digest(state["file_content"]), state["file_type"], state["analysis_type"], manifest)
+
+
 def file_analysis_node(state: WorkflowState) -> WorkflowState:
     """Node: Analyze file for security issues."""
     thread_id = state["thread_id"]
@@ -15,11 +25,11 @@ def file_analysis_node(state: WorkflowState) -> WorkflowState:
     
     state["current_node"] = "file_analysis"
     
-    # Analyze file
-    findings = analyze_security(
-        state["file_content"],
-        state["file_type"],
-        thread_id
+    # Analyze file; identical concurrent submissions share one run
+    findings = analysis_flights.run(
+        analysis_key(state),
+        thread_id,
+        lambda: analyze_security(state["file_content"], state["file_type"], thread_id, state.get("file_name"))
     )
     
     # Add findings to state
@@ -111,8 +121,11 @@ def complete_node(state: WorkflowState) -> WorkflowState:
     return state
 
 
-def build_workflow(checkpointer: MemorySaver):
+def build_workflow(checkpointer):
     """Build and compile the LangGraph workflow."""
+    # Imported here: langgraph is the bulk of the app's import time
+    from langgraph.graph import StateGraph, END
+    
     workflow = StateGraph(WorkflowState)
     
     # Add nodes
@@ -1,36 +1,150 @@
 """Manages workflow execution and state tracking."""
-import uuid
+import os
+import sqlite3
 import threading
-from typing import Dict, Optional
-# Use MemorySaver for now - can be upgraded to SqliteSaver later
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.graph import StateGraph
-from src.workflow import build_workflow
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+from src.cancellation import WorkflowCancelled, cancellation_registry
+from src.coalescing import analysis_flights
+from src.checkpoint_reader import load_latest_values
+from src.findings_index import FindingsIndex, file_digest, findings_index
+from src.hibernation import Hibernator
+from src.tracing import trace_checkpointer, tracer
+from src.workflow import analysis_key, build_workflow
 from src.state import WorkflowState
 from src.logger import workflow_logger
+from src.report_generator import get_report_summary
+from src.resource_limits import resource_accounting
+from src.scheduler import workflow_scheduler
+from src.state_backend import StateBackend, state_backend
+from src.status_store import NodeStatusStore
+from src.webhooks import WebhookNotifier, webhook_notifier
+
+
+# "sqlite" (durable, shared) or "memory" (process-local, lost on restart)
+CHECKPOINT_BACKEND = os.environ.get("CHECKPOINT_BACKEND", "sqlite").lower()
+CHECKPOINT_DB_PATH = os.environ.get("CHECKPOINT_DB_PATH", "data/checkpoints.db")
+
+# Seconds before a dead process's running threads may be recovered elsewhere
+LEASE_TTL = float(os.environ.get("WORKFLOW_LEASE_TTL", "30"))
+
+TERMINAL_STATUSES = ["completed", "error", "cancelled"]
+
+
+def create_checkpointer(kind: str = CHECKPOINT_BACKEND, db_path: str = CHECKPOINT_DB_PATH):
+    """Create the LangGraph checkpointer selected by CHECKPOINT_BACKEND."""
+    if kind == "sqlite":
+        from langgraph.checkpoint.sqlite import SqliteSaver
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        return trace_checkpointer(SqliteSaver(conn))
+    if kind != "memory":
+        raise ValueError("CHECKPOINT_BACKEND must be one of: memory, sqlite")
+    from langgraph.checkpoint.memory import MemorySaver
+    return trace_checkpointer(MemorySaver())
 
 
 class WorkflowManager:
     """Manages multiple workflow executions."""
     
-    def __init__(self, db_path: str = "data/checkpoints.db"):
-        """Initialize workflow manager with Memory checkpointer."""
-        # Using MemorySaver for now - state persists during runtime
-        # TODO: Upgrade to SqliteSaver for persistence across restarts
-        self.checkpointer = MemorySaver()
+    def __init__(
+        self,
+        db_path: str = CHECKPOINT_DB_PATH,
+        backend: StateBackend = state_backend,
+        findings: FindingsIndex = findings_index,
+        webhooks: WebhookNotifier = webhook_notifier
+    ):
+        """
+        Initialize workflow manager with the configured checkpointer and state backend.
         
-        self.graph = build_workflow(self.checkpointer)
-        self.node_statuses: Dict[str, Dict[str, Dict]] = {}  # thread_id -> node_id -> status
+        The checkpointer and compiled graph are created on first use, so
+        importing this module (and answering /health) does not pay for
+        loading langgraph.
+        """
+        self.db_path = db_path
+        self._checkpointer = None
+        self._graph = None
+        self._graph_lock = threading.Lock()
+        self.backend = backend
+        self.status_store = NodeStatusStore(backend)
+        self.findings_index = findings
+        self.webhooks = webhooks
+        
+        # Threads parked for approval are moved to disk once idle
+        self.hibernation = Hibernator(lambda: self.checkpointer, self.status_store, backend)
+        self._dispatcher: Optional[threading.Thread] = None
+        
+        # Execution leases let recovery skip threads a live process is running
+        self.owner_id = str(uuid.uuid4())
+        self._held_leases: set = set()
+        self._lease_renewer: Optional[threading.Thread] = None
+        
+        # Expired deadlines cancel the thread and mark it, even while queued
+        self.cancellation = cancellation_registry
+        self.cancellation.expiry_handler = self._deadline_exceeded
+        
+        if self.backend.shared and CHECKPOINT_BACKEND == "memory":
+            workflow_logger.log(
+                "system",
+                "warn",
+                "Shared state backend with in-memory checkpoints: other workers cannot see workflow state",
+                "system"
+            )
+    
+    def _load_graph(self):
+        """Create the checkpointer and compile the graph once per process."""
+        with self._graph_lock:
+            if self._graph is None:
+                self._checkpointer = create_checkpointer(db_path=self.db_path)
+                self._graph = build_workflow(self._checkpointer)
+        return self._graph
+    
+    @property
+    def graph(self):
+        """Compiled workflow graph, shared by all executions."""
+        return self._graph if self._graph is not None else self._load_graph()
+    
+    @property
+    def checkpointer(self):
+        """Checkpointer backing the compiled graph."""
+        if self._graph is None:
+            self._load_graph()
+        return self._checkpointer
+    
+    def warm_up(self):
+        """Load langgraph and compile the graph ahead of the first request."""
+        self._load_graph()
     
     def start_analysis(
         self,
         file_content: str,
         file_type: str,
-        analysis_type: str
+        analysis_type: str,
+        priority: str = "interactive",
+        client_id: str = "anonymous",
+        deadline: Optional[float] = None,
+        file_name: Optional[str] = None,
+        callback_url: Optional[str] = None
     ) -> str:
         """
         Start a new analysis workflow.
         
+        Args:
+            file_content: Source code content
+            file_type: File extension
+            analysis_type: Type of analysis to perform
+            priority: Scheduling class ("interactive" or "batch")
+            client_id: Fair-sharing key of the submitting client
+            deadline: Epoch seconds after which the run is cancelled
+                (covers queueing and execution up to completion or approval)
+            file_name: Uploaded file name or repository path, for findings search
+            callback_url: URL POSTed the report summary on completion,
+                interrupt, error or cancellation
+        
         Returns:
             thread_id: Unique identifier for this workflow
         """
@@ -40,6 +154,7 @@ class WorkflowManager:
         initial_state: WorkflowState = {
             "file_content": file_content,
             "file_type": file_type,
+            "file_name": file_name,
             "analysis_type": analysis_type,
             "security_findings": [],
             "thread_id": thread_id,
@@ -47,63 +162,495 @@ class WorkflowManager:
             "requires_approval": False,
             "approval_decision": None,
             "status": "running",
-            "error_message": None
+            "error_message": None,
+            "callback_url": callback_url
         }
         
-        # Initialize node statuses
-        self.node_statuses[thread_id] = {}
+        try:
+            self.backend.register_thread(thread_id)
+            workflow_logger.log(thread_id, "info", f"Workflow queued ({priority})", "system")
+            self._dispatch({
+                "type": "start",
+                "thread_id": thread_id,
+                "state": initial_state,
+                "priority": priority,
+                "client_id": client_id,
+                "deadline": deadline
+            })
+        except Exception as e:
+            workflow_logger.log(thread_id, "error", f"Workflow start failed: {str(e)}", "system")
+            raise
         
-        # Create config for this thread
-        config = {"configurable": {"thread_id": thread_id}}
+        return thread_id
+    
+    def _dispatch(self, job: Dict):
+        """Hand a job to the shared queue, or straight to the local scheduler."""
+        job["queued_ns"] = time.time_ns()
+        if self.backend.shared:
+            self.backend.push_job(job)
+            self.start_dispatcher()
+        else:
+            self._schedule(job)
+    
+    def _schedule(self, job: Dict):
+        """Queue a job on this process's scheduler."""
+        thread_id = job["thread_id"]
+        if job.get("deadline") is not None:
+            self.cancellation.set_deadline(thread_id, job["deadline"])
         
-        # Invoke workflow in background thread
-        try:
-            workflow_logger.log(thread_id, "info", "Workflow started", "system")
+        def traced(run: Callable[[], None]) -> Callable[[], None]:
+            def start():
+                # Time between dispatch and a worker picking the job up
+                if job.get("queued_ns") is not None:
+                    tracer.record("scheduler.queue", thread_id, job["queued_ns"], time.time_ns(), job=job["type"])
+                run()
+            return start
+        
+        if job["type"] == "resume":
+            # Resumed workflows jump the queue
+            workflow_scheduler.submit(
+                traced(lambda: self._continue_workflow(thread_id, job["decision"])),
+                priority="resume",
+                client_id=thread_id
+            )
+        elif job["type"] == "recover":
+            # Recovered work shares the interactive class fairly with new requests
+            workflow_scheduler.submit(
+                traced(lambda: self._recover_workflow(thread_id)),
+                priority="interactive",
+                client_id="recovery"
+            )
+        else:
+            def requeue():
+                # After the identical analysis it waited for; its queue time is already traced
+                self._schedule(dict(job, queued_ns=None))
             
-            def run_workflow():
+            workflow_scheduler.submit(
+                traced(lambda: self._run_workflow(thread_id, job["state"], requeue)),
+                priority=job.get("priority", "interactive"),
+                client_id=job.get("client_id", "anonymous")
+            )
+    
+    def start_dispatcher(self):
+        """
+        Start pulling jobs from a shared backend into the local scheduler.
+        
+        Jobs are only claimed while a local worker is free, so idle
+        replicas pick up work that busy ones cannot start yet.
+        """
+        if not self.backend.shared or self._dispatcher is not None:
+            return
+        
+        def dispatch_loop():
+            while True:
                 try:
-                    # Run workflow - check for interrupts after each step
-                    for event in self.graph.stream(initial_state, config):
-                        # Update node statuses as workflow progresses
-                        for node_name, node_output in event.items():
-                            if thread_id not in self.node_statuses:
-                                self.node_statuses[thread_id] = {}
-                            
-                            # Mark node as running
-                            if node_name not in self.node_statuses[thread_id]:
-                                self.node_statuses[thread_id][node_name] = {
-                                    "status": "running",
-                                    "started_at": None,
-                                    "completed_at": None,
-                                    "error": None
-                                }
-                            
-                            # Check if workflow is interrupted
-                            state = self.graph.get_state(config)
-                            if state.values and state.values.get("status") == "interrupted":
-                                # Workflow paused for human approval
-                                self.node_statuses[thread_id][node_name]["status"] = "completed"
-                                return  # Exit and wait for resume
-                            
-                            # Mark node as completed
-                            self.node_statuses[thread_id][node_name]["status"] = "completed"
-                            
+                    if not workflow_scheduler.has_capacity():
+                        time.sleep(0.05)
+                        continue
+                    job = self.backend.pop_job(timeout=1.0)
+                    if job is not None:
+                        self._schedule(job)
                 except Exception as e:
-                    workflow_logger.log(thread_id, "error", f"Workflow execution error: {str(e)}", "system")
-                    state = self.graph.get_state(config)
-                    if state.values:
-                        state.values["status"] = "error"
-                        state.values["error_message"] = str(e)
-            
-            # Start workflow in background thread
-            thread = threading.Thread(target=run_workflow, daemon=True)
-            thread.start()
-            
+                    workflow_logger.log("system", "error", f"Job dispatch error: {str(e)}", "system")
+                    time.sleep(1.0)
+        
+        self._dispatcher = threading.Thread(target=dispatch_loop, name="job-dispatcher", daemon=True)
+        self._dispatcher.start()
+    
+    @contextmanager
+    def _thread_lease(self, thread_id: str) -> Iterator[bool]:
+        """
+        Hold the execution lease for a thread while it runs.
+        
+        Yields False if another live process is already running the thread.
+        Leases are renewed in the background and expire if this process dies,
+        which is how startup recovery tells orphaned threads from live ones.
+        """
+        key = f"thread:{thread_id}"
+        if key in self._held_leases or not self.backend.acquire_lease(key, self.owner_id, LEASE_TTL):
+            yield False
+            return
+        self._held_leases.add(key)
+        self._start_lease_renewer()
+        try:
+            yield True
+        finally:
+            self._held_leases.discard(key)
+            self.backend.release_lease(key, self.owner_id)
+    
+    def _start_lease_renewer(self):
+        if self._lease_renewer is not None:
+            return
+        
+        def renew_loop():
+            while True:
+                time.sleep(LEASE_TTL / 3)
+                for key in list(self._held_leases):
+                    try:
+                        self.backend.acquire_lease(key, self.owner_id, LEASE_TTL)
+                    except Exception as e:
+                        workflow_logger.log("system", "warn", f"Lease renewal failed: {str(e)}", "system")
+        
+        self._lease_renewer = threading.Thread(target=renew_loop, name="lease-renewer", daemon=True)
+        self._lease_renewer.start()
+    
+    def _stream(self, thread_id: str, graph_input: Optional[Dict], config: Dict, stop_on_interrupt: bool):
+        """
+        Stream the graph in debug mode, tracking each node's lifecycle.
+        
+        Checkpoint events list the nodes scheduled next (pending), task
+        events mark a node running and task results mark it completed.
+        """
+        running = set()
+        spans = {}
+        interrupted = False
+        try:
+            for event in self.graph.stream(graph_input, config, stream_mode="debug"):
+                # Stop between steps once cancelled; subprocesses are already killed
+                self.cancellation.check(thread_id)
+                payload = event["payload"]
+                if event["type"] == "checkpoint":
+                    if interrupted:
+                        # Paused for human approval - exit once the step is checkpointed
+                        return
+                    for node_name in payload.get("next", []):
+                        if not node_name.startswith("__"):
+                            self.status_store.mark_pending(thread_id, node_name)
+                elif event["type"] == "task":
+                    running.add(payload["name"])
+                    self.status_store.mark_running(thread_id, payload["name"])
+                    spans[payload["name"]] = tracer.start_span(f"node.{payload['name']}", thread_id)
+                elif event["type"] == "task_result":
+                    running.discard(payload["name"])
+                    error = payload.get("error")
+                    tracer.end_span(spans.pop(payload["name"], None), error=str(error) if error else None)
+                    # Analyzer subprocesses the node ran (peak RSS, CPU, limit hit)
+                    usage = resource_accounting.take(thread_id)
+                    if error:
+                        self.status_store.mark_failed(thread_id, payload["name"], str(error), usage)
+                        continue
+                    self.status_store.mark_completed(thread_id, payload["name"], usage)
+                    writes = dict(payload.get("result") or [])
+                    if stop_on_interrupt and writes.get("status") == "interrupted":
+                        interrupted = True
         except Exception as e:
-            workflow_logger.log(thread_id, "error", f"Workflow start failed: {str(e)}", "system")
+            usage = resource_accounting.take(thread_id)
+            for node_name in running:
+                self.status_store.mark_failed(thread_id, node_name, str(e), usage)
+                tracer.end_span(spans.pop(node_name, None), error=str(e))
             raise
+    
+    def _finish_if_terminal(self, thread_id: str, config: Dict):
+        """
+        Index the findings of a workflow that stopped, notify its callback,
+        park it for hibernation if it awaits approval, and schedule node
+        status cleanup once it has completed or failed.
+        """
+        try:
+            values = self.graph.get_state(config).values
+        except Exception:
+            return
+        status = values.get("status")
+        if status in TERMINAL_STATUSES or status == "interrupted":
+            self._index_findings(thread_id, values)
+        if status in ("completed", "error", "interrupted"):
+            # Cancellations notify from _mark_cancelled, which also runs outside workers
+            self._notify_callback(thread_id, values)
+        if status == "interrupted":
+            self.hibernation.park(thread_id)
+        elif status in TERMINAL_STATUSES:
+            self.hibernation.unpark(thread_id)
+            self.status_store.finish(thread_id)
+    
+    def _index_findings(self, thread_id: str, values: Dict):
+        """Add a thread's findings to the search index (first stop only)."""
+        try:
+            self.findings_index.index_thread(
+                thread_id,
+                values.get("security_findings") or [],
+                file_digest(values.get("file_content", "")),
+                file_name=values.get("file_name"),
+                file_type=values.get("file_type")
+            )
+        except Exception as e:
+            workflow_logger.log(thread_id, "warn", f"Findings indexing failed: {str(e)}", "system")
+    
+    def _notify_callback(self, thread_id: str, values: Dict):
+        """Queue the report summary for the thread's callback URL, if it has one."""
+        callback_url = values.get("callback_url")
+        if not callback_url:
+            return
+        try:
+            summary = get_report_summary(thread_id, self._status_from_values(thread_id, values))
+            self.webhooks.notify(callback_url, thread_id, summary)
+        except Exception as e:
+            workflow_logger.log(thread_id, "warn", f"Callback notification failed: {str(e)}", "system")
+    
+    def _run_workflow(self, thread_id: str, initial_state: WorkflowState, requeue: Callable[[], None]):
+        """
+        Execute a new workflow until it completes or is interrupted.
         
-        return thread_id
+        If an identical analysis is already running, the job gives its
+        worker back instead and requeue() runs it again once that
+        analysis has finished and shared its findings.
+        """
+        config = {"configurable": {"thread_id": thread_id}}
+        with self._thread_lease(thread_id) as acquired, self.cancellation.running(thread_id) as cancelled:
+            try:
+                if not acquired:
+                    return
+                if cancelled:
+                    # Cancelled while queued: give the worker straight back
+                    self._cancel_dequeued(thread_id, cancelled, initial_state.get("callback_url"))
+                    return
+                if not analysis_flights.join(analysis_key(initial_state), thread_id, requeue):
+                    return
+                workflow_logger.log(thread_id, "info", "Workflow started", "system")
+                try:
+                    with tracer.span("workflow.run", thread_id):
+                        self._stream(thread_id, initial_state, config, stop_on_interrupt=True)
+                except WorkflowCancelled as e:
+                    self._mark_cancelled(thread_id, e.reason)
+                except Exception as e:
+                    workflow_logger.log(thread_id, "error", f"Workflow execution error: {str(e)}", "system")
+                    self._mark_error(config, str(e))
+                finally:
+                    self.cancellation.clear_deadline(thread_id)
+                self._finish_if_terminal(thread_id, config)
+            finally:
+                # A leader that never finished its analysis hands it on
+                analysis_flights.release(thread_id)
+    
+    def _continue_workflow(self, thread_id: str, decision: str):
+        """Apply a human decision and continue an interrupted workflow."""
+        config = {"configurable": {"thread_id": thread_id}}
+        with self._thread_lease(thread_id) as acquired, self.cancellation.running(thread_id) as cancelled:
+            if not acquired:
+                return
+            if cancelled:
+                self._cancel_dequeued(thread_id, cancelled)
+                return
+            try:
+                self.hibernation.ensure_resident_many([thread_id])
+                
+                with tracer.span("workflow.resume", thread_id, decision=decision):
+                    # Update state with decision
+                    self.graph.update_state(config, {"approval_decision": decision})
+                    
+                    # Continue execution from where it left off
+                    self._stream(thread_id, None, config, stop_on_interrupt=False)
+            except WorkflowCancelled as e:
+                self._mark_cancelled(thread_id, e.reason)
+            except Exception as e:
+                workflow_logger.log(thread_id, "error", f"Resume execution error: {str(e)}", "system")
+                self._mark_error(config, str(e))
+            self._finish_if_terminal(thread_id, config)
+    
+    def _recover_workflow(self, thread_id: str):
+        """Continue a workflow orphaned by a crash from its last checkpoint."""
+        config = {"configurable": {"thread_id": thread_id}}
+        with self._thread_lease(thread_id) as acquired, self.cancellation.running(thread_id) as cancelled:
+            if not acquired:
+                return
+            if cancelled:
+                self._cancel_dequeued(thread_id, cancelled)
+                return
+            try:
+                self.hibernation.ensure_resident_many([thread_id])
+                state = self.graph.get_state(config)
+                if not state.values:
+                    return
+                status = state.values.get("status")
+                resuming = status == "interrupted" and state.values.get("approval_decision")
+                if status != "running" and not resuming:
+                    # Finished or still waiting for a human; a duplicate job
+                    return
+                if not state.next:
+                    self._mark_error(config, "Workflow was interrupted by a server restart")
+                    return
+                workflow_logger.log(thread_id, "info", "Recovering workflow from last checkpoint", "system")
+                with tracer.span("workflow.recover", thread_id):
+                    self._stream(thread_id, None, config, stop_on_interrupt=not resuming)
+            except WorkflowCancelled as e:
+                self._mark_cancelled(thread_id, e.reason)
+            except Exception as e:
+                workflow_logger.log(thread_id, "error", f"Recovery execution error: {str(e)}", "system")
+                self._mark_error(config, str(e))
+            self._finish_if_terminal(thread_id, config)
+    
+    def recover_thread(self, thread_id: str):
+        """Queue an orphaned thread for recovery on any worker."""
+        self._dispatch({"type": "recover", "thread_id": thread_id})
+    
+    def _mark_error(self, config: Dict, error_message: str):
+        """Persist an error status so pollers see the workflow as finished."""
+        try:
+            self.graph.update_state(
+                config,
+                {"status": "error", "error_message": error_message}
+            )
+        except Exception:
+            # Nothing was checkpointed yet; the error is still in the logs
+            pass
+    
+    def _mark_cancelled(self, thread_id: str, reason: str, callback_url: Optional[str] = None):
+        """
+        Persist a cancelled status; the thread stops at its current step.
+        
+        callback_url is passed for threads cancelled before their first
+        checkpoint, whose state does not hold it yet.
+        """
+        config = {"configurable": {"thread_id": thread_id}}
+        update = {"status": "cancelled", "error_message": reason}
+        if callback_url:
+            update["callback_url"] = callback_url
+        try:
+            # Written as the last node, so nothing is left to run or recover
+            self.graph.update_state(config, update, as_node="complete")
+            values = self.graph.get_state(config).values
+        except Exception as e:
+            workflow_logger.log(thread_id, "error", f"Failed to mark workflow cancelled: {str(e)}", "system")
+            return
+        workflow_logger.log(thread_id, "warn", f"Workflow cancelled: {reason}", "system")
+        self._notify_callback(thread_id, values)
+        self.hibernation.unpark(thread_id)
+        self.status_store.finish(thread_id)
+    
+    def _cancel_dequeued(self, thread_id: str, reason: str, callback_url: Optional[str] = None):
+        """
+        Cancel a job picked up after its thread was cancelled.
+        
+        cancel_workflow() already marks threads that were only queued, so
+        those are skipped instead of being cancelled (and logged) twice.
+        """
+        if self.get_thread_status(thread_id) in TERMINAL_STATUSES:
+            return
+        self._mark_cancelled(thread_id, reason, callback_url)
+    
+    def cancel_workflow(self, thread_id: str, reason: str = "Cancelled by user") -> Optional[str]:
+        """
+        Cancel a queued, running or interrupted workflow.
+        
+        A running thread has its ESLint process group killed and stops at
+        its current step; its worker then marks it cancelled. Threads not
+        executing anywhere (queued or awaiting approval) are marked at once.
+        
+        Returns:
+            "cancelled", the terminal status if the workflow had already
+            finished, or None if the thread is unknown
+        """
+        self.hibernation.ensure_resident_many([thread_id])
+        config = {"configurable": {"thread_id": thread_id}}
+        values = self.graph.get_state(config).values
+        if not values and not self.backend.thread_exists(thread_id):
+            return None
+        status = values.get("status", "running") if values else "running"
+        if status in TERMINAL_STATUSES:
+            return status
+        
+        self.cancellation.cancel(thread_id, reason)
+        if self.backend.lease_owner(f"thread:{thread_id}") is None:
+            self._mark_cancelled(thread_id, reason)
+        return "cancelled"
+    
+    def _deadline_exceeded(self, thread_id: str):
+        self.cancel_workflow(thread_id, "Deadline exceeded")
+    
+    def get_thread_status(self, thread_id: str) -> Optional[str]:
+        """
+        Get only the workflow status string for a thread.
+        
+        Cheaper than get_status() as it skips logs and findings.
+        
+        Returns:
+            Status string or None if the thread has no checkpoint yet
+        """
+        self.hibernation.ensure_resident(thread_id)
+        config = {"configurable": {"thread_id": thread_id}}
+        state = self.graph.get_state(config)
+        if not state.values:
+            return None
+        return state.values.get("status", "running")
+    
+    def _status_from_values(self, thread_id: str, values: Dict) -> Dict:
+        """Build the status dictionary from a thread's checkpointed values."""
+        # Get all findings from state
+        all_findings = values.get("security_findings", [])
+        
+        # Build status response
+        return {
+            "status": values.get("status", "running"),
+            "node_statuses": self.status_store.get(thread_id),
+            "logs": workflow_logger.get_logs(thread_id),
+            "interrupt_payload": self._interrupt_payload(values),
+            "error": values.get("error_message"),
+            "all_findings": all_findings  # Include all findings for report generation
+        }
+    
+    def _interrupt_payload(self, values: Dict) -> Optional[Dict]:
+        """Build the interrupt payload if the thread awaits approval."""
+        if values.get("status") != "interrupted":
+            return None
+        critical_findings = [
+            f for f in values.get("security_findings", [])
+            if f.get("severity") in ["critical", "high"]
+        ]
+        if not critical_findings:
+            return None
+        return {
+            "nodeId": values.get("current_node", "approval_check"),
+            "findings": critical_findings,
+            "message": f"Found {len(critical_findings)} critical/high severity security issues"
+        }
+    
+    def get_statuses(self, thread_ids: List[str], fields: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Get compact status summaries of many workflows.
+        
+        All checkpoints are read with one batched checkpointer query, and
+        only the requested fields are built, so e.g. logs are not copied
+        unless asked for.
+        
+        Args:
+            thread_ids: Thread identifiers
+            fields: Subset of status, error, node_statuses, logs,
+                interrupt_payload and findings_summary
+        
+        Returns:
+            thread_id -> summary, or None for unknown threads
+        """
+        self.hibernation.ensure_resident_many(thread_ids)
+        values_by_thread = load_latest_values(self.checkpointer, thread_ids)
+        results: Dict[str, Optional[Dict]] = {}
+        for thread_id in thread_ids:
+            values = values_by_thread.get(thread_id)
+            if values is None:
+                if not self.backend.thread_exists(thread_id):
+                    results[thread_id] = None
+                    continue
+                # Queued but not yet picked up by a scheduler worker
+                values = {}
+            summary: Dict = {}
+            for field in fields:
+                if field == "status":
+                    summary["status"] = values.get("status", "running")
+                elif field == "error":
+                    summary["error"] = values.get("error_message")
+                elif field == "node_statuses":
+                    summary["node_statuses"] = self.status_store.get(thread_id)
+                elif field == "logs":
+                    summary["logs"] = workflow_logger.get_logs(thread_id)
+                elif field == "interrupt_payload":
+                    summary["interrupt_payload"] = self._interrupt_payload(values)
+                elif field == "findings_summary":
+                    counts = {"critical": 0, "high": 0, "medium": 0, "low": 0}
+                    for finding in values.get("security_findings", []):
+                        severity = finding.get("severity")
+                        if severity in counts:
+                            counts[severity] += 1
+                    summary["findings_summary"] = counts
+            results[thread_id] = summary
+        return results
     
     def get_status(self, thread_id: str) -> Optional[Dict]:
         """
@@ -115,41 +662,26 @@ class WorkflowManager:
         config = {"configurable": {"thread_id": thread_id}}
         
         try:
+            self.hibernation.ensure_resident(thread_id)
+            
             # Get current state from checkpointer
             state = self.graph.get_state(config)
             
-            if state.values is None:
-                return None
-            
-            # Get all findings from state
-            all_findings = state.values.get("security_findings", [])
-            
-            # Build status response
-            status_data = {
-                "status": state.values.get("status", "running"),
-                "node_statuses": self.node_statuses.get(thread_id, {}),
-                "logs": workflow_logger.get_logs(thread_id),
-                "interrupt_payload": None,
-                "error": state.values.get("error_message"),
-                "all_findings": all_findings  # Include all findings for report generation
-            }
-            
-            # Build interrupt payload if interrupted
-            if state.values.get("status") == "interrupted":
-                critical_findings = [
-                    f for f in all_findings
-                    if f.get("severity") in ["critical", "high"]
-                ]
-                
-                if critical_findings:
-                    status_data["interrupt_payload"] = {
-                        "nodeId": state.values.get("current_node", "approval_check"),
-                        "findings": critical_findings,
-                        "message": f"Found {len(critical_findings)} critical/high severity security issues"
-                    }
-            
-            return status_data
+            if not state.values:
+                if not self.backend.thread_exists(thread_id):
+                    return None
+                # Queued but not yet picked up by a scheduler worker
+                return {
+                    "status": "running",
+                    "node_statuses": {},
+                    "logs": workflow_logger.get_logs(thread_id),
+                    "interrupt_payload": None,
+                    "error": None,
+                    "all_findings": []
+                }
             
+            return self._status_from_values(thread_id, state.values)
+        
         except Exception as e:
             workflow_logger.log(thread_id, "error", f"Failed to get status: {str(e)}", "system")
             return None
@@ -168,46 +700,19 @@ class WorkflowManager:
         config = {"configurable": {"thread_id": thread_id}}
         
         try:
+            self.hibernation.ensure_resident_many([thread_id])
+            
             # Get current state
             state = self.graph.get_state(config)
             
-            if state.values is None:
+            if not state.values:
                 return False
             
             if state.values.get("status") != "interrupted":
                 return False
             
-            # Update state with decision using Command
-            updated_state = dict(state.values)
-            updated_state["approval_decision"] = decision
-            
-            # Resume workflow by updating state and continuing
-            def continue_workflow():
-                try:
-                    # Update state with decision
-                    self.graph.update_state(config, updated_state)
-                    
-                    # Continue execution from where it left off
-                    for event in self.graph.stream(None, config):
-                        # Update node statuses
-                        for node_name, node_output in event.items():
-                            if thread_id not in self.node_statuses:
-                                self.node_statuses[thread_id] = {}
-                            if node_name not in self.node_statuses[thread_id]:
-                                self.node_statuses[thread_id][node_name] = {
-                                    "status": "running",
-                                    "started_at": None,
-                                    "completed_at": None,
-                                    "error": None
-                                }
-                            self.node_statuses[thread_id][node_name]["status"] = "completed"
-                            
-                except Exception as e:
-                    workflow_logger.log(thread_id, "error", f"Resume execution error: {str(e)}", "system")
-            
-            # Continue in background thread
-            thread = threading.Thread(target=continue_workflow, daemon=True)
-            thread.start()
+            # Continue on whichever worker claims the job
+            self._dispatch({"type": "resume", "thread_id": thread_id, "decision": decision})
             
             workflow_logger.log(
                 thread_id,
@@ -217,7 +722,7 @@ class WorkflowManager:
             )
             
             return True
-            
+        
         except Exception as e:
             workflow_logger.log(thread_id, "error", f"Failed to resume workflow: {str(e)}", "system")
             return False
@@ -225,4 +730,3 @@ class WorkflowManager:
 
 # Global workflow manager instance
 workflow_manager = WorkflowManager()
-
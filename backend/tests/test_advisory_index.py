@@ -0,0 +1,106 @@
+"""Advisory index lookups over exact versions and declared ranges."""
+import pytest
+
+from src.advisory_index import AdvisoryIndex, build_index
+from src.semver import parse_version, range_bounds
+
+
+def osv(advisory_id, name, events=None, versions=None, severity="HIGH"):
+    affected = {"package": {"ecosystem": "npm", "name": name}}
+    if events is not None:
+        affected["ranges"] = [{"type": "SEMVER", "events": events}]
+    if versions is not None:
+        affected["versions"] = versions
+    return {
+        "id": advisory_id,
+        "summary": f"{advisory_id} summary",
+        "affected": [affected],
+        "database_specific": {"severity": severity},
+    }
+
+
+RECORDS = [
+    # Affected from 4.0.0 until fixed in 4.17.21
+    osv("GHSA-fixed", "lodash", [{"introduced": "4.0.0"}, {"fixed": "4.17.21"}]),
+    # Everything up to and including 2.1.0
+    osv("GHSA-last", "minimist", [{"introduced": "0"}, {"last_affected": "2.1.0"}], severity="MODERATE"),
+    # Two separate affected intervals of one advisory
+    osv("GHSA-two", "qs", [{"introduced": "1.0.0"}, {"fixed": "1.2.0"}, {"introduced": "2.0.0"}, {"fixed": "2.1.0"}]),
+    osv("MAL-evil", "evil-pkg", [{"introduced": "0"}]),
+    osv("GHSA-list", "left-pad", versions=["1.1.0"]),
+    osv("GHSA-other", "lodash", [{"introduced": "0"}, {"fixed": "1.0.0"}]),
+    dict(osv("GHSA-gone", "lodash", [{"introduced": "0"}]), withdrawn="2024-01-01T00:00:00Z"),
+    {"id": "PYSEC-1", "affected": [{"package": {"ecosystem": "PyPI", "name": "lodash"}, "versions": ["4.17.0"]}]},
+]
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("advisories") / "advisories.idx")
+    counts = build_index(iter(RECORDS), path)
+    assert counts["advisories"] == 6
+    advisory_index = AdvisoryIndex(path)
+    yield advisory_index
+    advisory_index.close()
+
+
+def ids(matches):
+    return sorted(match.advisory_id for match in matches)
+
+
+@pytest.mark.parametrize("name, version, expected", [
+    ("lodash", "4.17.20", ["GHSA-fixed"]),
+    ("lodash", "4.17.21", []),
+    ("lodash", "3.10.0", []),
+    ("lodash", "0.9.0", ["GHSA-other"]),
+    ("minimist", "2.1.0", ["GHSA-last"]),
+    ("minimist", "2.1.1", []),
+    ("qs", "1.1.5", ["GHSA-two"]),
+    ("qs", "1.5.0", []),
+    ("qs", "2.0.3", ["GHSA-two"]),
+    ("left-pad", "1.1.0", ["GHSA-list"]),
+    ("left-pad", "1.1.1", []),
+    ("evil-pkg", "9.9.9", ["MAL-evil"]),
+    ("unknown", "1.0.0", []),
+])
+def test_lookup_exact_version(index, name, version, expected):
+    assert ids(index.lookup(name, parse_version(version))) == expected
+
+
+def test_lookup_unknown_version_matches_only_whole_package_advisories(index):
+    assert ids(index.lookup("lodash", None)) == []
+    assert ids(index.lookup("evil-pkg", None)) == ["MAL-evil"]
+
+
+def test_match_details(index):
+    [match] = index.lookup("lodash", parse_version("4.17.0"))
+    assert (match.severity, match.fixed, match.summary) == ("high", "4.17.21", "GHSA-fixed summary")
+    [match] = index.lookup("minimist", parse_version("1.0.0"))
+    assert (match.severity, match.fixed) == ("medium", None)
+
+
+@pytest.mark.parametrize("name, spec, expected", [
+    # Every version the range admits is affected
+    ("lodash", ">=4.0.0 <4.17.21", ["GHSA-fixed"]),
+    ("lodash", "~4.16.0", ["GHSA-fixed"]),
+    ("minimist", "<=2.1.0", ["GHSA-last"]),
+    ("minimist", "^1.2.0", ["GHSA-last"]),
+    ("evil-pkg", ">=1.0.0", ["MAL-evil"]),
+    # The range also admits fixed versions: no match for the whole span
+    ("lodash", "^4.17.0", []),
+    ("lodash", ">=4.0.0 <=4.17.21", []),
+    ("minimist", "^2.0.0", []),
+    ("lodash", ">=4.0.0", []),
+    # Spans two affected intervals of one advisory but also the gap between them
+    ("qs", ">=1.0.0 <2.1.0", []),
+    ("qs", "~2.0.0", ["GHSA-two"]),
+])
+def test_lookup_range_requires_every_version_affected(index, name, spec, expected):
+    bounds = range_bounds(spec)
+    assert ids(index.lookup_range(name, bounds.floor, bounds.ceiling, bounds.ceiling_inclusive)) == expected
+
+
+def test_lookup_range_floor_alone_still_finds_the_advisory(index):
+    # The dependency scanner reports such ranges at low severity
+    bounds = range_bounds("^4.17.0")
+    assert ids(index.lookup(name="lodash", version=bounds.floor)) == ["GHSA-fixed"]
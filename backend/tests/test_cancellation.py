@@ -0,0 +1,101 @@
+"""Cancellation registry: cancel flags, subprocess kills and deadlines."""
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from src.cancellation import DEADLINE_REASON, CancellationRegistry, WorkflowCancelled
+from src.state_backend import MemoryBackend, SQLiteBackend
+
+
+@pytest.fixture
+def registry():
+    return CancellationRegistry(MemoryBackend(), poll_interval=0.05)
+
+
+def sleeper() -> subprocess.Popen:
+    # Own process group, as ESLint runs
+    return subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"], start_new_session=True)
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_cancel_before_start_is_seen_when_the_thread_runs(registry):
+    registry.cancel("t1", "Cancelled by user")
+    with registry.running("t1") as cancelled:
+        assert cancelled == "Cancelled by user"
+        with pytest.raises(WorkflowCancelled):
+            registry.check("t1")
+
+
+def test_cancel_while_running_kills_tracked_process(registry):
+    process = sleeper()
+    with registry.running("t1") as cancelled:
+        assert cancelled is None
+        registry.check("t1")
+        with registry.track_process("t1", process):
+            registry.cancel("t1", "Cancelled by user")
+            assert process.wait(timeout=5) < 0
+        with pytest.raises(WorkflowCancelled) as raised:
+            registry.check("t1")
+        assert raised.value.reason == "Cancelled by user"
+    # The flag is dropped with the execution; the backend keeps the request
+    assert registry.reason("t1") is None
+    assert registry.backend.cancel_reason("t1") == "Cancelled by user"
+
+
+def test_process_tracked_after_cancel_is_killed_at_once(registry):
+    registry.cancel("t1", "Cancelled by user")
+    process = sleeper()
+    with registry.running("t1"):
+        with registry.track_process("t1", process):
+            assert process.wait(timeout=5) < 0
+
+
+def test_deadline_calls_expiry_handler(registry):
+    expired = []
+    registry.expiry_handler = expired.append
+    registry.set_deadline("t1", time.time() + 0.1)
+    assert wait_until(lambda: expired == ["t1"])
+
+
+def test_deadline_cancels_by_default(registry):
+    process = sleeper()
+    with registry.running("t1"):
+        with registry.track_process("t1", process):
+            registry.set_deadline("t1", time.time() + 0.1)
+            assert process.wait(timeout=5) < 0
+        assert registry.reason("t1") == DEADLINE_REASON
+
+
+def test_cleared_and_replaced_deadlines_do_not_fire(registry):
+    expired = []
+    registry.expiry_handler = expired.append
+    registry.set_deadline("cleared", time.time() + 0.05)
+    registry.clear_deadline("cleared")
+    registry.set_deadline("moved", time.time() + 0.05)
+    registry.set_deadline("moved", time.time() + 0.3)
+    time.sleep(0.15)
+    assert expired == []
+    assert wait_until(lambda: expired == ["moved"])
+
+
+def test_cancel_from_another_worker_is_picked_up(tmp_path):
+    db_path = str(tmp_path / "state.db")
+    here = CancellationRegistry(SQLiteBackend(db_path), poll_interval=0.05)
+    elsewhere = CancellationRegistry(SQLiteBackend(db_path), poll_interval=0.05)
+    process = sleeper()
+    with here.running("t1"):
+        with here.track_process("t1", process):
+            threading.Thread(target=elsewhere.cancel, args=("t1", "Cancelled by user")).start()
+            assert process.wait(timeout=5) < 0
+        assert here.reason("t1") == "Cancelled by user"
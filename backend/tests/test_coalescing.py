@@ -0,0 +1,118 @@
+"""Single-flight handoff of identical analyses."""
+import pytest
+
+from src.coalescing import SingleFlight
+from src.workflow import analysis_key
+
+
+KEY = ("digest", "js", "security", None)
+
+
+class Requeue:
+    """Records resume() calls, as the scheduler re-queue would."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+
+
+def test_followers_share_one_run_and_get_their_own_copy():
+    flights = SingleFlight(enabled=True)
+    resumes = {thread_id: Requeue() for thread_id in ("t1", "t2", "t3")}
+    assert flights.join(KEY, "t1", resumes["t1"])
+    assert not flights.join(KEY, "t2", resumes["t2"])
+    assert not flights.join(KEY, "t3", resumes["t3"])
+    assert flights.get_metrics()["waiting"] == 2
+
+    runs = []
+
+    def analyze():
+        runs.append(1)
+        return [{"rule": "no-eval", "severity": "critical"}]
+
+    leader_result = flights.run(KEY, "t1", analyze)
+    assert (resumes["t2"].calls, resumes["t3"].calls) == (1, 1)
+    assert resumes["t1"].calls == 0
+
+    # Re-queued followers pick the result up without running it again
+    assert flights.join(KEY, "t2", resumes["t2"])
+    follower_result = flights.run(KEY, "t2", analyze)
+    assert flights.run(KEY, "t3", analyze) == leader_result
+    assert runs == [1]
+    assert follower_result == leader_result
+    follower_result[0]["severity"] = "low"
+    assert leader_result[0]["severity"] == "critical"
+
+    metrics = flights.get_metrics()
+    assert (metrics["leaders"], metrics["coalesced"], metrics["in_flight"]) == (1, 2, 0)
+
+
+def test_failed_leader_hands_the_run_on():
+    flights = SingleFlight(enabled=True)
+    resume_t2, resume_t3 = Requeue(), Requeue()
+    flights.join(KEY, "t1", Requeue())
+    flights.join(KEY, "t2", resume_t2)
+    flights.join(KEY, "t3", resume_t3)
+
+    def fail():
+        raise RuntimeError("eslint crashed")
+
+    with pytest.raises(RuntimeError):
+        flights.run(KEY, "t1", fail)
+    assert (resume_t2.calls, resume_t3.calls) == (1, 1)
+
+    # No result was shared: the first follower back leads a new run
+    assert flights.join(KEY, "t2", resume_t2)
+    assert not flights.join(KEY, "t3", resume_t3)
+    assert flights.run(KEY, "t2", lambda: ["second run"]) == ["second run"]
+    assert flights.run(KEY, "t3", lambda: ["unused"]) == ["second run"]
+    assert flights.get_metrics()["coalesced"] == 1
+
+
+def test_released_leader_that_never_ran_requeues_followers():
+    flights = SingleFlight(enabled=True)
+    resume = Requeue()
+    flights.join(KEY, "t1", Requeue())
+    flights.join(KEY, "t2", resume)
+    # e.g. the leader was cancelled before reaching the analysis node
+    flights.release("t1")
+    assert resume.calls == 1
+    assert flights.join(KEY, "t2", resume)
+
+
+def test_release_drops_an_unclaimed_result():
+    flights = SingleFlight(enabled=True)
+    flights.join(KEY, "t1", Requeue())
+    flights.join(KEY, "t2", Requeue())
+    flights.run(KEY, "t1", lambda: ["shared"])
+    flights.release("t2")
+    assert flights.run(KEY, "t2", lambda: ["own run"]) == ["own run"]
+
+
+def test_different_keys_and_unjoined_threads_run_alone():
+    flights = SingleFlight(enabled=True)
+    assert flights.join(KEY, "t1", Requeue())
+    assert flights.join(("other",) + KEY[1:], "t2", Requeue())
+    # Recovered workflows call run() without joining first
+    assert flights.run(KEY, "t3", lambda: ["alone"]) == ["alone"]
+
+
+def test_disabled_never_coalesces():
+    flights = SingleFlight(enabled=False)
+    assert flights.join(KEY, "t1", Requeue())
+    assert flights.join(KEY, "t2", Requeue())
+    assert flights.run(KEY, "t2", lambda: ["own"]) == ["own"]
+
+
+def test_analysis_key_identifies_content_and_analysis():
+    state = {"file_content": "eval(x)", "file_type": "js", "analysis_type": "security", "file_name": "a.js"}
+    assert analysis_key(state) == analysis_key(dict(state, file_name="b.js"))
+    assert analysis_key(state) != analysis_key(dict(state, file_content="eval(y)"))
+    assert analysis_key(state) != analysis_key(dict(state, analysis_type="quality"))
+
+    manifest = {"file_content": "{}", "file_type": "manifest", "analysis_type": "security"}
+    assert analysis_key(dict(manifest, file_name="package.json")) != analysis_key(
+        dict(manifest, file_name="package-lock.json")
+    )
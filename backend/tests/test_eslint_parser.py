@@ -0,0 +1,99 @@
+"""Streaming ESLint output parser checked against whole-blob json.loads."""
+import io
+import json
+
+import pytest
+
+from src.eslint_tool import SECURITY_RULE_PATTERN, SEVERITY_MAP, iter_security_findings
+
+
+def reference_findings(output: bytes):
+    """What the parser must yield: security messages of every file, in order."""
+    findings = []
+    for result in json.loads(output):
+        for message in result["messages"]:
+            rule = message.get("ruleId")
+            if rule is None or not SECURITY_RULE_PATTERN.search(json.dumps(rule).encode()):
+                continue
+            findings.append({
+                "rule": rule,
+                "severity": SEVERITY_MAP.get(message.get("severity", 1), "medium"),
+                "message": message.get("message", ""),
+                "line": message.get("line"),
+                "column": message.get("column")
+            })
+    return findings
+
+
+def parse(output: bytes, chunk_size: int = 64 * 1024, on_stats=None):
+    return list(iter_security_findings(io.BytesIO(output), chunk_size=chunk_size, on_stats=on_stats))
+
+
+MESSAGES = [
+    {"ruleId": "security/detect-eval-with-expression", "severity": 2, "message": "eval", "line": 1, "column": 1},
+    {"ruleId": "semi", "severity": 1, "message": "Missing semicolon.", "line": 2, "column": 9,
+     "fix": {"range": [10, 10], "text": ";"}},
+    # ruleId not the first key, and strings holding brackets, quotes and escapes
+    {"severity": 1, "ruleId": "no-eval", "message": "eval \"can\" be {harmful} [\\] é", "line": 3, "column": 2},
+    {"ruleId": None, "severity": 2, "message": "Parsing error: Unexpected token }", "line": 4, "column": 1},
+    # Nested deeper than the single-regex fast path handles
+    {"ruleId": "security/detect-object-injection", "severity": 1, "message": "Generic Object Injection Sink",
+     "line": 5, "column": 3,
+     "suggestions": [{"desc": "x", "fix": {"range": [1, 2], "text": "{"}, "data": {"a": {"b": [{"c": "]"}]}}}]},
+    {"ruleId": "no-implied-eval", "severity": 0, "message": "implied", "line": 6, "column": 4},
+    {"ruleId": "quotes", "severity": 2, "message": "Strings must use singlequote.", "line": 7, "column": 5},
+]
+
+
+def eslint_output(files=3, pretty=False):
+    results = [
+        {
+            "filePath": f"/tmp/file{i}.js",
+            "messages": MESSAGES,
+            "errorCount": 3,
+            "source": "const s = \"[{\" + '\"messages\": [' ;",
+            "stats": {"times": {"passes": [{"rules": {"no-eval": {"total": 0.5}}}]}, "fixPasses": 0}
+        }
+        for i in range(files)
+    ]
+    return json.dumps(results, indent=2 if pretty else None).encode()
+
+
+@pytest.mark.parametrize("pretty", [False, True])
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 64 * 1024])
+def test_matches_json_loads(pretty, chunk_size):
+    output = eslint_output(pretty=pretty)
+    assert parse(output, chunk_size) == reference_findings(output)
+
+
+def test_yields_only_security_rules():
+    rules = [finding["rule"] for finding in parse(eslint_output(files=1))]
+    assert rules == [
+        "security/detect-eval-with-expression",
+        "no-eval",
+        "security/detect-object-injection",
+        "no-implied-eval",
+    ]
+
+
+def test_stats_are_decoded_per_file():
+    output = eslint_output(files=2)
+    stats = []
+    parse(output, chunk_size=5, on_stats=stats.append)
+    assert stats == [result["stats"] for result in json.loads(output)]
+
+
+def test_empty_output_has_no_findings():
+    assert parse(b"") == []
+    assert parse(b"[]") == []
+
+
+@pytest.mark.parametrize("output", [
+    b'{"filePath": "a.js"}',
+    b'[{"filePath": "a.js", "messages": [',
+    b'[{"filePath": "a.js", "messages": [{"ruleId": "no-eval", "message": "unterminated',
+    b"]",
+])
+def test_malformed_output_raises(output):
+    with pytest.raises(ValueError):
+        parse(output, chunk_size=4)
@@ -0,0 +1,97 @@
+"""GitIgnore matching and directory discovery."""
+import os
+
+import pytest
+
+from src.repo_scanner import GitIgnore, discover_files, is_ignored
+
+
+def ignored(lines, path, is_dir=False, base="/repo"):
+    return GitIgnore(base, lines).match(os.path.join(base, path), is_dir)
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("debug.log", True),
+    ("src/debug.log", True),
+    ("src/debug.js", None),
+])
+def test_unanchored_pattern_matches_at_any_depth(path, expected):
+    assert ignored(["*.log"], path) is expected
+
+
+def test_slash_anchors_pattern_to_gitignore_directory():
+    assert ignored(["/build"], "build", is_dir=True) is True
+    assert ignored(["/build"], "src/build", is_dir=True) is None
+    assert ignored(["docs/*.md"], "docs/a.md") is True
+    assert ignored(["docs/*.md"], "src/docs/a.md") is None
+
+
+def test_single_star_does_not_cross_directories():
+    assert ignored(["src/*.js"], "src/a.js") is True
+    assert ignored(["src/*.js"], "src/lib/a.js") is None
+
+
+def test_double_star_patterns():
+    assert ignored(["**/fixtures"], "fixtures", is_dir=True) is True
+    assert ignored(["**/fixtures"], "a/b/fixtures", is_dir=True) is True
+    assert ignored(["vendor/**"], "vendor/a/b.js") is True
+    assert ignored(["a/**/z.js"], "a/z.js") is True
+    assert ignored(["a/**/z.js"], "a/b/c/z.js") is True
+
+
+def test_trailing_slash_matches_directories_only():
+    assert ignored(["tmp/"], "tmp", is_dir=True) is True
+    assert ignored(["tmp/"], "tmp", is_dir=False) is None
+
+
+def test_negation_re_includes_and_last_rule_wins():
+    lines = ["*.js", "!keep.js"]
+    assert ignored(lines, "drop.js") is True
+    assert ignored(lines, "keep.js") is False
+    assert ignored(["!keep.js", "*.js"], "keep.js") is True
+
+
+def test_comments_blanks_escapes_and_brackets():
+    lines = ["# comment", "", "\\#literal.js", "file[0-9].js", "a?.js"]
+    assert ignored(lines, "#literal.js") is True
+    assert ignored(lines, "comment") is None
+    assert ignored(lines, "file7.js") is True
+    assert ignored(lines, "filex.js") is None
+    assert ignored(lines, "ab.js") is True
+    assert ignored(lines, "abc.js") is None
+
+
+def test_deeper_gitignore_overrides_parent():
+    root = GitIgnore("/repo", ["*.js"])
+    nested = GitIgnore("/repo/lib", ["!*.js"])
+    assert is_ignored("/repo/app.js", False, (root,))
+    assert not is_ignored("/repo/lib/app.js", False, (root, nested))
+
+
+def test_discover_files_applies_gitignore_files(tmp_path):
+    files = {
+        ".gitignore": "dist/\n*.min.js\n",
+        "app.js": "",
+        "app.min.js": "",
+        "README.md": "",
+        "package.json": "{}",
+        "dist/bundle.js": "",
+        "lib/.gitignore": "!*.min.js\n",
+        "lib/util.min.js": "",
+        "node_modules/pkg/package.json": "{}",
+        "node_modules/pkg/index.js": "",
+        ".git/hooks/hook.js": "",
+    }
+    for rel, content in files.items():
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+    found = {f.rel_path: f.file_type for f in discover_files(str(tmp_path), max_workers=2)}
+
+    assert found == {
+        "app.js": "js",
+        "package.json": "manifest",
+        "lib/util.min.js": "js",
+        "node_modules/pkg/index.js": "js",
+    }
@@ -0,0 +1,85 @@
+"""WorkflowScheduler priority classes and per-client fairness."""
+import threading
+
+import pytest
+
+from src import scheduler
+from src.scheduler import WorkflowScheduler
+
+
+def run_order(submissions):
+    """
+    Queue submissions behind a blocked single worker, then run them.
+
+    Args:
+        submissions: (label, priority, client_id) in submission order
+
+    Returns:
+        Labels in the order the worker ran them
+    """
+    pool = WorkflowScheduler(workers=1)
+    started, gate = threading.Event(), threading.Event()
+    order = []
+
+    def block():
+        started.set()
+        gate.wait()
+
+    pool.submit(block)
+    assert started.wait(5)
+    futures = [
+        pool.submit(lambda label=label: order.append(label), priority, client)
+        for label, priority, client in submissions
+    ]
+    gate.set()
+    for future in futures:
+        future.result(timeout=5)
+    return order
+
+
+def test_resume_jobs_run_before_other_classes():
+    order = run_order([
+        ("batch", "batch", "a"),
+        ("interactive", "interactive", "a"),
+        ("resume", "resume", "a"),
+    ])
+    assert order[0] == "resume"
+
+
+def test_interactive_and_batch_share_by_class_weight(monkeypatch):
+    monkeypatch.setattr(scheduler, "CLASS_WEIGHTS", {"interactive": 3, "batch": 1})
+    submissions = [(f"b{i}", "batch", "a") for i in range(4)]
+    submissions += [(f"i{i}", "interactive", "a") for i in range(8)]
+    order = run_order(submissions)
+    # Batch is not starved, but gets one turn in every four
+    assert [label[0] for label in order[:8]] == list("iibiiibi")
+
+
+def test_clients_are_served_round_robin_within_a_class():
+    submissions = [(f"bulk{i}", "batch", "bulk") for i in range(4)]
+    submissions += [("small", "batch", "small")]
+    order = run_order(submissions)
+    assert order.index("small") == 1
+
+
+def test_client_weights_give_longer_turns(monkeypatch):
+    monkeypatch.setattr(scheduler, "CLIENT_WEIGHTS", {"heavy": 2})
+    submissions = [(f"h{i}", "batch", "heavy") for i in range(4)]
+    submissions += [(f"l{i}", "batch", "light") for i in range(2)]
+    assert run_order(submissions) == ["h0", "h1", "l0", "h2", "h3", "l1"]
+
+
+def test_failed_job_resolves_its_future_and_keeps_the_worker():
+    pool = WorkflowScheduler(workers=1)
+
+    def fail():
+        raise RuntimeError("boom")
+
+    failed = pool.submit(fail)
+    assert isinstance(failed.exception(timeout=5), RuntimeError)
+    assert pool.submit(lambda: 42).result(timeout=5) == 42
+
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ValueError, match="priority"):
+        WorkflowScheduler(workers=1).submit(lambda: None, priority="urgent")
@@ -0,0 +1,59 @@
+"""npm range bounds used to match declared dependencies."""
+import pytest
+
+from src.semver import Version, VersionRange, compare_versions, parse_version, range_bounds
+
+
+def v(text):
+    return parse_version(text)
+
+
+@pytest.mark.parametrize("spec, floor, ceiling, inclusive", [
+    ("^4.17.0", "4.17.0", "5.0.0", False),
+    ("^0.2.3", "0.2.3", "0.3.0", False),
+    ("^0.0.3", "0.0.3", "0.0.4", False),
+    ("^1.x", "1.0.0", "2.0.0", False),
+    ("~1.2.3", "1.2.3", "1.3.0", False),
+    ("~1", "1.0.0", "2.0.0", False),
+    ("1.2.3", "1.2.3", "1.2.3", True),
+    ("=1.2.3", "1.2.3", "1.2.3", True),
+    ("1.2", "1.2.0", "1.3.0", False),
+    ("1.x", "1.0.0", "2.0.0", False),
+    (">=1.2.3 <2.0.0", "1.2.3", "2.0.0", False),
+    (">= 1.2.3 < 2", "1.2.3", "2.0.0", False),
+    (">1.2.3 <=1.5.0", "1.2.4", "1.5.0", True),
+    ("<=1.5", "0.0.0", "1.6.0", False),
+    ("1.2.3 - 2.3.4", "1.2.3", "2.3.4", True),
+    ("^1.0.0 || ^3.1.0", "1.0.0", "4.0.0", False),
+    ("<1.0.0 || 1.2.3", "0.0.0", "1.2.3", True),
+    ("1.0.0-beta.2", "1.0.0-beta.2", "1.0.0-beta.2", True),
+])
+def test_bounded_ranges(spec, floor, ceiling, inclusive):
+    assert range_bounds(spec) == VersionRange(spec, v(floor), v(ceiling), inclusive)
+
+
+@pytest.mark.parametrize("spec, floor", [
+    (">=1.2.3", "1.2.3"),
+    (">2", "3.0.0"),
+    ("^1.0.0 || >=3.0.0", "1.0.0"),
+])
+def test_unbounded_ranges(spec, floor):
+    assert range_bounds(spec) == VersionRange(spec, v(floor), None)
+
+
+@pytest.mark.parametrize("spec", [
+    "", "*", "x", "latest", "next",
+    "github:user/repo", "git+https://example.com/repo.git", "file:../lib", "workspace:*",
+    "npm:other@1.0.0", "not a version",
+])
+def test_non_ranges_have_no_bounds(spec):
+    assert range_bounds(spec) is None
+
+
+def test_prerelease_ordering():
+    ordered = ["1.0.0-alpha", "1.0.0-alpha.1", "1.0.0-alpha.beta", "1.0.0-beta.2", "1.0.0-beta.11", "1.0.0"]
+    versions = [v(text) for text in ordered]
+    for lower, higher in zip(versions, versions[1:]):
+        assert compare_versions(lower, higher) < 0
+        assert compare_versions(higher, lower) > 0
+    assert compare_versions(Version(1, 0, 0), v("v1.0.0")) == 0
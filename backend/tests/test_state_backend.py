@@ -0,0 +1,98 @@
+"""Lease and job claim semantics shared by all state backends."""
+import threading
+import time
+
+import pytest
+
+from src.state_backend import MemoryBackend, RedisBackend, SQLiteBackend
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def make_backend(request, tmp_path):
+    """Factory for backend handles that share state, like two workers."""
+    if request.param == "memory":
+        backend = MemoryBackend()
+        return lambda: backend
+    if request.param == "sqlite":
+        return lambda: SQLiteBackend(str(tmp_path / "state.db"))
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    server = fakeredis.FakeServer()
+    return lambda: RedisBackend(client=fakeredis.FakeRedis(server=server), prefix="test")
+
+
+def test_lease_is_exclusive_until_released(make_backend):
+    a, b = make_backend(), make_backend()
+    assert a.acquire_lease("thread:t1", "worker-a", ttl=30)
+    assert not b.acquire_lease("thread:t1", "worker-b", ttl=30)
+    assert b.lease_owner("thread:t1") == "worker-a"
+
+    b.release_lease("thread:t1", "worker-b")  # not the holder: no effect
+    assert a.lease_owner("thread:t1") == "worker-a"
+
+    a.release_lease("thread:t1", "worker-a")
+    assert a.lease_owner("thread:t1") is None
+    assert b.acquire_lease("thread:t1", "worker-b", ttl=30)
+
+
+def test_owner_renews_its_own_lease(make_backend):
+    backend = make_backend()
+    assert backend.acquire_lease("thread:t1", "worker-a", ttl=0.2)
+    time.sleep(0.1)
+    assert backend.acquire_lease("thread:t1", "worker-a", ttl=0.5)
+    time.sleep(0.2)
+    assert backend.lease_owner("thread:t1") == "worker-a"
+
+
+def test_expired_lease_is_taken_over_and_not_extended_by_old_owner(make_backend):
+    a, b = make_backend(), make_backend()
+    assert a.acquire_lease("thread:t1", "worker-a", ttl=0.05)
+    time.sleep(0.1)
+    assert a.lease_owner("thread:t1") is None
+    assert b.acquire_lease("thread:t1", "worker-b", ttl=30)
+
+    # The old owner may neither renew nor drop the new holder's lease
+    assert not a.acquire_lease("thread:t1", "worker-a", ttl=30)
+    a.release_lease("thread:t1", "worker-a")
+    assert b.lease_owner("thread:t1") == "worker-b"
+
+
+def test_each_job_is_claimed_once(make_backend):
+    producer = make_backend()
+    for i in range(50):
+        producer.push_job({"type": "start", "n": i})
+    claimed = []
+    lock = threading.Lock()
+
+    def consume():
+        backend = make_backend()
+        while True:
+            job = backend.pop_job(timeout=0.1)
+            if job is None:
+                return
+            with lock:
+                claimed.append(job["n"])
+
+    workers = [threading.Thread(target=consume) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+
+    assert sorted(claimed) == list(range(50))
+
+
+def test_jobs_are_claimed_oldest_first(make_backend):
+    backend = make_backend()
+    for i in range(3):
+        backend.push_job({"n": i})
+    assert [backend.pop_job(timeout=0.1)["n"] for _ in range(3)] == [0, 1, 2]
+    assert backend.pop_job(timeout=0.1) is None
+
+
+def test_first_cancel_reason_is_kept(make_backend):
+    a, b = make_backend(), make_backend()
+    assert a.cancel_reason("t1") is None
+    a.request_cancel("t1", "Cancelled by user")
+    b.request_cancel("t1", "Deadline exceeded")
+    assert b.cancel_reason("t1") == "Cancelled by user"
@@ -0,0 +1,113 @@
+"""Callback URL checks against requests to internal addresses (SSRF)."""
+import socket
+
+import httpx
+import pytest
+
+from src.webhooks import CallbackRejected, WebhookNotifier, check_addresses, parse_callback_url, validate_callback_url
+
+
+def resolve_to(monkeypatch, *addresses):
+    """Make every host resolve to the given addresses."""
+    def getaddrinfo(host, port, *args, **kwargs):
+        family = lambda address: socket.AF_INET6 if ":" in address else socket.AF_INET
+        return [(family(a), socket.SOCK_STREAM, 6, "", (a, port)) for a in addresses]
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+
+
+@pytest.mark.parametrize("address", [
+    "127.0.0.1",
+    "10.1.2.3",
+    "172.16.0.1",
+    "192.168.1.10",
+    "169.254.169.254",  # Cloud metadata service
+    "100.64.0.1",       # Carrier-grade NAT
+    "0.0.0.0",
+    "224.0.0.1",
+    "::1",
+    "fe80::1%eth0",
+    "fc00::1",
+    "::ffff:127.0.0.1",  # IPv4-mapped
+    "2002:7f00:1::",     # 6to4 around 127.0.0.1
+    "64:ff9b::a00:1",    # NAT64 around 10.0.0.1
+])
+def test_non_public_addresses_are_refused(address):
+    with pytest.raises(CallbackRejected, match="non-public"):
+        check_addresses("hooks.example.com", [address])
+
+
+def test_public_addresses_are_accepted():
+    assert check_addresses("hooks.example.com", ["93.184.216.34", "2606:4700::1111"]) == "93.184.216.34"
+
+
+def test_one_internal_address_among_public_ones_is_refused():
+    with pytest.raises(CallbackRejected):
+        check_addresses("hooks.example.com", ["93.184.216.34", "10.0.0.5"])
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1:8000/hook",
+    "http://[::1]/hook",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://2130706433/hook",  # 127.0.0.1 in decimal
+])
+def test_literal_internal_addresses_are_refused(url):
+    with pytest.raises(CallbackRejected):
+        validate_callback_url(url, allowed=[])
+
+
+def test_hosts_resolving_to_internal_addresses_are_refused(monkeypatch):
+    resolve_to(monkeypatch, "10.0.0.5")
+    with pytest.raises(CallbackRejected, match="10.0.0.5"):
+        validate_callback_url("https://hooks.example.com/ci", allowed=[])
+    resolve_to(monkeypatch, "93.184.216.34")
+    validate_callback_url("https://hooks.example.com/ci", allowed=[])
+
+
+@pytest.mark.parametrize("url", ["ftp://hooks.example.com/", "file:///etc/passwd", "/relative", "http://host:99999/"])
+def test_malformed_urls_are_refused(url):
+    with pytest.raises(CallbackRejected):
+        parse_callback_url(url, allowed=[])
+
+
+def test_allowlist_trusts_listed_hosts_only(monkeypatch):
+    allowed = ["ci.internal", ".example.com"]
+    assert parse_callback_url("http://ci.internal:9000/hook", allowed) == ("ci.internal", 9000, True)
+    assert parse_callback_url("https://a.b.example.com/", allowed)[2]
+    for url in ("https://evilexample.com/", "https://example.com.evil.net/", "http://127.0.0.1/"):
+        with pytest.raises(CallbackRejected, match="WEBHOOK_ALLOWED_HOSTS"):
+            parse_callback_url(url, allowed)
+    # Listed hosts may be internal and are not resolved
+    resolve_to(monkeypatch, "10.0.0.5")
+    validate_callback_url("http://ci.internal:9000/hook", allowed)
+
+
+def deliver(monkeypatch, *addresses):
+    """Send one event to https://hooks.example.com/ci; return the requests that went out."""
+    resolve_to(monkeypatch, *addresses)
+    sent = []
+
+    def handler(request):
+        sent.append(request)
+        return httpx.Response(204)
+
+    notifier = WebhookNotifier(batch_window=0, backoff=0, allowed_hosts=[])
+    notifier._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    notifier.notify("https://hooks.example.com/ci", "t1", {"status": "completed"})
+    assert notifier.flush(timeout=5)
+    return notifier, sent
+
+
+def test_delivery_is_pinned_to_the_checked_address(monkeypatch):
+    notifier, [request] = deliver(monkeypatch, "93.184.216.34")
+    assert request.url.host == "93.184.216.34"
+    assert request.headers["Host"] == "hooks.example.com"
+    assert request.extensions["sni_hostname"] == "hooks.example.com"
+    assert notifier.get_metrics()["delivered"] == 1
+
+
+def test_host_rebound_to_internal_address_is_refused_at_delivery(monkeypatch):
+    notifier, sent = deliver(monkeypatch, "127.0.0.1")
+    assert sent == []
+    metrics = notifier.get_metrics()
+    assert (metrics["failed"], metrics["retries"]) == (1, 0)
@@ -4,6 +4,9 @@ import { useState, useEffect } from 'react';
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_BASE_URL || 'http://localhost:8000';
 
+// Matches the backend's METRICS_REFRESH_INTERVAL (default 30 s)
+const POLL_INTERVAL_MS = 30000;
+
 export interface MetricsSummary {
   totalRequests: number;
   errorRate: number;
@@ -23,121 +26,97 @@ export interface BreakdownData {
   warnings: number;
 }
 
+export interface DashboardMetrics {
+  summary: MetricsSummary;
+  timeSeries: TimeSeriesData[];
+  breakdown: BreakdownData[];
+}
+
+interface DashboardState {
+  data: DashboardMetrics | null;
+  isLoading: boolean;
+  error: string | null;
+}
+
+/**
+ * Shared poller for GET /metrics/dashboard.
+ * Every metrics hook subscribes to the same polling loop, so an open dashboard
+ * makes one request per interval. Revalidation goes through the browser HTTP
+ * cache using the backend's ETag and Cache-Control headers.
+ */
+let dashboardState: DashboardState = { data: null, isLoading: true, error: null };
+const listeners = new Set<(state: DashboardState) => void>();
+let pollInterval: ReturnType<typeof setInterval> | null = null;
+
+function publish(update: Partial<DashboardState>) {
+  dashboardState = { ...dashboardState, ...update };
+  listeners.forEach((listener) => listener(dashboardState));
+}
+
+async function fetchDashboard() {
+  try {
+    publish({ isLoading: dashboardState.data === null, error: null });
+    const response = await fetch(`${API_BASE_URL}/metrics/dashboard`, {
+      credentials: 'include',
+    });
+
+    if (!response.ok) {
+      throw new Error('Failed to fetch dashboard metrics');
+    }
+
+    const result: DashboardMetrics = await response.json();
+    publish({ data: result });
+  } catch (err) {
+    publish({ error: err instanceof Error ? err.message : 'Failed to fetch metrics' });
+  } finally {
+    publish({ isLoading: false });
+  }
+}
+
+function subscribe(listener: (state: DashboardState) => void) {
+  listeners.add(listener);
+  if (listeners.size === 1) {
+    fetchDashboard();
+    pollInterval = setInterval(fetchDashboard, POLL_INTERVAL_MS);
+  }
+  return () => {
+    listeners.delete(listener);
+    if (listeners.size === 0 && pollInterval) {
+      clearInterval(pollInterval);
+      pollInterval = null;
+    }
+  };
+}
+
+function useDashboardMetrics(): DashboardState {
+  const [state, setState] = useState<DashboardState>(dashboardState);
+
+  useEffect(() => subscribe(setState), []);
+
+  return state;
+}
+
 /**
  * Hook to fetch metrics summary
  * Task 10: Wire metrics dashboard to Python backend
  */
 export function useMetricsSummary() {
-  const [data, setData] = useState<MetricsSummary | null>(null);
-  const [isLoading, setIsLoading] = useState(true);
-  const [error, setError] = useState<string | null>(null);
-
-  useEffect(() => {
-    const fetchData = async () => {
-      try {
-        setIsLoading(true);
-        setError(null);
-        const response = await fetch(`${API_BASE_URL}/metrics/summary`, {
-          credentials: 'include',
-        });
-
-        if (!response.ok) {
-          throw new Error('Failed to fetch metrics summary');
-        }
-
-        const result = await response.json();
-        setData(result);
-      } catch (err) {
-        setError(err instanceof Error ? err.message : 'Failed to fetch metrics');
-      } finally {
-        setIsLoading(false);
-      }
-    };
-
-    fetchData();
-    // Poll every 30 seconds
-    const interval = setInterval(fetchData, 30000);
-    return () => clearInterval(interval);
-  }, []);
-
-  return { data, isLoading, error };
+  const { data, isLoading, error } = useDashboardMetrics();
+  return { data: data?.summary ?? null, isLoading, error };
 }
 
 /**
  * Hook to fetch time series data
  */
 export function useMetricsTimeSeries() {
-  const [data, setData] = useState<TimeSeriesData[]>([]);
-  const [isLoading, setIsLoading] = useState(true);
-  const [error, setError] = useState<string | null>(null);
-
-  useEffect(() => {
-    const fetchData = async () => {
-      try {
-        setIsLoading(true);
-        setError(null);
-        const response = await fetch(`${API_BASE_URL}/metrics/timeseries`, {
-          credentials: 'include',
-        });
-
-        if (!response.ok) {
-          throw new Error('Failed to fetch time series data');
-        }
-
-        const result = await response.json();
-        setData(result);
-      } catch (err) {
-        setError(err instanceof Error ? err.message : 'Failed to fetch time series');
-      } finally {
-        setIsLoading(false);
-      }
-    };
-
-    fetchData();
-    // Poll every 30 seconds
-    const interval = setInterval(fetchData, 30000);
-    return () => clearInterval(interval);
-  }, []);
-
-  return { data, isLoading, error };
+  const { data, isLoading, error } = useDashboardMetrics();
+  return { data: data?.timeSeries ?? [], isLoading, error };
 }
 
 /**
  * Hook to fetch breakdown data
  */
 export function useMetricsBreakdown() {
-  const [data, setData] = useState<BreakdownData[]>([]);
-  const [isLoading, setIsLoading] = useState(true);
-  const [error, setError] = useState<string | null>(null);
-
-  useEffect(() => {
-    const fetchData = async () => {
-      try {
-        setIsLoading(true);
-        setError(null);
-        const response = await fetch(`${API_BASE_URL}/metrics/breakdown`, {
-          credentials: 'include',
-        });
-
-        if (!response.ok) {
-          throw new Error('Failed to fetch breakdown data');
-        }
-
-        const result = await response.json();
-        setData(result);
-      } catch (err) {
-        setError(err instanceof Error ? err.message : 'Failed to fetch breakdown');
-      } finally {
-        setIsLoading(false);
-      }
-    };
-
-    fetchData();
-    // Poll every 30 seconds
-    const interval = setInterval(fetchData, 30000);
-    return () => clearInterval(interval);
-  }, []);
-
-  return { data, isLoading, error };
+  const { data, isLoading, error } = useDashboardMetrics();
+  return { data: data?.breakdown ?? [], isLoading, error };
 }
-